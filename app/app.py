@@ -1,16 +1,15 @@
 # Standard Imports
-from typing import Callable, Coroutine, Any
+from typing import Any
 import logging
 from logging import Logger
 from contextlib import asynccontextmanager
 
 # Third Party Imports
-from fastapi import FastAPI, Request, Form, HTTPException, status, Response
+from fastapi import FastAPI, Request, Form, HTTPException, status
 from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.gzip import GZipMiddleware
 from starlette.templating import _TemplateResponse
-from starlette.middleware.sessions import SessionMiddleware
 from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.fastapi import DatastarResponse, datastar_response
 from datastar_py.consts import ElementPatchMode
@@ -21,7 +20,28 @@ from .utils import current_time
 from .models import User, ActiveUsers, Task
 from .routes import api_router, settings_router, packer_router, admin_router
 from .db import init_db, load_fake_data
+from .services import (
+    sync_machine_leases,
+    machine_catalog,
+    clear_exclusions,
+    log_buffer,
+    event_hub,
+    backfill_log_names,
+    machine_names,
+    user_names,
+    analytics_mirror,
+    parquet_exporter,
+    session_store,
+    admission,
+    password_hasher,
+)
 from .config import BASE_DIR, CONFIG_SETTINGS, templates
+from .middleware import (
+    AuthMiddleware,
+    ServerSessionMiddleware,
+    AdmissionMiddleware,
+    rotate_session,
+)
 
 
 # ---------------Logging---------------#
@@ -34,7 +54,23 @@ logger: Logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     await init_db()
     await load_fake_data()
+    await sync_machine_leases()
+    await backfill_log_names()
+    await log_buffer.start()
+    await event_hub.start()
+    # Warmed once the feed is tailed, so no invalidation falls in between
+    await machine_catalog.warm()
+    await machine_names.start()
+    await user_names.start()
+    await parquet_exporter.start()
     yield
+    await parquet_exporter.stop()
+    await analytics_mirror.stop()
+    await user_names.stop()
+    await machine_names.stop()
+    await event_hub.stop()
+    await log_buffer.stop(timeout=CONFIG_SETTINGS.LOG_BUFFER_FLUSH_TIMEOUT_SECONDS)
+    password_hasher.shutdown()
 
 
 # Create FastAPI app
@@ -64,13 +100,31 @@ async def post_login(
     username: str = Form(...),
     password: str = Form(...),
 ) -> RedirectResponse | _TemplateResponse:
-    user: User | None = await User.find_one(User.name == username, User.password == password)
+    user: User | None = None
+    hashed: bool = False
+    # Names aren't unique, so the password picks the user
+    async for candidate in User.find(User.name == username):
+        hashed = hashed or password_hasher.is_hashed(candidate.password)
+        if await password_hasher.verify(candidate.password, password):
+            user = candidate
+            break
+    if not hashed:
+        # Unknown names and plaintext rows cost as much as a wrong password
+        await password_hasher.verify_dummy(password)
     if user is not None:
+        if password_hasher.needs_rehash(user.password):
+            await User.get_pymongo_collection().update_one(
+                {"_id": user.id, "password": user.password},
+                {"$set": {"password": await password_hasher.hash(password)}},
+            )
+        # A fresh session under a fresh id, never one from before the login
+        request.session.clear()
+        rotate_session(request)
         request.session["dark_mode"] = False
         request.session["username"] = user.name
         request.session["admin"] = user.admin
         request.session["user_id"] = str(user.id)
-        request.session["missing_machines"] = list()
+        await clear_exclusions(str(user.id))
         found_active: ActiveUsers | None = await ActiveUsers.find_one(
             ActiveUsers.user_id == str(user.id)
         )
@@ -82,7 +136,7 @@ async def post_login(
         logger.info(f"User Login at {current_time()}: `{user}`")
         return RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
 
-    logger.warning(f"Failed login attempt for user `{username}` and password `{password}`")
+    logger.warning(f"Failed login attempt for user `{username}`")
     return templates.TemplateResponse(
         "login.html", {"request": request, "error": "Invalid credentials"}
     )
@@ -134,50 +188,12 @@ app.include_router(packer_router)
 app.include_router(admin_router)
 
 
-@app.middleware("http")
-async def auth_admin_middleware(
-    request: Request,
-    call_next: Callable[[Request], Coroutine[None, None, Response]],
-) -> Response:
-    included_paths: list[str] = [
-        "/api",
-        "/docs",
-        "/admin",
-    ]
-    if any(request.url.path.startswith(path) for path in included_paths):
-        if request.session.get("admin"):
-            return await call_next(request)
-        else:
-            logger.warning(
-                f"User `{request.session.get('user_id')}` attempted to access admin route"
-            )
-            return RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
-    else:
-        return await call_next(request)
-
-
-@app.middleware("http")
-async def auth_middleware(
-    request: Request,
-    call_next: Callable[[Request], Coroutine[None, None, Response]],
-) -> Response:
-    excluded_paths: list[str] = [
-        "/login",
-        "/style/output.css",
-        "/health",
-        "/style/assets/favicon.ico",
-    ]
-    if any(request.url.path.startswith(path) for path in excluded_paths):
-        return await call_next(request)
-
-    if "username" not in request.session or "user_id" not in request.session:
-        return RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
-
-    return await call_next(request)
-
-
+app.add_middleware(AuthMiddleware)  # pyrefly: ignore
+app.add_middleware(
+    ServerSessionMiddleware,  # pyrefly: ignore
+    store=session_store,
+)
 app.add_middleware(
-    SessionMiddleware,  # pyrefly: ignore
-    secret_key=CONFIG_SETTINGS.SECRET_KEY,
-    max_age=None,
+    AdmissionMiddleware,  # pyrefly: ignore
+    controller=admission,
 )
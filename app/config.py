@@ -1,18 +1,68 @@
+import os
 from pathlib import Path
+from typing import Literal
 
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from pydantic_settings import BaseSettings
 
 BASE_DIR: Path = Path(__file__).parent
 
-# Create Jinja2 templates
-templates: Jinja2Templates = Jinja2Templates(directory=BASE_DIR / "style" / "templates")
-
 
 class ConfigSettings(BaseSettings):
     DB_URI: str = "mongodb://localhost:27017"
-    SECRET_KEY: str = "should-be-changed"
+    # Compiled templates shared by the workers, so only the first one compiles them.
+    # None uses Jinja's per-user directory, which it checks is private to this user
+    TEMPLATE_CACHE_DIR: str | None = None
     FAKE_DATA: bool = True
+    MACHINE_LEASE_SECONDS: int = 120
+    MACHINE_CACHE_SIZE: int = 5000
+    MACHINE_CACHE_TTL_SECONDS: float = 30.0
+    MISSING_MACHINES_TTL_SECONDS: int = 12 * 60 * 60
+    MISSING_MACHINES_MAX: int = 25
+    LOG_BUFFER_MAX_BATCH: int = 500
+    LOG_BUFFER_MAX_DELAY_SECONDS: float = 0.02
+    LOG_BUFFER_MAX_QUEUE: int = 10_000
+    LOG_BUFFER_FLUSH_TIMEOUT_SECONDS: float = 8.0
+    SEARCH_REFRESH_SECONDS: float = 60.0
+    SESSION_BACKEND: Literal["mongo", "memory"] = "mongo"
+    SESSION_CACHE_SIZE: int = 10_000
+    SESSION_TTL_SECONDS: int = 30 * 24 * 60 * 60
+    ADMISSION_CAPACITY: int = 64
+    ADMISSION_PACKER_QUEUE: int = 256
+    ADMISSION_PACKER_TIMEOUT_SECONDS: float = 10.0
+    ADMISSION_USER_QUEUE: int = 256
+    ADMISSION_USER_TIMEOUT_SECONDS: float = 10.0
+    ADMISSION_ADMIN_LIMIT: int = 8
+    ADMISSION_ADMIN_QUEUE: int = 32
+    ADMISSION_ADMIN_TIMEOUT_SECONDS: float = 1.0
+    # scrypt cost, raising it rehashes each password at its next login
+    PASSWORD_SCRYPT_N: int = 2**14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    # Per uvicorn worker, and there are three of them
+    PASSWORD_HASH_WORKERS: int = max((os.cpu_count() or 1) // 3, 1)
+    PASSWORD_HASH_QUEUE: int = 256
+    API_PAGE_SIZE: int = 100
+    API_MAX_PAGE_SIZE: int = 1000
+    # Shared by the workers, the analytics endpoints read it and nothing else. It
+    # holds the export marks too, so mount it on a persistent volume
+    PARQUET_EXPORT_DIR: str = "/var/lib/bff-demo/parquet"
+    # 0 leaves the export to `python -m app.services.parquet`
+    PARQUET_EXPORT_INTERVAL_SECONDS: float = 15 * 60
+    PARQUET_EXPORT_LAG_SECONDS: float = 5 * 60
 
 
 CONFIG_SETTINGS: ConfigSettings = ConfigSettings()
+
+# Create Jinja2 templates
+if CONFIG_SETTINGS.TEMPLATE_CACHE_DIR is not None:
+    # Cached bytecode is executed, so only this user may write it
+    Path(CONFIG_SETTINGS.TEMPLATE_CACHE_DIR).mkdir(mode=0o700, parents=True, exist_ok=True)
+templates: Jinja2Templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader(BASE_DIR / "style" / "templates"),
+        autoescape=select_autoescape(),
+        bytecode_cache=FileSystemBytecodeCache(CONFIG_SETTINGS.TEMPLATE_CACHE_DIR),
+    )
+)
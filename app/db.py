@@ -9,8 +9,21 @@ from pymongo import AsyncMongoClient
 from beanie import init_beanie
 
 # My Imports
-from .models import User, Machine, Log, ActiveUsers, MachineMissingLog
+from .models import (
+    User,
+    Machine,
+    Log,
+    ActiveUsers,
+    MachineMissingLog,
+    MissingMachineExclusions,
+    DashboardEvent,
+    Counter,
+    SessionRecord,
+)
 from .config import CONFIG_SETTINGS
+from .services.events import ensure_event_feed
+from .services.migrations import migrate_log_layout
+from .services.passwords import password_hasher
 
 
 logging.basicConfig(level=logging.INFO)
@@ -21,29 +34,37 @@ logger: Logger = logging.getLogger(__name__)
 async def init_db() -> None:
     logger.info("Initializing database...")
     client: AsyncMongoClient = AsyncMongoClient(CONFIG_SETTINGS.DB_URI)
+    await ensure_event_feed(client["admin"])
+    await migrate_log_layout(client["admin"])
     await init_beanie(
         database=client["admin"],
-        document_models=[User, Machine, Log, ActiveUsers, MachineMissingLog],
+        document_models=[
+            User,
+            Machine,
+            Log,
+            ActiveUsers,
+            MachineMissingLog,
+            MissingMachineExclusions,
+            DashboardEvent,
+            Counter,
+            SessionRecord,
+        ],
     )
     logger.info("Database initialized")
 
 
 # ------------Fake Data-------------#
 async def create_sudo_user() -> None:
-    sudo_user: User | None = await User.find_one(
-        User.name == "sudo", User.admin == True, User.password == "sudo"
-    )
+    sudo_user: User | None = await User.find_one(User.name == "sudo", User.admin == True)
     if sudo_user is None:
-        await User(name="sudo", password="sudo", admin=True).save()
+        await User(name="sudo", password=await password_hasher.hash("sudo"), admin=True).save()
         logger.info("Created sudo user")
 
 
 async def create_plain_user() -> None:
-    plain_user: User | None = await User.find_one(
-        User.name == "user", User.admin == False, User.password == "user"
-    )
+    plain_user: User | None = await User.find_one(User.name == "user", User.admin == False)
     if plain_user is None:
-        await User(name="user", password="user", admin=False).save()
+        await User(name="user", password=await password_hasher.hash("user"), admin=False).save()
         logger.info("Created plain user")
 
 
@@ -546,7 +567,7 @@ async def create_fake_users() -> None:
     fake_users: list[User] = [
         User(
             name=await generate_user_name(),
-            password="password",
+            password=await password_hasher.hash("password"),
             admin=random.random() < 0.25,
             joined_time=datetime.now() - timedelta(days=random.randint(0, 365)),
         )
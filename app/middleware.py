@@ -0,0 +1,237 @@
+# Standard Imports
+import copy
+import logging
+import re
+import secrets
+from logging import Logger
+from typing import Any
+
+# Third Party Imports
+from fastapi import status
+from fastapi.responses import RedirectResponse, JSONResponse, Response
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# My Imports
+from .services import SessionStore, AdmissionController
+
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+# Route classes by path prefix, every other path needs a logged in user
+PUBLIC_PATHS: tuple[str, ...] = (
+    "/login",
+    "/style/output.css",
+    "/health",
+    "/style/assets/favicon.ico",
+)
+ADMIN_PATHS: tuple[str, ...] = (
+    "/api",
+    "/docs",
+    "/admin",
+)
+# Static files and health checks never read the session, so it isn't loaded for them
+SESSIONLESS_PATHS: tuple[str, ...] = (
+    "/style",
+    "/health",
+)
+
+
+def compile_prefixes(**classes: tuple[str, ...]) -> re.Pattern[str]:
+    """
+    Builds one anchored alternation with a named group per route class, so a single
+    `match` finds the class of a path.
+    """
+    return re.compile(
+        "|".join(
+            f"(?P<{name}>{'|'.join(re.escape(prefix) for prefix in prefixes)})"
+            for name, prefixes in classes.items()
+        )
+    )
+
+
+ROUTE_CLASSES: re.Pattern[str] = compile_prefixes(public=PUBLIC_PATHS, admin=ADMIN_PATHS)
+
+# Admission classes, everything else is "user". Long lived streams and health checks
+# never take a slot
+ADMISSION_CLASSES: re.Pattern[str] = compile_prefixes(
+    exempt=("/admin/stream", "/admin/admission", "/health", "/style"),
+    packer=("/packer",),
+    admin=ADMIN_PATHS,
+)
+
+
+def parse_session_cookie(value: str | None) -> tuple[str, int] | None:
+    if not value:
+        return None
+    session_id, _, version = value.rpartition(".")
+    if not session_id or not version.isdigit():
+        return None
+    return session_id, int(version)
+
+
+def rotate_session(connection: HTTPConnection) -> None:
+    """
+    Asks `ServerSessionMiddleware` to move the session to a fresh id when the response
+    goes out, dropping the old one. Called on login, so an id planted or seen before
+    the login is worth nothing after it.
+    """
+    connection.scope["session_rotate"] = True
+
+
+class ServerSessionMiddleware:
+    """
+    Keeps `scope["session"]` in a `SessionStore` instead of in the cookie.
+
+    The cookie only carries `<opaque id>.<version>`, and is only sent back when the
+    session changed, was created, or is due for its expiry to be extended. A cleared
+    session is deleted from the store and its cookie expired, and a rotated one is
+    saved under a new id and the old id deleted. `SESSIONLESS_PATHS` get an empty
+    session and never touch the store.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: SessionStore,
+        session_cookie: str = "session",
+        https_only: bool = False,
+    ):
+        self.app: ASGIApp = app
+        self.store: SessionStore = store
+        self.session_cookie: str = session_cookie
+        self.flags: str = "path=/; httponly; samesite=lax" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return None
+        if scope["path"].startswith(SESSIONLESS_PATHS):
+            scope["session"] = {}
+            await self.app(scope, receive, send)
+            return None
+
+        session_id: str | None = None
+        initial: dict[str, Any] = {}
+        touch: bool = False
+        cookie: tuple[str, int] | None = parse_session_cookie(
+            HTTPConnection(scope).cookies.get(self.session_cookie)
+        )
+        if cookie is not None:
+            state = await self.store.load(*cookie)
+            if state is not None:
+                session_id = cookie[0]
+                initial = state[0]
+                touch = self.store.needs_touch(state[2])
+        scope["session"] = copy.deepcopy(initial)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                session: dict[str, Any] = scope["session"]
+                headers: MutableHeaders = MutableHeaders(scope=message)
+                rotate: bool = scope.get("session_rotate", False)
+                if session and (session_id is None or touch or rotate or session != initial):
+                    current_id: str | None = None if rotate else session_id
+                    if rotate and session_id is not None:
+                        await self.store.delete(session_id)
+                    current_id = current_id or secrets.token_urlsafe(24)
+                    version: int = await self.store.save(current_id, session)
+                    headers.append(
+                        "Set-Cookie", f"{self.session_cookie}={current_id}.{version}; {self.flags}"
+                    )
+                elif not session and session_id is not None:
+                    await self.store.delete(session_id)
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; expires=Thu, 01 Jan 1970 00:00:00 GMT; "
+                        f"{self.flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class AuthMiddleware:
+    """
+    Pure ASGI auth check that runs inside `ServerSessionMiddleware`.
+
+    Public paths pass straight through, anything else needs a logged in session and
+    admin paths also need an admin. Rejected requests are answered with a redirect
+    before the app runs; allowed ones go to the app untouched, so streamed responses
+    are never wrapped.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return None
+
+        matched: re.Match[str] | None = ROUTE_CLASSES.match(scope["path"])
+        route_class: str = "user"
+        if matched is not None and matched.lastgroup is not None:
+            route_class = matched.lastgroup
+        if route_class == "public":
+            await self.app(scope, receive, send)
+            return None
+
+        session: dict[str, Any] = scope.get("session", {})
+        if "username" not in session or "user_id" not in session:
+            response = RedirectResponse(url="/login", status_code=status.HTTP_302_FOUND)
+            await response(scope, receive, send)
+            return None
+
+        if route_class == "admin" and not session.get("admin"):
+            logger.warning(f"User `{session.get('user_id')}` attempted to access admin route")
+            response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
+            await response(scope, receive, send)
+            return None
+
+        await self.app(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    """
+    Outermost middleware: every request waits for a slot of its route class in an
+    `AdmissionController` before anything else runs. Rejected Datastar requests get
+    an empty event stream, so a dashboard keeps what it shows and retries on the next
+    event; other rejected requests get a 503 with `Retry-After`.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app: ASGIApp = app
+        self.controller: AdmissionController = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return None
+
+        matched: re.Match[str] | None = ADMISSION_CLASSES.match(scope["path"])
+        route_class: str = "user"
+        if matched is not None and matched.lastgroup is not None:
+            route_class = matched.lastgroup
+        if route_class == "exempt":
+            await self.app(scope, receive, send)
+            return None
+
+        if not await self.controller.acquire(route_class):
+            response: Response
+            if HTTPConnection(scope).headers.get("datastar-request") == "true":
+                response = Response(status_code=status.HTTP_200_OK, media_type="text/event-stream")
+            else:
+                response = JSONResponse(
+                    {"detail": "Server busy, retry shortly"},
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": "1"},
+                )
+            await response(scope, receive, send)
+            return None
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
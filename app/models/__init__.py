@@ -1,21 +1,56 @@
-from .users import User, UserQuery, UserCreate, UserUpdate  # noqa: F401
+from .users import User, UserQuery, UserCreate, UserUpdate, UserIdProjection  # noqa: F401
 from .machines import (
     Machine,  # noqa: F401
     MachineQuery,  # noqa: F401
     MachineCreate,  # noqa: F401
     MachineUpdate,  # noqa: F401
+    MachineCatalogProjection,  # noqa: F401
     MissingMachine,  # noqa: F401
+    MissingMachineExclusions,  # noqa: F401
     MachineMissingLog,  # noqa: F401
 )
 from .logs import (
     Log,  # noqa: F401
+    LogMeta,  # noqa: F401
     Task,  # noqa: F401
     LogQuery,  # noqa: F401
     LogCreate,  # noqa: F401
     LogUpdate,  # noqa: F401
     LogByDate,  # noqa: F401
+    LogStats,  # noqa: F401
+    LogStatsGroup,  # noqa: F401
+    LogStatsBucket,  # noqa: F401
     Prompt,  # noqa: F401
     PromptCheckIn,  # noqa: F401
     PromptCheckOut,  # noqa: F401
+    PackerBatch,  # noqa: F401
+    PackerBatchCheckOut,  # noqa: F401
+    PackerBatchCheckIn,  # noqa: F401
+    PackerBatchResult,  # noqa: F401
+    DashboardEvent,  # noqa: F401
+    DashboardEventKind,  # noqa: F401
 )
-from .activity import ActiveUsers, ActiveUsersQuery, ActiveUsersCreate, ActiveUsersMachinesProjection  # noqa: F401
+from .activity import (
+    ActiveUsers,  # noqa: F401
+    ActiveUsersQuery,  # noqa: F401
+    ActiveUsersCreate,  # noqa: F401
+    ActiveUsersMachinesProjection,  # noqa: F401
+    Counter,  # noqa: F401
+)
+from .analytics import (
+    AnalyticsDwellKey,  # noqa: F401
+    MachineUtilization,  # noqa: F401
+    DwellTime,  # noqa: F401
+    MissingRate,  # noqa: F401
+)
+from .pages import (
+    MACHINE_FIELDS,  # noqa: F401
+    USER_FIELDS,  # noqa: F401
+    SECRET_FIELDS,  # noqa: F401
+    ProjectedPage,  # noqa: F401
+)
+from .bulk import (
+    BULK_MAX_ITEMS,  # noqa: F401
+    BulkCreateResult,  # noqa: F401
+)
+from .sessions import SessionRecord  # noqa: F401
@@ -27,6 +27,14 @@ class ActiveUsers(Document):
         name = "activity"
 
 
+class Counter(Document):
+    id: str  # pyrefly: ignore
+    value: int = 0
+
+    class Settings:
+        name = "counters"
+
+
 class ActiveUsersQuery(BaseModel):
     operator: Literal["gte", "lte", "eq", "ne", "lt", "gt"] = Field(default="eq")
     ts: datetime | None = Field(default=None)
@@ -0,0 +1,33 @@
+# Standard Imports
+from typing import Literal
+
+# Third Party Imports
+from pydantic import BaseModel
+
+AnalyticsDwellKey = Literal["machine", "user"]
+
+
+class MachineUtilization(BaseModel):
+    machine_id: str
+    machine_name: str
+    sessions: int
+    checked_out_seconds: float
+    utilization: float
+
+
+class DwellTime(BaseModel):
+    id: str
+    name: str | None = None
+    sessions: int
+    avg_seconds: float
+    median_seconds: float
+    p90_seconds: float
+    max_seconds: float
+
+
+class MissingRate(BaseModel):
+    machine_id: str
+    machine_name: str
+    check_outs: int
+    missing_reports: int
+    missing_rate: float
@@ -0,0 +1,12 @@
+# Third Party Imports
+from pydantic import BaseModel
+
+BULK_MAX_ITEMS: int = 5000
+
+
+class BulkCreateResult(BaseModel):
+    index: int
+    name: str | None = None
+    ok: bool
+    id: str | None = None
+    detail: str | None = None
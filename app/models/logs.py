@@ -1,11 +1,12 @@
 # Standard Imports
-from typing import Literal
+from typing import Literal, Annotated
 from datetime import datetime
 from enum import StrEnum
 
 # Third Party Imports
 from pydantic import BaseModel, Field
-from beanie import Document, Link, TimeSeriesConfig, Granularity
+from beanie import Document, Link, TimeSeriesConfig, Granularity, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
 
 # My Imports
 from ..utils import current_time
@@ -31,30 +32,67 @@ class Prompt(BaseModel):
     special_note: str | None = None
 
 
+class LogMeta(BaseModel):
+    user_id: PydanticObjectId
+    machine_id: PydanticObjectId
+    task: Task
+
+
 class Log(Document):
     ts: datetime = Field(default_factory=current_time)
-    user: Link[User]
-    machine: Link[Machine]
+    # Time series metaField: Mongo buckets by it, so keep it to stable grouping keys
+    meta: LogMeta
+    user_name: str | None = None
+    machine_name: str | None = None
     active: bool
     prompt: Prompt
+    revision: int = 0
 
     class Settings:
-        name = "logs"
+        name = "logs_v2"
+        # Each machine/user/task series only sees a few events per shift
         timeseries = TimeSeriesConfig(
             time_field="ts",
-            granularity=Granularity.seconds,
+            meta_field="meta",
+            granularity=Granularity.hours,
         )
+        indexes = [
+            IndexModel([("meta.machine_id", ASCENDING), ("ts", ASCENDING)]),
+            IndexModel([("meta.user_id", ASCENDING), ("ts", ASCENDING)]),
+        ]
 
 
 class LogQuery(BaseModel):
     operator: Literal["gte", "lte", "eq", "ne", "lt", "gt"] = Field(default="eq")
     ts: datetime | None = None
-    user: Link[User] | None = None
-    machine: Link[Machine] | None = None
+    user_id: PydanticObjectId | None = None
+    machine_id: PydanticObjectId | None = None
+    task: Task | None = None
     active: bool | None = None
     prompt: Prompt | None = None
 
 
+LogStatsGroup = Literal["machine", "user", "task"]
+LogStatsBucket = Literal["hour", "day", "week", "month"]
+
+
+class LogStats(BaseModel):
+    bucket: datetime | None = None
+    machine_id: PydanticObjectId | None = None
+    machine_name: str | None = None
+    user_id: PydanticObjectId | None = None
+    user_name: str | None = None
+    task: Task | None = None
+    count: int
+    check_outs: int
+    check_ins: int
+    avg_condition: float
+    avg_battery: float
+    min_battery: int
+    max_battery: int
+    tasks: dict[Task, int]
+
+
 class LogByDate(BaseModel):
     ascending: bool = Field(default=True)
     start_date: datetime
@@ -69,10 +107,10 @@ class LogCreate(BaseModel):
 
 
 class LogUpdate(BaseModel):
-    user: Link[User] | None = None
-    machine: Link[Machine] | None = None
     active: bool | None = None
     prompt: Prompt | None = None
+    # The revision the edit was made from, a newer one on the log means conflict
+    revision: int | None = None
 
 
 class PromptCheckOut(BaseModel):
@@ -88,3 +126,45 @@ class PromptCheckIn(BaseModel):
     condition: int = Field(ge=0, le=5, alias="prompt_condition")
     battery: int = Field(ge=0, le=100, alias="prompt_battery")
     special_note: str | None = Field(alias="prompt_special_note")
+
+
+class PackerBatchCheckOut(PromptCheckOut):
+    event: Literal["check_out"]
+    ts: datetime
+
+
+class PackerBatchCheckIn(PromptCheckIn):
+    event: Literal["check_in"]
+    ts: datetime
+
+
+class PackerBatch(BaseModel):
+    events: list[
+        Annotated[PackerBatchCheckOut | PackerBatchCheckIn, Field(discriminator="event")]
+    ] = Field(min_length=1, max_length=500)
+
+
+class PackerBatchResult(BaseModel):
+    index: int
+    event: Literal["check_out", "check_in"]
+    machine_name: str
+    ok: bool
+    detail: str | None = None
+
+
+# `rename` and `activity` change the `activity` collection outside a check-out/in,
+# `machine` tells every worker's `MachineCatalog` to drop `machine_names`, and
+# `resync` is delivered locally after the feed was down and events may be missing
+DashboardEventKind = Literal[
+    "check_out", "check_in", "log", "missing_machine", "rename", "activity", "machine", "resync"
+]
+
+
+class DashboardEvent(Document):
+    ts: datetime = Field(default_factory=current_time)
+    kind: DashboardEventKind
+    activity_version: int | None = None
+    machine_names: list[str] | None = None
+
+    class Settings:
+        name = "dashboard_events"
@@ -2,11 +2,12 @@
 import logging
 from logging import Logger
 from typing import Literal
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Third Party Imports
-from pydantic import BaseModel, Field
-from beanie import Document, Indexed, Link, TimeSeriesConfig, Granularity
+from pydantic import BaseModel, Field, ConfigDict
+from beanie import Document, Indexed, Link, TimeSeriesConfig, Granularity, PydanticObjectId
+from pymongo import IndexModel, ASCENDING
 
 # My Imports
 from ..utils import current_time
@@ -16,15 +17,28 @@ from .users import User
 logging.basicConfig(level=logging.INFO)
 logger: Logger = logging.getLogger(__name__)
 
+# Lease sentinels: free machines sort before `now`, checked-out machines never expire
+LEASE_FREE: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+LEASE_HELD: datetime = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
 
 class Machine(Document):
     joined_time: datetime = Field(default_factory=current_time)
     name: Indexed(str, unique=True)  # pyrefly: ignore
     joined_condition: int = Field(ge=0, le=5)
     special_note: str | None = None
+    lease_holder: str | None = None
+    lease_expires: datetime = Field(default=LEASE_FREE)
+    # When the current hold was taken, to tell a hold in flight from an orphaned one
+    lease_held_at: datetime | None = None
+    revision: int = 0
 
     class Settings:
         name = "machines"
+        indexes = [
+            IndexModel([("lease_expires", ASCENDING)]),
+            IndexModel([("lease_holder", ASCENDING), ("lease_expires", ASCENDING)]),
+        ]
 
 
 class MachineQuery(BaseModel):
@@ -35,6 +49,8 @@ class MachineQuery(BaseModel):
 
 
 class MachineCreate(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     name: str = Field(min_length=1, alias="machine_create_name")
     joined_condition: int = Field(ge=0, le=5, alias="machine_create_joined_condition")
     special_note: str | None = Field(alias="machine_create_special_note")
@@ -44,16 +60,38 @@ class MachineUpdate(BaseModel):
     name: str | None = None
     joined_condition: int | None = None
     special_note: str | None = None
+    # The revision the edit was made from, a newer one on the machine means conflict
+    revision: int | None = None
+
+
+class MachineCatalogProjection(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    name: str
+    joined_condition: int
 
 
 class MissingMachine(BaseModel):
     machine_name: str = Field(min_length=1, alias="prompt_machine_name")
 
 
+class MissingMachineExclusions(Document):
+    user_id: Indexed(str, unique=True)  # pyrefly: ignore
+    machine_names: list[str] = Field(default_factory=list)
+    expires: datetime
+
+    class Settings:
+        name = "missing_machine_exclusions"
+        indexes = [
+            IndexModel([("expires", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
 class MachineMissingLog(Document):
     ts: datetime = Field(default_factory=current_time)
     user: Link[User]
     machine: Link[Machine]
+    user_name: str | None = None
+    machine_name: str | None = None
 
     class Settings:
         name = "machine_missing_logs"
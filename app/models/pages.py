@@ -0,0 +1,25 @@
+# Standard Imports
+from typing import Any
+
+# Third Party Imports
+from pydantic import BaseModel
+
+# Fields the projected list endpoints may return, `password` is never one of them
+MACHINE_FIELDS: tuple[str, ...] = (
+    "id",
+    "name",
+    "joined_time",
+    "joined_condition",
+    "special_note",
+    "lease_holder",
+    "lease_expires",
+    "revision",
+)
+USER_FIELDS: tuple[str, ...] = ("id", "name", "admin", "joined_time", "revision")
+# Never projected, whatever a caller passes as allowed
+SECRET_FIELDS: frozenset[str] = frozenset({"password"})
+
+
+class ProjectedPage(BaseModel):
+    items: list[dict[str, Any]]
+    next_cursor: str | None = None
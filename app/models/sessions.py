@@ -0,0 +1,21 @@
+# Standard Imports
+from datetime import datetime
+from typing import Any
+
+# Third Party Imports
+from pydantic import Field
+from beanie import Document
+from pymongo import IndexModel, ASCENDING
+
+
+class SessionRecord(Document):
+    id: str  # pyrefly: ignore
+    data: dict[str, Any] = Field(default_factory=dict)
+    version: int = 0
+    expires: datetime
+
+    class Settings:
+        name = "sessions"
+        indexes = [
+            IndexModel([("expires", ASCENDING)], expireAfterSeconds=0),
+        ]
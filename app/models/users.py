@@ -3,8 +3,8 @@ from typing import Literal
 from datetime import datetime
 
 # Third Party Imports
-from pydantic import BaseModel, Field
-from beanie import Document, Indexed
+from pydantic import BaseModel, Field, ConfigDict
+from beanie import Document, Indexed, PydanticObjectId
 
 # My Imports
 from ..utils import current_time
@@ -15,6 +15,7 @@ class User(Document):
     admin: bool = False
     name: Indexed(str) = Field(min_length=1)  # pyrefly: ignore
     password: str = Field(min_length=1)
+    revision: int = 0
 
     class Settings:
         name = "users"
@@ -25,10 +26,11 @@ class UserQuery(BaseModel):
     joined_time: datetime | None = None
     admin: bool | None = False
     name: str | None = None
-    password: str | None = None
 
 
 class UserCreate(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     name: str = Field(min_length=1, alias="user_create_name")
     password: str = Field(min_length=1, alias="user_create_password")
     admin: bool = Field(alias="user_create_admin")
@@ -38,3 +40,9 @@ class UserUpdate(BaseModel):
     admin: bool | None = None
     name: str | None = None
     password: str | None = None
+    # The revision the edit was made from, a newer one on the user means conflict
+    revision: int | None = None
+
+
+class UserIdProjection(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
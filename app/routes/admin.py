@@ -1,5 +1,8 @@
 # Standard Imports
-from typing import Any
+from typing import Any, Literal, Callable, Coroutine, AsyncIterator
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+import asyncio
 import logging
 from logging import Logger
 
@@ -8,16 +11,19 @@ from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import RedirectResponse
 from starlette.templating import _TemplateResponse
 from datastar_py import ServerSentEventGenerator as SSE
+from datastar_py.sse import DatastarEvent
 from datastar_py.consts import ElementPatchMode
 from datastar_py.fastapi import DatastarResponse, read_signals
 from beanie.operators import Set, RegEx, GTE, LTE, Eq, NE, LT, GT, NotIn  # noqa: F401
 from jinja2 import Template
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from beanie import PydanticObjectId
 import pymongo
 
 # My Imports
 from ..utils import current_time
 from ..config import templates
+from ..services import event_hub, admission, password_hasher
 from ..models import (
     Machine,
     Log,
@@ -31,11 +37,15 @@ from ..models import (
     ActiveUsersMachinesProjection,
     MachineMissingLog,
     User,
+    DashboardEventKind,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger: Logger = logging.getLogger(__name__)
 
+STREAM_COALESCE_SECONDS: float = 0.25
+PAGE_SIZE: int = 20
+
 
 # ------------------Setup-------------------#
 router: APIRouter = APIRouter(
@@ -44,6 +54,206 @@ router: APIRouter = APIRouter(
 )
 
 
+# ------------------Views-------------------#
+class TableView(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    table: Literal["activity-logs", "follow-logs", "missing-logs"] = "activity-logs"
+    cursor: str | None = None
+    direction: Literal["after", "before"] = "after"
+    ascending: bool = True
+
+    @property
+    def live(self) -> bool:
+        return self.cursor is None
+
+
+class KeysetPage(BaseModel):
+    rows: list[Any]
+    cursor: str | None
+    before: str | None
+    after: str | None
+    has_before: bool
+    has_after: bool
+
+
+# Tables that each dashboard event changes
+EVENT_TABLES: dict[DashboardEventKind, set[str]] = {
+    "check_out": {"activity-logs", "follow-logs"},
+    "check_in": {"activity-logs", "follow-logs"},
+    "log": {"follow-logs"},
+    "missing_machine": {"missing-logs"},
+    "rename": {"activity-logs", "follow-logs", "missing-logs"},
+    "activity": {"activity-logs"},
+    "machine": set(),
+    "resync": {"activity-logs", "follow-logs", "missing-logs"},
+}
+
+
+def read_view(signals: dict[str, Any] | None, table: str) -> TableView:
+    """
+    Reads the paging signals for `table`, resetting them when switching tables.
+    """
+    if not signals or signals.get("table") != table:
+        return TableView(table=table)  # pyrefly: ignore
+    return TableView(
+        table=table,  # pyrefly: ignore
+        cursor=signals.get("follow_cursor") or None,
+        direction="before" if signals.get("follow_direction") == "before" else "after",
+        ascending=bool(signals.get("follow_acsending")),
+    )
+
+
+def encode_cursor(ts: datetime, document_id: PydanticObjectId) -> str:
+    return urlsafe_b64encode(f"{ts.isoformat()}|{document_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, PydanticObjectId] | None:
+    try:
+        ts, document_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), PydanticObjectId(document_id)
+    except Exception:
+        logger.warning(f"Invalid paging cursor `{cursor}`")
+        return None
+
+
+async def keyset_page(
+    model: type[Log] | type[MachineMissingLog], view: TableView, page_size: int = PAGE_SIZE
+) -> KeysetPage:
+    """
+    Fetches one page of `model` ordered by `(ts, _id)` starting from `view.cursor`.
+
+    Each page is a range seek from the cursor instead of a `skip`, so deep pages
+    cost the same as the first one and new inserts don't shift rows between pages.
+    """
+    position: tuple[datetime, PydanticObjectId] | None = (
+        decode_cursor(view.cursor) if view.cursor is not None else None
+    )
+    # Walking backwards flips both the comparison and the sort
+    forward: bool = view.ascending != (position is not None and view.direction == "before")
+    query: dict[str, Any] = {}
+    if position is not None:
+        ts, document_id = position
+        op: str = "$gt" if forward else "$lt"
+        query = {"$or": [{"ts": {op: ts}}, {"ts": ts, "_id": {op: document_id}}]}
+
+    order: int = pymongo.ASCENDING if forward else pymongo.DESCENDING
+    rows: list = (
+        await model.find(query).sort([("ts", order), ("_id", order)]).limit(page_size + 1).to_list()
+    )
+    has_more: bool = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if position is not None and view.direction == "before":
+        if not has_more:
+            # Walked back to the start, show the live first page instead
+            return await keyset_page(model, view.model_copy(update={"cursor": None}), page_size)
+        rows.reverse()
+        has_before, has_after = True, True
+    else:
+        has_before, has_after = position is not None, has_more
+
+    return KeysetPage(
+        rows=rows,
+        cursor=view.cursor if position is not None else None,
+        before=encode_cursor(rows[0].ts, rows[0].id) if rows else view.cursor,
+        after=encode_cursor(rows[-1].ts, rows[-1].id) if rows else view.cursor,
+        has_before=has_before,
+        has_after=has_after,
+    )
+
+
+def paging_signals(view: TableView, page: KeysetPage) -> dict[str, Any]:
+    return {
+        "follow_cursor": view.cursor or "",
+        "follow_direction": view.direction,
+        "follow_before": page.before or "",
+        "follow_after": page.after or "",
+        "follow_acsending": view.ascending,
+        "disable_paging_left": not page.has_before,
+        "disable_paging_right": not page.has_after,
+        "table": view.table,
+    }
+
+
+# ------------------Renderers-------------------#
+# Table macros, compiled once per worker (or loaded from the bytecode cache) and
+# called directly for every render
+ADMIN_TABLES: Any = templates.env.get_template("admin_tables.html").module
+
+# Rendered activity table for one activity version: (version, events)
+_activity_fragment: tuple[int, list[DatastarEvent]] | None = None
+
+
+async def render_activity_logs(view: TableView) -> list[DatastarEvent]:
+    """
+    Renders the activity table, reusing the cached fragment while the shared
+    activity version is unchanged. The version can't be trusted while the event
+    feed is down, so nothing is reused then.
+    """
+    global _activity_fragment
+    version: int = event_hub.activity_version
+    if not event_hub.live:
+        _activity_fragment = None
+    elif _activity_fragment is not None and _activity_fragment[0] == version:
+        return _activity_fragment[1]
+
+    activity_logs: list[ActiveUsers] = await ActiveUsers.find_all().to_list()
+    html: str = str(ADMIN_TABLES.activity_logs(activity_logs))
+    events: list[DatastarEvent] = [
+        SSE.patch_elements(html),
+        SSE.patch_signals({"table": "activity-logs", "activity_version": version}),
+    ]
+    # Labelled with the version read before the query, so a change that lands
+    # mid-render is picked up on the next request instead of being missed
+    _activity_fragment = (version, events)
+    return events
+
+
+async def render_follow_logs(view: TableView) -> list[DatastarEvent]:
+    page: KeysetPage = await keyset_page(Log, view)
+    view = view.model_copy(update={"cursor": page.cursor})
+
+    html: str = str(ADMIN_TABLES.follow_logs(page.rows))
+    return [
+        SSE.patch_elements(html),
+        SSE.patch_signals(paging_signals(view, page)),
+    ]
+
+
+async def render_missing_logs(view: TableView) -> list[DatastarEvent]:
+    page: KeysetPage = await keyset_page(MachineMissingLog, view)
+    view = view.model_copy(update={"cursor": page.cursor})
+
+    html: str = str(ADMIN_TABLES.missing_logs(page.rows))
+    return [
+        SSE.patch_elements(html),
+        SSE.patch_signals(paging_signals(view, page)),
+    ]
+
+
+RENDERERS: dict[str, Callable[[TableView], Coroutine[None, None, list[DatastarEvent]]]] = {
+    "activity-logs": render_activity_logs,
+    "follow-logs": render_follow_logs,
+    "missing-logs": render_missing_logs,
+}
+
+# Live renders shared by every stream in this worker: view -> (hub seq, render task)
+_live_renders: dict[TableView, tuple[int, asyncio.Task[list[DatastarEvent]]]] = {}
+
+
+async def render_live(view: TableView) -> list[DatastarEvent]:
+    """
+    Renders `view` at most once per hub event, however many dashboards show it.
+    """
+    cached: tuple[int, asyncio.Task[list[DatastarEvent]]] | None = _live_renders.get(view)
+    if cached is None or cached[0] != event_hub.seq or cached[1].cancelled():
+        task: asyncio.Task[list[DatastarEvent]] = asyncio.create_task(RENDERERS[view.table](view))
+        _live_renders[view] = (event_hub.seq, task)
+        cached = _live_renders[view]
+    return await asyncio.shield(cached[1])
+
+
 # ------------------Routes-------------------#
 @router.get("/dashboard/")
 async def dashboard(request: Request) -> _TemplateResponse:
@@ -52,223 +262,70 @@ async def dashboard(request: Request) -> _TemplateResponse:
 
 @router.get("/activity-logs/")
 async def activity_logs(request: Request) -> DatastarResponse:
-    activity_logs: list[ActiveUsers] = await ActiveUsers.find_all().to_list()
-    rows: list[str] = []
-    for log in activity_logs:
-        rows.append(
-            f"""
-<tr class="table-row">
-    <td class="td-cell whitespace-nowrap">{log.ts}</td>
-    <td class="td-cell font-mono text-xs">{log.user_id}</td>
-    <td class="td-cell">{log.machine_name}</td>
-    <td class="td-cell">{log.username}</td>
-    <td class="td-cell">{log.task}</td>
-</tr>
-"""
-        )
-    html: str = f"""
-<div class="table-container" id="table-container" data-on-interval__duration.6s="@get('/admin/activity-logs/')">
-    <table class="data-table">
-        <!-- Table Header -->
-        <thead class="table-header">
-            <tr>
-                <th class="th-cell">Time</th>
-                <th class="th-cell">User Id</th>
-                <th class="th-cell">Machine Name</th>
-                <th class="th-cell">Username</th>
-                <th class="th-cell">Task</th>
-            </tr>
-        </thead>
-        <!-- Table Body -->
-        <tbody>
-            {"".join(rows)}
-        </tbody>
-    </table>
-</div>
-"""
-    return DatastarResponse(
-        [
-            SSE.patch_elements(html),
-            SSE.patch_signals({"table": "activity-logs"}),
-        ]
-    )
+    signals: dict[str, Any] | None = await read_signals(request)
+    if (
+        event_hub.live
+        and signals
+        and signals.get("table") == "activity-logs"
+        and signals.get("activity_version") == event_hub.activity_version
+    ):
+        # The client already shows the current table
+        return DatastarResponse(SSE.patch_signals({"activity_version": event_hub.activity_version}))
+    return DatastarResponse(await render_activity_logs(TableView(table="activity-logs")))
 
 
 @router.get("/follow-logs/")
 async def follow_logs(request: Request) -> DatastarResponse:
-    follow_logs: dict[str, Any] | None = await read_signals(request)
-    print(follow_logs)
-    if follow_logs:
-        page: int = int(follow_logs.get("follow_page"))  # pyrefly: ignore
-        ascending = bool(follow_logs.get("follow_acsending"))
-        prev_table: str = str(follow_logs.get("table"))
-    else:
-        page = 0
-        ascending = True
-
-    if prev_table != "follow-logs":
-        page = 0
-        ascending = True
+    view: TableView = read_view(await read_signals(request), "follow-logs")
+    return DatastarResponse(await render_follow_logs(view))
 
-    if page < 0:
-        page = 0
 
-    if ascending:
-        sort_ts: str = "+ts"
-    else:
-        sort_ts: str = "-ts"
+@router.get("/missing-logs/")
+async def missing_logs(request: Request) -> DatastarResponse:
+    view: TableView = read_view(await read_signals(request), "missing-logs")
+    return DatastarResponse(await render_missing_logs(view))
 
-    logs: list = await Log.find(limit=20, skip=page * 20, fetch_links=True).sort(sort_ts).to_list()
-    if len(logs) < 20:
-        disable_paging_right = True
-    else:
-        disable_paging_right = False
-    if page <= 0:
-        disable_paging_left = True
-    else:
-        disable_paging_left = False
-
-    rows: list[str] = []
-    for log in logs:
-        rows.append(
-            f"""
-<tr class="table-row">
-    <td class="td-cell whitespace-nowrap">{log.ts}</td>
-    <td class="td-cell font-mono text-xs">{log.user.name}</td>
-    <td class="td-cell">{log.machine.name}</td>
-    <td class="td-cell">{log.active}</td>
-    <td class="td-cell">{log.prompt.task}</td>
-</tr>
-"""
-        )
-    data_star_loader: str = (
-        """data-on-interval__duration.6s="@get('/admin/follow-logs/')"""
-        if page == 0
-        else """data-on-load="@get('/admin/follow-logs/')"""
-    )
 
-    html: str = f"""
-<div class="table-container" id="table-container" {data_star_loader}">
-    <table class="data-table">
-        <!-- Table Header -->
-        <thead class="table-header">
-            <tr>
-                <th class="th-cell">Time</th>
-                <th class="th-cell">User Name</th>
-                <th class="th-cell">Machine Name</th>
-                <th class="th-cell">Active</th>
-                <th class="th-cell">Task</th>
-            </tr>
-        </thead>
-        <!-- Table Body -->
-        <tbody>
-            {"".join(rows)}
-        </tbody>
-    </table>
-</div>
-"""
-    return DatastarResponse(
-        [
-            SSE.patch_elements(html),
-            SSE.patch_signals(
-                {
-                    "follow_page": page,
-                    "follow_acsending": ascending,
-                    "disable_paging_left": disable_paging_left,
-                    "disable_paging_right": disable_paging_right,
-                    "table": "follow-logs",
-                }
-            ),
-        ]
-    )
+@router.get("/admission/")
+async def get_admission() -> dict[str, Any]:
+    """
+    Slots in use, queue depth and admitted/rejected counts per route class, for this
+    worker only.
+    """
+    return admission.metrics()
 
 
-@router.get("/missing-logs/")
-async def missing_logs(request: Request) -> DatastarResponse:
-    follow_logs: dict[str, Any] | None = await read_signals(request)
-    print(follow_logs)
-    if follow_logs:
-        page: int = int(follow_logs.get("follow_page"))  # pyrefly: ignore
-        ascending = bool(follow_logs.get("follow_acsending"))
-        prev_table: str = str(follow_logs.get("table"))
-        follow_logs.get("follow_ascending")
-    else:
-        page = 0
-        ascending = True
-        prev_table = "activity-logs"
+@router.get("/passwords/")
+async def get_password_pool() -> dict[str, Any]:
+    """
+    Password hashing pool load and cost parameters, for this worker only.
+    """
+    return password_hasher.metrics()
 
-    if prev_table != "missing-logs":
-        page = 0
-        ascending = True
 
-    if page < 0:
-        page = 0
+@router.get("/stream/")
+async def stream(request: Request) -> DatastarResponse:
+    """
+    Long-lived SSE stream that pushes the dashboard's current table when it changes.
 
-    if ascending:
-        sort_ts: str = "+ts"
-    else:
-        sort_ts: str = "-ts"
+    The dashboard reopens this stream whenever the table or page signals change.
+    Only the live view (first page, no cursor) is refreshed, and bursts of events are
+    coalesced into one render.
+    """
+    signals: dict[str, Any] | None = await read_signals(request)
+    table: str = str(signals.get("table")) if signals else "activity-logs"
+    view: TableView = read_view(signals, table if table in RENDERERS else "activity-logs")
 
-    logs: list = (
-        await MachineMissingLog.find(limit=20, skip=page * 20, fetch_links=True)
-        .sort(sort_ts)
-        .to_list()
-    )
-    if len(logs) < 20:
-        disable_paging_right = True
-    else:
-        disable_paging_right = False
-    if page <= 0:
-        disable_paging_left = True
-    else:
-        disable_paging_left = False
-
-    rows: list[str] = []
-    for log in logs:
-        rows.append(
-            f"""
-<tr class="table-row">
-    <td class="td-cell whitespace-nowrap">{log.ts}</td>
-    <td class="td-cell font-mono text-xs">{log.user.name}</td>
-    <td class="td-cell">{log.machine.name}</td>
-</tr>
-"""
-        )
-    data_star_loader: str = (
-        """data-on-interval__duration.6s="@get('/admin/missing-logs/')"""
-        if page == 0
-        else """data-on-load="@get('/admin/missing-logs/')"""
-    )
+    async def events() -> AsyncIterator[DatastarEvent]:
+        async with event_hub.subscribe() as queue:
+            while True:
+                kinds: set[DashboardEventKind] = {await queue.get()}
+                await asyncio.sleep(STREAM_COALESCE_SECONDS)
+                while not queue.empty():
+                    kinds.add(queue.get_nowait())
+                if not view.live or not any(view.table in EVENT_TABLES[k] for k in kinds):
+                    continue
+                for event in await render_live(view):
+                    yield event
 
-    html: str = f"""
-<div class="table-container" id="table-container" {data_star_loader}">
-    <table class="data-table">
-        <!-- Table Header -->
-        <thead class="table-header">
-            <tr>
-                <th class="th-cell">Time</th>
-                <th class="th-cell">User Name</th>
-                <th class="th-cell">Machine Name</th>
-            </tr>
-        </thead>
-        <!-- Table Body -->
-        <tbody>
-            {"".join(rows)}
-        </tbody>
-    </table>
-</div>
-"""
-    return DatastarResponse(
-        [
-            SSE.patch_elements(html),
-            SSE.patch_signals(
-                {
-                    "follow_page": page,
-                    "follow_acsending": ascending,
-                    "disable_paging_left": disable_paging_left,
-                    "disable_paging_right": disable_paging_right,
-                    "table": "missing-logs",
-                }
-            ),
-        ]
-    )
+    return DatastarResponse(events())
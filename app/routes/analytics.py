@@ -0,0 +1,83 @@
+# Standard Imports
+from typing import Annotated
+from datetime import datetime, timedelta
+
+# Third Party Imports
+from fastapi import APIRouter, HTTPException, status, Query
+
+# My Imports
+from ..utils import current_time
+from ..services import analytics_mirror
+from ..services.analytics import as_naive_utc
+from ..models import AnalyticsDwellKey, MachineUtilization, DwellTime, MissingRate
+
+
+# ------------------Helpers-------------------#
+def window(start_date: datetime | None, end_date: datetime | None) -> tuple[datetime, datetime]:
+    end: datetime = as_naive_utc(end_date if end_date is not None else current_time())
+    start: datetime = as_naive_utc(start_date) if start_date is not None else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="start_date must be before end_date"
+        )
+    return start, end
+
+
+# ------------------Setup-------------------#
+router: APIRouter = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+)
+
+
+# -------------------Analytics-Routes-------------------#
+@router.get("/utilization/", response_model=list[MachineUtilization])
+async def get_utilization(
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+) -> list[MachineUtilization]:
+    """
+    Share of the window each machine spent checked out. Defaults to the last 7 days.
+    """
+    start, end = window(start_date, end_date)
+    try:
+        rows = await analytics_mirror.utilization(start, end, limit)
+    except Exception as e:
+        raise e
+    return [MachineUtilization.model_validate(row) for row in rows]
+
+
+@router.get("/dwell/", response_model=list[DwellTime])
+async def get_dwell(
+    key: Annotated[AnalyticsDwellKey, Query()] = "machine",
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+) -> list[DwellTime]:
+    """
+    How long check-outs last before their check-in, per machine or per user.
+    """
+    start, end = window(start_date, end_date)
+    try:
+        rows = await analytics_mirror.dwell(key, start, end, limit)
+    except Exception as e:
+        raise e
+    return [DwellTime.model_validate(row) for row in rows]
+
+
+@router.get("/missing/", response_model=list[MissingRate])
+async def get_missing_rates(
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+) -> list[MissingRate]:
+    """
+    Missing machine reports per check-out of each machine.
+    """
+    start, end = window(start_date, end_date)
+    try:
+        rows = await analytics_mirror.missing_rates(start, end, limit)
+    except Exception as e:
+        raise e
+    return [MissingRate.model_validate(row) for row in rows]
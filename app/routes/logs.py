@@ -1,18 +1,39 @@
 # Standard Imports
-from typing import Annotated
+from typing import Annotated, Any
+from datetime import datetime
+from zoneinfo import available_timezones
 
 # Third Party Imports
 from fastapi import APIRouter, HTTPException, status, Query
-from beanie.operators import Set, GTE, LTE, RegEx, Eq, NE, LT, GT
+from fastapi.responses import StreamingResponse
+from beanie.operators import GTE, LTE, RegEx, Eq, NE, LT, GT
+import pymongo
 
 # My Imports
+from ..services import (
+    log_buffer,
+    event_hub,
+    machine_catalog,
+    ExportFormat,
+    EXPORT_MEDIA_TYPES,
+    export_logs,
+    log_stats,
+    update_revision,
+)
 from ..models import (
     User,
+    UserIdProjection,
     Machine,
+    MachineCatalogProjection,
     Log,
+    LogMeta,
     LogQuery,
     LogCreate,
+    LogUpdate,
     LogByDate,
+    LogStats,
+    LogStatsGroup,
+    LogStatsBucket,
 )
 
 
@@ -48,8 +69,15 @@ async def create_log(log_request: LogCreate) -> Log:
                 detail=f"Machine with id {log_request.machine} not found",
             )
 
-        log = Log(**log_request.model_dump())
-        await log.create()
+        log = Log(
+            meta=LogMeta(user_id=user.id, machine_id=machine.id, task=log_request.prompt.task),
+            user_name=user.name,
+            machine_name=machine.name,
+            active=log_request.active,
+            prompt=log_request.prompt,
+        )
+        await log_buffer.insert(log)
+        await event_hub.notify("log")
     except Exception as e:
         raise e
     return log
@@ -57,11 +85,41 @@ async def create_log(log_request: LogCreate) -> Log:
 
 @router.get("/", response_model=list[Log])
 async def get_logs(
-    limit: Annotated[int, Query()] = 1000, ascending: Annotated[bool, Query()] = True
-) -> list[Log]:
+    limit: Annotated[int, Query(ge=0)] = 1000,
+    ascending: Annotated[bool, Query()] = True,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "json",
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+) -> list[Log] | StreamingResponse:
+    """
+    `format=ndjson` or `format=csv` streams the result instead of building a list,
+    and `limit=0` removes the row limit for those exports only.
+    """
+    if limit == 0 and export_format == "json":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit=0 is only allowed with format=ndjson or format=csv",
+        )
     sort_ts: str = "+ts" if ascending else "-ts"
+    query_params: list[GTE | LTE] = []
+    if start_date is not None:
+        query_params.append(GTE(Log.ts, start_date))
+    if end_date is not None:
+        query_params.append(LTE(Log.ts, end_date))
     try:
-        logs: list[Log] = await Log.find_all().limit(limit).sort(sort_ts).to_list()
+        if export_format != "json":
+            query: dict = Log.find(*query_params).get_filter_query()
+            return StreamingResponse(
+                export_logs(
+                    query,
+                    sort=[("ts", pymongo.ASCENDING if ascending else pymongo.DESCENDING)],
+                    limit=limit,
+                    export_format=export_format,
+                ),
+                media_type=EXPORT_MEDIA_TYPES[export_format],
+                headers={"Content-Disposition": f"attachment; filename=logs.{export_format}"},
+            )
+        logs: list[Log] = await Log.find(*query_params).limit(limit).sort(sort_ts).to_list()
     except Exception as e:
         raise e
     return logs
@@ -88,10 +146,12 @@ async def query_logs(log_query: Annotated[LogQuery, Query()]) -> list[Log]:
 
         query_params.append(operator(Log.ts, log_query.ts))
 
-        if log_query.user is not None:
-            query_params.append(Eq(Log.user, log_query.user))
-        if log_query.machine is not None:
-            query_params.append(Eq(Log.machine, log_query.machine))
+        if log_query.user_id is not None:
+            query_params.append(Eq(Log.meta.user_id, log_query.user_id))
+        if log_query.machine_id is not None:
+            query_params.append(Eq(Log.meta.machine_id, log_query.machine_id))
+        if log_query.task is not None:
+            query_params.append(Eq(Log.meta.task, log_query.task))
         if log_query.active is not None:
             query_params.append(Eq(Log.active, log_query.active))
         if log_query.prompt is not None:
@@ -122,21 +182,84 @@ async def get_logs_by_date(log_by_date: Annotated[LogByDate, Query()]) -> list[L
 
 @router.get("/by_name/", response_model=list[Log])
 async def get_logs_by_name(
-    machine_name: Annotated[str, Query(min_length=1)], user_name: Annotated[str, Query(min_length=1)]
+    machine_name: Annotated[str | None, Query(min_length=1)] = None,
+    user_name: Annotated[str | None, Query(min_length=1)] = None,
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    ascending: Annotated[bool, Query()] = True,
 ) -> list[Log]:
-    query_params: list = []
+    """
+    Resolves exact user and machine names to ids through the `name` indexes, then
+    reads logs by their series meta over an optional time range.
+    """
+    if user_name is None and machine_name is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a user_name, a machine_name or both",
+        )
+    sort_ts: str = "+ts" if ascending else "-ts"
+    query: dict = {}
     try:
-        if user_name:
-            query_params.append(RegEx("user_name", user_name, "ixsm"))
-        if machine_name:
-            query_params.append(RegEx("machine_name", machine_name, "ixsm"))
+        if user_name is not None:
+            users: list[UserIdProjection] = (
+                await User.find(User.name == user_name).project(UserIdProjection).to_list()
+            )
+            if not users:
+                return []
+            query["meta.user_id"] = {"$in": [user.id for user in users]}
+        if machine_name is not None:
+            machine: MachineCatalogProjection | None = await machine_catalog.get(machine_name)
+            if machine is None:
+                return []
+            query["meta.machine_id"] = machine.id
+        if start_date is not None or end_date is not None:
+            query["ts"] = {}
+            if start_date is not None:
+                query["ts"]["$gte"] = start_date
+            if end_date is not None:
+                query["ts"]["$lte"] = end_date
 
-        logs: list[Log] = await Log.find(*query_params).to_list()
+        logs: list[Log] = await Log.find(query).sort(sort_ts).to_list()
     except Exception as e:
         raise e
     return logs
 
 
+@router.get("/stats/", response_model=list[LogStats])
+async def get_log_stats(
+    group_by: Annotated[list[LogStatsGroup], Query()] = [],
+    bucket: Annotated[LogStatsBucket | None, Query()] = None,
+    timezone: Annotated[str, Query()] = "UTC",
+    start_date: Annotated[datetime | None, Query()] = None,
+    end_date: Annotated[datetime | None, Query()] = None,
+    active: Annotated[bool | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=10_000)] = 1000,
+) -> list[LogStats]:
+    """
+    Groups logs by any of machine, user and task, and optionally by time `bucket`, and
+    returns prompt metrics per group. `active=true` keeps only check-outs and
+    `active=false` only check-ins, e.g. `?group_by=machine&active=false` gives the
+    average battery at check-in per machine.
+    """
+    if timezone != "UTC" and timezone not in available_timezones():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown timezone {timezone}"
+        )
+    try:
+        stats: list[LogStats] = await log_stats(
+            group_by=list(dict.fromkeys(group_by)),
+            bucket=bucket,
+            timezone=timezone,
+            start_date=start_date,
+            end_date=end_date,
+            active=active,
+            limit=limit,
+        )
+    except Exception as e:
+        raise e
+    return stats
+
+
 @router.get("/{log_id}", response_model=Log)
 async def get_log(log_id: str) -> Log:
     try:
@@ -147,11 +270,18 @@ async def get_log(log_id: str) -> Log:
 
 
 @router.put("/{log_id}", response_model=Log, status_code=status.HTTP_202_ACCEPTED)
-async def update_log(log_id: str, log_request: Log) -> Log:
+async def update_log(log_id: str, log_request: LogUpdate) -> Log:
+    """
+    Send the `revision` the edit was made from to get a 409 instead of overwriting a
+    newer edit.
+    """
     try:
-        log: Log = await validate_log(await Log.get(log_id))
-        await log.update(Set(log_request.model_dump(exclude_unset=True)))
-        log = await validate_log(await Log.get(log_id))
+        changes: dict[str, Any] = log_request.model_dump(exclude_unset=True, exclude={"revision"})
+        if log_request.prompt is not None:
+            changes["meta.task"] = log_request.prompt.task
+        log: Log = Log.model_validate(
+            await update_revision(Log, log_id, changes, log_request.revision)
+        )
     except Exception as e:
         raise e
     return log
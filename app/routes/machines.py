@@ -1,19 +1,45 @@
 # Standard Imports
-from typing import Annotated
+from typing import Annotated, Any
 
 # Third Party Imports
-from fastapi import APIRouter, Request, HTTPException, status, Query
+from fastapi import (
+    APIRouter,
+    Request,
+    HTTPException,
+    status,
+    Query,
+    Body,
+    BackgroundTasks,
+    UploadFile,
+)
 from fastapi.responses import HTMLResponse
 from starlette.templating import _TemplateResponse
-from beanie.operators import Set, RegEx, GTE, LTE, Eq, NE, LT, GT
+from pymongo import ReturnDocument
+from beanie.operators import RegEx, GTE, LTE, Eq, NE, LT, GT
 
 # My Imports
-from ..config import templates
+from ..config import templates, CONFIG_SETTINGS
+from ..services import (
+    parse_fields,
+    projected_page,
+    parse_csv_rows,
+    bulk_insert,
+    update_revision,
+    machine_catalog,
+    propagate_machine_rename,
+    machine_names,
+    event_hub,
+    name_prefix,
+)
 from ..models import (
     Machine,
     MachineQuery,
     MachineCreate,
     MachineUpdate,
+    ProjectedPage,
+    BulkCreateResult,
+    BULK_MAX_ITEMS,
+    MACHINE_FIELDS,
 )
 
 
@@ -24,6 +50,25 @@ async def validate_machine(machine: Machine | None) -> Machine:
     return machine
 
 
+async def insert_machines(
+    machine_requests: list[tuple[int, MachineCreate]],
+) -> list[BulkCreateResult]:
+    try:
+        results: list[BulkCreateResult] = await bulk_insert(
+            Machine,
+            [(index, Machine(**request.model_dump())) for index, request in machine_requests],
+        )
+        names: list[str] = [result.name for result in results if result.ok and result.name]
+        if names:
+            machine_catalog.invalidate(*names)
+            await event_hub.notify("machine", names)
+        for name in names:
+            machine_names.add(name)
+    except Exception as e:
+        raise e
+    return results
+
+
 # ------------------Setup-------------------#
 router: APIRouter = APIRouter(
     prefix="/machines",
@@ -45,22 +90,75 @@ async def create_machine(machine_request: MachineCreate) -> Machine:
     try:
         machine = Machine(**machine_request.model_dump())
         await machine.create()
+        machine_catalog.invalidate(machine.name)
+        await event_hub.notify("machine", [machine.name])
+        machine_names.add(machine.name)
     except Exception as e:
         raise e
     return machine
 
 
-@router.get("/get_all/", response_model=list[Machine])
-async def get_machines() -> list[Machine]:
+@router.post(
+    "/bulk/", response_model=list[BulkCreateResult], status_code=status.HTTP_207_MULTI_STATUS
+)
+async def bulk_create_machines(
+    machine_requests: Annotated[list[MachineCreate], Body(max_length=BULK_MAX_ITEMS)],
+) -> list[BulkCreateResult]:
+    """
+    Creates many machines in one unordered insert and reports a result per item.
+    """
+    return await insert_machines(list(enumerate(machine_requests)))
+
+
+@router.post(
+    "/bulk/csv/",
+    response_model=list[BulkCreateResult],
+    status_code=status.HTTP_207_MULTI_STATUS,
+)
+async def bulk_create_machines_csv(file: UploadFile) -> list[BulkCreateResult]:
+    """
+    Same as `/bulk/` from a CSV upload whose header row names the MachineCreate fields.
+    """
+    valid, failed = parse_csv_rows(await file.read(), MachineCreate)
+    if len(valid) + len(failed) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} rows per upload",
+        )
+    results: list[BulkCreateResult] = await insert_machines(valid)
+    return sorted(results + failed, key=lambda result: result.index)
+
+
+@router.get("/get_all/", response_model=ProjectedPage)
+async def get_machines(
+    fields: Annotated[str | None, Query()] = None,
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=CONFIG_SETTINGS.API_MAX_PAGE_SIZE)] = (
+        CONFIG_SETTINGS.API_PAGE_SIZE
+    ),
+) -> ProjectedPage:
+    """
+    One page of machines in id order. Pass `next_cursor` back as `cursor` for the next
+    page, and `fields=name,joined_time` to return only those fields.
+    """
     try:
-        machines: list[Machine] = await Machine.find_all().to_list()
+        page: ProjectedPage = await projected_page(
+            Machine, {}, parse_fields(fields, MACHINE_FIELDS), cursor, limit
+        )
     except Exception as e:
         raise e
-    return machines
+    return page
 
 
-@router.get("/query/", response_model=list[Machine])
-async def query_machines(machine_query: Annotated[MachineQuery, Query()]) -> list[Machine]:
+@router.get("/query/", response_model=ProjectedPage)
+async def query_machines(
+    machine_query: Annotated[MachineQuery, Query()],
+    fields: Annotated[str | None, Query()] = None,
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=CONFIG_SETTINGS.API_MAX_PAGE_SIZE)] = (
+        CONFIG_SETTINGS.API_PAGE_SIZE
+    ),
+) -> ProjectedPage:
     query_params: list[GTE | LTE | RegEx | Eq | NE | LT | GT] = []
     try:
         operator: type[GTE] | type[LTE] | type[Eq] | type[NE] | type[LT] | type[GT] = Eq
@@ -86,23 +184,40 @@ async def query_machines(machine_query: Annotated[MachineQuery, Query()]) -> lis
             ]
         )
         if machine_query.name is not None:
-            query_params.append(RegEx("name", machine_query.name, "ixsm"))
+            query_params.append(name_prefix("name", machine_query.name))
 
-        machines: list[Machine] = await Machine.find(*query_params).to_list()
+        page: ProjectedPage = await projected_page(
+            Machine,
+            Machine.find(*query_params).get_filter_query(),
+            parse_fields(fields, MACHINE_FIELDS),
+            cursor,
+            limit,
+        )
     except Exception as e:
         raise e
-    return machines
+    return page
 
 
 @router.get("/by_name/", response_model=list[Machine])
 async def get_machines_by_name(machine_name: Annotated[str, Query(min_length=1)]) -> list[Machine]:
+    """
+    Machines whose name starts with `machine_name`, case-sensitively so the `name`
+    index serves it. `/search/` matches any case and substrings.
+    """
     try:
-        machines: list[Machine] = await Machine.find(RegEx("name", machine_name, "ixsm")).to_list()
+        machines: list[Machine] = await Machine.find(name_prefix("name", machine_name)).to_list()
     except Exception as e:
         raise e
     return machines
 
 
+@router.get("/search/", response_model=list[str])
+async def search_machines(
+    q: Annotated[str, Query(min_length=1)], limit: Annotated[int, Query(ge=1, le=100)] = 10
+) -> list[str]:
+    return machine_names.search(q, limit)
+
+
 @router.get("/by_id/{machine_id}", response_model=Machine)
 async def get_machine(machine_id: str) -> Machine:
     try:
@@ -113,11 +228,31 @@ async def get_machine(machine_id: str) -> Machine:
 
 
 @router.put("/by_id/{machine_id}", response_model=Machine, status_code=status.HTTP_202_ACCEPTED)
-async def update_machine(machine_id: str, machine_request: MachineUpdate) -> Machine:
+async def update_machine(
+    machine_id: str, machine_request: MachineUpdate, background_tasks: BackgroundTasks
+) -> Machine:
+    """
+    Send the `revision` the edit was made from to get a 409 instead of overwriting a
+    newer edit.
+    """
     try:
-        machine: Machine = await validate_machine(await Machine.get(machine_id))
-        await machine.update(Set(machine_request.model_dump(exclude_unset=True)))
-        machine = await validate_machine(await Machine.get(machine_id))
+        changes: dict[str, Any] = machine_request.model_dump(
+            exclude_unset=True, exclude={"revision"}
+        )
+        # The pre-image gives the old name, the post-image follows from it
+        before: dict[str, Any] = await update_revision(
+            Machine, machine_id, changes, machine_request.revision, ReturnDocument.BEFORE
+        )
+        old_name: str = before["name"]
+        machine: Machine = Machine.model_validate(
+            {**before, **changes, "revision": before.get("revision", 0) + 1}
+        )
+        machine_catalog.invalidate(old_name, machine.name)
+        await event_hub.notify("machine", [old_name, machine.name])
+        if machine.name != old_name:
+            machine_names.remove(old_name)
+            machine_names.add(machine.name)
+            background_tasks.add_task(propagate_machine_rename, machine.id, old_name, machine.name)
     except Exception as e:
         raise e
     return machine
@@ -128,6 +263,9 @@ async def delete_machine(machine_id: str) -> str:
     try:
         machine: Machine = await validate_machine(await Machine.get(machine_id))
         await machine.delete()
+        machine_catalog.invalidate(machine.name)
+        await event_hub.notify("machine", [machine.name])
+        machine_names.remove(machine.name)
     except Exception as e:
         raise e
     return f"Machine {machine_id} deleted"
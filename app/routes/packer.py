@@ -1,5 +1,6 @@
 # Standard Imports
 from typing import Any
+from html import escape
 import logging
 from logging import Logger
 
@@ -13,20 +14,32 @@ from beanie.operators import Set, RegEx, GTE, LTE, Eq, NE, LT, GT, NotIn  # noqa
 from jinja2 import Template
 
 # My Imports
-from ..utils import current_time
 from ..config import templates
+from ..services import (
+    claim_machine,
+    release_machine,
+    commit_check_out,
+    commit_check_in,
+    commit_batch,
+    machine_catalog,
+    excluded_machines,
+    exclude_machine,
+    log_buffer,
+    event_hub,
+    machine_names,
+)
 from ..models import (
     Machine,
+    MachineCatalogProjection,
     Log,
     Task,
-    LogCreate,
     PromptCheckOut,
     PromptCheckIn,
     Prompt,
     MissingMachine,
-    ActiveUsers,
-    ActiveUsersMachinesProjection,
     MachineMissingLog,
+    PackerBatch,
+    PackerBatchResult,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -52,14 +65,8 @@ router: APIRouter = APIRouter(
 async def check_out_get_machine(request: Request) -> DatastarResponse:
     try:
         signals: dict[str, str] = dict()
-        active_machines_projection: list[ActiveUsersMachinesProjection] = (
-            await ActiveUsers.find_all().project(ActiveUsersMachinesProjection).to_list()
-        )
-        active_machines: list[str] = [machine.machine_name for machine in active_machines_projection]
-        print(active_machines)
-        machine: Machine | None = await Machine.find_one(
-            NotIn(Machine.name, active_machines),
-            NotIn(Machine.name, request.session["missing_machines"]),
+        machine: Machine | None = await claim_machine(
+            request.session["user_id"], await excluded_machines(request.session["user_id"])
         )
         if machine is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Machine not found")
@@ -80,8 +87,8 @@ async def check_out_report_missing_machine(request: Request) -> DatastarResponse
             logger.error("Error during check out report missing machine: No signals")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No signals")
 
-        valid_machine: Machine | None = await Machine.find_one(
-            Machine.name == signals["prompt_machine_name"]
+        valid_machine: MachineCatalogProjection | None = await machine_catalog.get(
+            signals["prompt_machine_name"]
         )
         if valid_machine is None:
             logger.error(f"Missing Machine not found: {signals['prompt_machine_name']}")
@@ -89,20 +96,23 @@ async def check_out_report_missing_machine(request: Request) -> DatastarResponse
                 status_code=status.HTTP_404_NOT_FOUND, detail="Missing Machine not found"
             )
 
-        request.session["missing_machines"].append(signals["prompt_machine_name"])
-        await MachineMissingLog(
-            user={"id": request.session["user_id"], "collection": "users"},
-            machine={"id": valid_machine.id, "collection": "machines"},
-        ).create()
+        missing_machines: list[str] = await exclude_machine(
+            request.session["user_id"], valid_machine.name
+        )
+        await release_machine(valid_machine.name, request.session["user_id"])
+        await log_buffer.enqueue(
+            MachineMissingLog(
+                user={"id": request.session["user_id"], "collection": "users"},
+                machine={"id": valid_machine.id, "collection": "machines"},
+                user_name=request.session["username"],
+                machine_name=valid_machine.name,
+            )
+        )
+        await event_hub.notify("missing_machine")
 
         # Regenerate Machine Name
-        active_machines_projection: list[ActiveUsersMachinesProjection] = (
-            await ActiveUsers.find_all().project(ActiveUsersMachinesProjection).to_list()
-        )
-        active_machines: list[str] = [machine.machine_name for machine in active_machines_projection]
-        new_machine: Machine | None = await Machine.find_one(
-            NotIn(Machine.name, active_machines),
-            NotIn(Machine.name, request.session["missing_machines"]),
+        new_machine: Machine | None = await claim_machine(
+            request.session["user_id"], missing_machines
         )
         if new_machine is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Machine not found")
@@ -118,34 +128,18 @@ async def check_out_report_missing_machine(request: Request) -> DatastarResponse
 @router.post("/check_out/")
 async def check_out(request: Request, prompt_check_out: PromptCheckOut) -> DatastarResponse:
     try:
-        valid_machine: Machine | None = await Machine.find_one(
-            Machine.name == prompt_check_out.machine_name
-        )
-        if valid_machine is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Machine not found")
-
         prompt_data: Prompt = Prompt(
             condition=prompt_check_out.condition,
             battery=prompt_check_out.battery,
             task=prompt_check_out.task,
             special_note=prompt_check_out.special_note,
         )
-        log_create: LogCreate = LogCreate(
-            user={"id": request.session["user_id"], "collection": "users"},
-            machine={"id": valid_machine.id, "collection": "machines"},
-            active=True,
-            prompt=prompt_data,
-        )
-
-        create_activity: ActiveUsers = ActiveUsers(
+        await commit_check_out(
             user_id=request.session["user_id"],
             username=request.session["username"],
-            machine_name=valid_machine.name,
-            task=prompt_check_out.task,
+            machine_name=prompt_check_out.machine_name,
+            prompt=prompt_data,
         )
-
-        await create_activity.create()
-        await Log(**log_create.model_dump(exclude_unset=True)).create()
         request.session["active"] = True
 
     except Exception as e:
@@ -165,64 +159,55 @@ async def check_out(request: Request, prompt_check_out: PromptCheckOut) -> Datas
 #     return DatastarResponse([SSE.patch_elements(html_content, mode=ElementPatchMode.REPLACE)])
 
 
+@router.get("/check_in/suggest/")
+async def check_in_suggest(request: Request) -> DatastarResponse:
+    signals: dict[str, Any] | None = await read_signals(request)
+    query: str = str(signals.get("prompt_machine_name") or "") if signals else ""
+    options: str = "".join(
+        f'<option value="{escape(name)}"></option>' for name in machine_names.search(query)
+    )
+    return DatastarResponse(
+        [SSE.patch_elements(f'<datalist id="machine-suggestions">{options}</datalist>')]
+    )
+
+
 @router.post("/check_in/")
 async def check_in(request: Request, prompt_check_in: PromptCheckIn) -> DatastarResponse:
     try:
-        try:
-            valid_machine: Machine | None = await Machine.find_one(
-                Machine.name == prompt_check_in.machine_name
-            )
-            if valid_machine is None:
-                logger.error(f"Machine not found: {prompt_check_in.machine_name}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail="Machine not found"
-                )
-        except HTTPException:
-            logger.warning(f"Machine not found: {prompt_check_in.machine_name}")
-            return DatastarResponse([SSE.patch_signals({"bad_machine_input": True})])
-
-        # Sanity check
-        activity: ActiveUsers | None = await ActiveUsers.find_one(
-            ActiveUsers.user_id == request.session["user_id"]
-        )
-        if activity is None:
-            logger.error(f"Active user not found: {request.session['user_id']}")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Active user not found"
-            )
-
-        if activity.machine_name != valid_machine.name:
-            logger.error(
-                f"Machine name mismatch: {activity.machine_name=} != {valid_machine.name=} for user {request.session['user_id']} @ {current_time()}"
-            )
-            return DatastarResponse([SSE.patch_signals({"bad_machine_input": True})])
-
-        if activity.user_id != request.session["user_id"]:
-            logger.error(f"User ID mismatch: {activity.user_id=} != {request.session['user_id']=}")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User ID mismatch")
-
-        prompt_data: Prompt = Prompt(
+        log: Log | None = await commit_check_in(
+            user_id=request.session["user_id"],
+            username=request.session["username"],
+            machine_name=prompt_check_in.machine_name,
             condition=prompt_check_in.condition,
             battery=prompt_check_in.battery,
-            task=activity.task,
             special_note=prompt_check_in.special_note,
         )
+        if log is None:
+            logger.warning(f"Bad machine input: {prompt_check_in.machine_name}")
+            return DatastarResponse([SSE.patch_signals({"bad_machine_input": True})])
 
-        create_log = LogCreate(
-            user={"id": request.session["user_id"], "collection": "users"},
-            machine={"id": valid_machine.id, "collection": "machines"},
-            active=False,
-            prompt=prompt_data,
-        )
-
-        await Log(**create_log.model_dump(exclude_unset=True)).create()
-        await activity.delete()
         request.session["active"] = False
     except Exception as e:
         logger.error(f"Error during check in: {e}")
         raise e
 
     logger.info(
-        f"Check in successful for user `{request.session['username']}:{request.session['user_id']}` with machine `{valid_machine.name}`"
+        f"Check in successful for user `{request.session['username']}:{request.session['user_id']}` with machine `{prompt_check_in.machine_name}`"
     )
     return DatastarResponse([SSE.patch_signals({"redirect_after": True})])
+
+
+@router.post("/batch/", response_model=list[PackerBatchResult])
+async def batch(request: Request, packer_batch: PackerBatch) -> list[PackerBatchResult]:
+    try:
+        results, active = await commit_batch(
+            user_id=request.session["user_id"],
+            username=request.session["username"],
+            events=packer_batch.events,
+        )
+        request.session["active"] = active
+    except Exception as e:
+        logger.error(f"Error during batch: {e}")
+        raise e
+
+    return results
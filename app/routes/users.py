@@ -1,20 +1,45 @@
 # Standard Imports
-from typing import Annotated
+from typing import Annotated, Any
 
 # Third Party Imports
-from fastapi import APIRouter, Request, HTTPException, status, Query
+from fastapi import (
+    APIRouter,
+    Request,
+    HTTPException,
+    status,
+    Query,
+    Body,
+    BackgroundTasks,
+    UploadFile,
+)
 from fastapi.responses import HTMLResponse
 from starlette.templating import _TemplateResponse
-from beanie.operators import Set, RegEx, GTE, LTE, Eq, NE, LT, GT
+from pymongo import ReturnDocument
+from beanie.operators import RegEx, GTE, LTE, Eq, NE, LT, GT
 
 # My Imports
-from ..config import templates
+from ..config import templates, CONFIG_SETTINGS
+from ..services import (
+    parse_fields,
+    projected_page,
+    parse_csv_rows,
+    bulk_insert,
+    update_revision,
+    password_hasher,
+    propagate_user_rename,
+    user_names,
+    name_prefix,
+)
 
 from ..models import (
     User,
     UserQuery,
     UserCreate,
     UserUpdate,
+    ProjectedPage,
+    BulkCreateResult,
+    BULK_MAX_ITEMS,
+    USER_FIELDS,
 )
 
 
@@ -25,6 +50,28 @@ async def validate_user(user: User | None) -> User:
     return user
 
 
+async def insert_users(
+    user_requests: list[tuple[int, UserCreate]],
+) -> list[BulkCreateResult]:
+    try:
+        hashes: list[str] = await password_hasher.hash_many(
+            [request.password for _, request in user_requests]
+        )
+        results: list[BulkCreateResult] = await bulk_insert(
+            User,
+            [
+                (index, User(**request.model_dump(exclude={"password"}), password=password))
+                for (index, request), password in zip(user_requests, hashes)
+            ],
+        )
+        names: list[str] = [result.name for result in results if result.ok and result.name]
+        for name in names:
+            user_names.add(name)
+    except Exception as e:
+        raise e
+    return results
+
+
 # ------------------Setup-------------------#
 router: APIRouter = APIRouter(
     prefix="/users",
@@ -44,24 +91,78 @@ async def read_index(
 @router.post("/create/", response_model=User, status_code=status.HTTP_201_CREATED)
 async def create_user(user_request: UserCreate) -> User:
     try:
-        user = User(**user_request.model_dump())
+        user = User(
+            **user_request.model_dump(exclude={"password"}),
+            password=await password_hasher.hash(user_request.password),
+        )
         await user.create()
+        user_names.add(user.name)
     except Exception as e:
         raise e
     return user
 
 
-@router.get("/get_all/", response_model=list[User])
-async def get_users() -> list[User]:
+@router.post(
+    "/bulk/", response_model=list[BulkCreateResult], status_code=status.HTTP_207_MULTI_STATUS
+)
+async def bulk_create_users(
+    user_requests: Annotated[list[UserCreate], Body(max_length=BULK_MAX_ITEMS)],
+) -> list[BulkCreateResult]:
+    """
+    Creates many users in one unordered insert and reports a result per item.
+    """
+    return await insert_users(list(enumerate(user_requests)))
+
+
+@router.post(
+    "/bulk/csv/",
+    response_model=list[BulkCreateResult],
+    status_code=status.HTTP_207_MULTI_STATUS,
+)
+async def bulk_create_users_csv(file: UploadFile) -> list[BulkCreateResult]:
+    """
+    Same as `/bulk/` from a CSV upload whose header row names the UserCreate fields.
+    """
+    valid, failed = parse_csv_rows(await file.read(), UserCreate)
+    if len(valid) + len(failed) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} rows per upload",
+        )
+    results: list[BulkCreateResult] = await insert_users(valid)
+    return sorted(results + failed, key=lambda result: result.index)
+
+
+@router.get("/get_all/", response_model=ProjectedPage)
+async def get_users(
+    fields: Annotated[str | None, Query()] = None,
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=CONFIG_SETTINGS.API_MAX_PAGE_SIZE)] = (
+        CONFIG_SETTINGS.API_PAGE_SIZE
+    ),
+) -> ProjectedPage:
+    """
+    One page of users in id order. Pass `next_cursor` back as `cursor` for the next
+    page, and `fields=name,joined_time` to return only those fields.
+    """
     try:
-        users: list[User] = await User.find_all().to_list()
+        page: ProjectedPage = await projected_page(
+            User, {}, parse_fields(fields, USER_FIELDS), cursor, limit
+        )
     except Exception as e:
         raise e
-    return users
+    return page
 
 
-@router.get("/query/", response_model=list[User])
-async def query_users(user_query: Annotated[UserQuery, Query()]) -> list[User]:
+@router.get("/query/", response_model=ProjectedPage)
+async def query_users(
+    user_query: Annotated[UserQuery, Query()],
+    fields: Annotated[str | None, Query()] = None,
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=CONFIG_SETTINGS.API_MAX_PAGE_SIZE)] = (
+        CONFIG_SETTINGS.API_PAGE_SIZE
+    ),
+) -> ProjectedPage:
     query_params: list[GTE | LTE | RegEx | Eq | NE | LT | GT] = []
     try:
         operator: type[GTE] | type[LTE] | type[Eq] | type[NE] | type[LT] | type[GT] = Eq
@@ -83,29 +184,43 @@ async def query_users(user_query: Annotated[UserQuery, Query()]) -> list[User]:
             query_params.append(operator("joined_time", user_query.joined_time))
 
         if user_query.name is not None:
-            query_params.append(RegEx("name", user_query.name, "ixsm"))
+            query_params.append(name_prefix("name", user_query.name))
 
         if user_query.admin is not None:
             query_params.append(Eq("admin", user_query.admin))
 
-        if user_query.password is not None:
-            query_params.append(RegEx("password", user_query.password))
-
-        users: list[User] = await User.find(*query_params).to_list()
+        page: ProjectedPage = await projected_page(
+            User,
+            User.find(*query_params).get_filter_query(),
+            parse_fields(fields, USER_FIELDS),
+            cursor,
+            limit,
+        )
     except Exception as e:
         raise e
-    return users
+    return page
 
 
 @router.get("/by_name/", response_model=list[User])
 async def get_users_by_name(user_name: Annotated[str, Query(min_length=1)]) -> list[User]:
+    """
+    Users whose name starts with `user_name`, case-sensitively so the `name` index
+    serves it. `/search/` matches any case and substrings.
+    """
     try:
-        users: list[User] = await User.find(RegEx("name", user_name, "ixsm")).to_list()
+        users: list[User] = await User.find(name_prefix("name", user_name)).to_list()
     except Exception as e:
         raise e
     return users
 
 
+@router.get("/search/", response_model=list[str])
+async def search_users(
+    q: Annotated[str, Query(min_length=1)], limit: Annotated[int, Query(ge=1, le=100)] = 10
+) -> list[str]:
+    return user_names.search(q, limit)
+
+
 @router.get("/by_id/{user_id}", response_model=User)
 async def get_user(user_id: str) -> User:
     try:
@@ -116,11 +231,31 @@ async def get_user(user_id: str) -> User:
 
 
 @router.put("/by_id/{user_id}", response_model=User, status_code=status.HTTP_202_ACCEPTED)
-async def update_user(user_id: str, user_request: UserUpdate) -> User:
+async def update_user(
+    user_id: str, user_request: UserUpdate, background_tasks: BackgroundTasks
+) -> User:
+    """
+    Send the `revision` the edit was made from to get a 409 instead of overwriting a
+    newer edit.
+    """
     try:
-        user: User = await validate_user(await User.get(user_id))
-        await user.update(Set(user_request.model_dump(exclude_unset=True)))
-        user = await validate_user(await User.get(user_id))
+        changes: dict[str, Any] = user_request.model_dump(exclude_unset=True, exclude={"revision"})
+        if user_request.password is not None:
+            changes["password"] = await password_hasher.hash(user_request.password)
+        # The pre-image gives the old name, the post-image follows from it
+        before: dict[str, Any] = await update_revision(
+            User, user_id, changes, user_request.revision, ReturnDocument.BEFORE
+        )
+        old_name: str = before["name"]
+        user: User = User.model_validate(
+            {**before, **changes, "revision": before.get("revision", 0) + 1}
+        )
+        if user.name != old_name:
+            # Names aren't unique, keep the old one while another user has it
+            if not await User.find_one(User.name == old_name):
+                user_names.remove(old_name)
+            user_names.add(user.name)
+            background_tasks.add_task(propagate_user_rename, user.id, user.name)
     except Exception as e:
         raise e
     return user
@@ -131,6 +266,8 @@ async def delete_user(user_id: str) -> str:
     try:
         user: User = await validate_user(await User.get(user_id))
         await user.delete()
+        if not await User.find_one(User.name == user.name):
+            user_names.remove(user.name)
     except Exception as e:
         raise e
     return f"User {user_id} deleted"
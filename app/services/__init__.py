@@ -0,0 +1,19 @@
+from .allocator import claim_machine, hold_machine, release_machine, sync_machine_leases  # noqa: F401
+from .packer import commit_check_out, commit_check_in, commit_batch  # noqa: F401
+from .catalog import MachineCatalog, machine_catalog  # noqa: F401
+from .exclusions import excluded_machines, exclude_machine, clear_exclusions  # noqa: F401
+from .write_buffer import WriteBuffer, log_buffer  # noqa: F401
+from .events import EventHub, event_hub, ensure_event_feed  # noqa: F401
+from .names import backfill_log_names, propagate_user_rename, propagate_machine_rename  # noqa: F401
+from .export import ExportFormat, EXPORT_MEDIA_TYPES, export_logs  # noqa: F401
+from .search import NameIndex, machine_names, user_names, name_prefix  # noqa: F401
+from .migrations import migrate_log_layout  # noqa: F401
+from .stats import log_stats  # noqa: F401
+from .analytics import AnalyticsMirror, analytics_mirror  # noqa: F401
+from .parquet import ParquetExporter, parquet_exporter  # noqa: F401
+from .pagination import parse_fields, field_projection, projected_page  # noqa: F401
+from .bulk import parse_csv_rows, bulk_insert  # noqa: F401
+from .revisions import update_revision  # noqa: F401
+from .sessions import SessionStore, session_store  # noqa: F401
+from .admission import AdmissionController, admission  # noqa: F401
+from .passwords import PasswordHasher, password_hasher  # noqa: F401
@@ -0,0 +1,153 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from collections import deque
+from typing import Any
+
+# Third Party Imports
+from pydantic import BaseModel
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+
+class RouteClass(BaseModel):
+    name: str
+    # Lower goes first when slots free up
+    priority: int
+    limit: int
+    max_queue: int
+    timeout: float
+    admitted: int = 0
+    rejected: int = 0
+    inflight: int = 0
+
+
+class AdmissionController:
+    """
+    Shares `capacity` request slots in this worker between route classes.
+
+    Each class has its own concurrency `limit` and a bounded FIFO queue. A request is
+    admitted straight away only if no class of the same or higher priority is
+    waiting, and freed slots go to the highest priority waiter first. So packer writes
+    overtake queued dashboard reads, and reads that wait longer than their class
+    `timeout`, or find the queue full, are rejected for the caller to shed.
+    """
+
+    def __init__(self, capacity: int, classes: list[RouteClass]) -> None:
+        self.capacity: int = capacity
+        self.classes: dict[str, RouteClass] = {
+            route_class.name: route_class
+            for route_class in sorted(classes, key=lambda route_class: route_class.priority)
+        }
+        self.inflight: int = 0
+        self._waiters: dict[str, deque[asyncio.Future[None]]] = {
+            name: deque() for name in self.classes
+        }
+
+    def _can_admit(self, route_class: RouteClass) -> bool:
+        return self.inflight < self.capacity and route_class.inflight < route_class.limit
+
+    def _ahead(self, route_class: RouteClass) -> bool:
+        return any(
+            self._waiters[name]
+            for name, other in self.classes.items()
+            if other.priority <= route_class.priority
+        )
+
+    def _admit(self, route_class: RouteClass) -> None:
+        self.inflight += 1
+        route_class.inflight += 1
+        route_class.admitted += 1
+
+    async def acquire(self, name: str) -> bool:
+        route_class: RouteClass = self.classes[name]
+        if self._can_admit(route_class) and not self._ahead(route_class):
+            self._admit(route_class)
+            return True
+        waiters: deque[asyncio.Future[None]] = self._waiters[name]
+        if len(waiters) >= route_class.max_queue:
+            route_class.rejected += 1
+            return False
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        try:
+            # `_wake` admits before resolving, so a resolved future holds a slot
+            await asyncio.wait_for(asyncio.shield(future), route_class.timeout)
+        except TimeoutError:
+            if future.done():
+                return True
+            future.cancel()
+            waiters.remove(future)
+            route_class.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if future.done():
+                self.release(name)
+            else:
+                future.cancel()
+                waiters.remove(future)
+            raise
+        return True
+
+    def release(self, name: str) -> None:
+        route_class: RouteClass = self.classes[name]
+        self.inflight -= 1
+        route_class.inflight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for name, route_class in self.classes.items():
+            waiters: deque[asyncio.Future[None]] = self._waiters[name]
+            while waiters and self._can_admit(route_class):
+                self._admit(route_class)
+                waiters.popleft().set_result(None)
+            if waiters:
+                # Don't let a lower class take the slots this one is waiting for
+                return None
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "inflight": self.inflight,
+            "classes": {
+                name: {
+                    **route_class.model_dump(exclude={"name"}),
+                    "queued": len(self._waiters[name]),
+                }
+                for name, route_class in self.classes.items()
+            },
+        }
+
+
+admission: AdmissionController = AdmissionController(
+    CONFIG_SETTINGS.ADMISSION_CAPACITY,
+    [
+        RouteClass(
+            name="packer",
+            priority=0,
+            limit=CONFIG_SETTINGS.ADMISSION_CAPACITY,
+            max_queue=CONFIG_SETTINGS.ADMISSION_PACKER_QUEUE,
+            timeout=CONFIG_SETTINGS.ADMISSION_PACKER_TIMEOUT_SECONDS,
+        ),
+        RouteClass(
+            name="user",
+            priority=1,
+            limit=CONFIG_SETTINGS.ADMISSION_CAPACITY,
+            max_queue=CONFIG_SETTINGS.ADMISSION_USER_QUEUE,
+            timeout=CONFIG_SETTINGS.ADMISSION_USER_TIMEOUT_SECONDS,
+        ),
+        RouteClass(
+            name="admin",
+            priority=2,
+            limit=CONFIG_SETTINGS.ADMISSION_ADMIN_LIMIT,
+            max_queue=CONFIG_SETTINGS.ADMISSION_ADMIN_QUEUE,
+            timeout=CONFIG_SETTINGS.ADMISSION_ADMIN_TIMEOUT_SECONDS,
+        ),
+    ],
+)
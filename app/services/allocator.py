@@ -0,0 +1,158 @@
+# Standard Imports
+import logging
+from logging import Logger
+from datetime import datetime, timedelta
+from typing import Any
+
+# Third Party Imports
+from pymongo import ReturnDocument, DESCENDING, UpdateOne
+
+# My Imports
+from ..utils import current_time
+from ..config import CONFIG_SETTINGS
+from ..models import Machine, ActiveUsers
+from ..models.machines import LEASE_FREE, LEASE_HELD
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+# A hold with no `activity` row older than this was orphaned by a crash between
+# `hold_machine` and the activity insert
+HOLD_GRACE: timedelta = timedelta(minutes=1)
+
+
+# ------------------Helpers-------------------#
+def lease_deadline() -> datetime:
+    """
+    Returns the expiry time for a fresh check-out lease.
+    """
+    return current_time() + timedelta(seconds=CONFIG_SETTINGS.MACHINE_LEASE_SECONDS)
+
+
+# ------------------Allocator-------------------#
+async def claim_machine(user_id: str, exclude: list[str] | None = None) -> Machine | None:
+    """
+    Atomically leases a free machine to `user_id` in one `find_one_and_update`.
+
+    A live lease already held by the user is renewed instead of claiming a second
+    machine, so reloading the check-out form keeps the same machine on screen.
+    Both `$or` branches are served by the `lease_holder`/`lease_expires` indexes
+    in `lease_expires` order, so the cost does not grow with checked-out machines.
+    """
+    now: datetime = current_time()
+    query: dict[str, Any] = {
+        "$or": [
+            {"lease_holder": user_id, "lease_expires": {"$gt": now, "$lt": LEASE_HELD}},
+            {"lease_expires": {"$lte": now}},
+        ]
+    }
+    if exclude:
+        query["name"] = {"$nin": exclude}
+
+    document: dict[str, Any] | None = await Machine.get_pymongo_collection().find_one_and_update(
+        query,
+        {"$set": {"lease_holder": user_id, "lease_expires": lease_deadline()}},
+        sort=[("lease_expires", DESCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+    if document is None:
+        return None
+    return Machine.model_validate(document)
+
+
+async def hold_machine(user_id: str, machine_name: str) -> bool:
+    """
+    Converts the user's lease on `machine_name` into a check-out hold.
+
+    Succeeds when the user holds the lease or the machine is free; returns False
+    when another packer has it, instead of failing on the `activity` unique index.
+    """
+    now: datetime = current_time()
+    result = await Machine.get_pymongo_collection().update_one(
+        {
+            "name": machine_name,
+            "$or": [
+                {"lease_holder": user_id, "lease_expires": {"$lt": LEASE_HELD}},
+                {"lease_expires": {"$lte": now}},
+            ],
+        },
+        {"$set": {"lease_holder": user_id, "lease_expires": LEASE_HELD, "lease_held_at": now}},
+    )
+    return result.modified_count == 1
+
+
+async def release_machine(machine_name: str, user_id: str | None = None) -> None:
+    """
+    Returns `machine_name` to the free pool.
+
+    When `user_id` is given the release only applies to that user's lease or hold.
+    """
+    query: dict[str, Any] = {"name": machine_name}
+    if user_id is not None:
+        query["lease_holder"] = user_id
+    await Machine.get_pymongo_collection().update_one(
+        query, {"$set": {"lease_holder": None, "lease_expires": LEASE_FREE}}
+    )
+
+
+async def sync_machine_leases() -> None:
+    """
+    Backfills lease fields on machines created before the allocator existed, marks
+    every machine in `activity` as held, and frees holds with no `activity` row.
+
+    Holds younger than `HOLD_GRACE` are left alone, since another worker may be
+    between `hold_machine` and its activity insert.
+    """
+    machines = Machine.get_pymongo_collection()
+    await machines.update_many(
+        {"lease_expires": {"$exists": False}},
+        {"$set": {"lease_holder": None, "lease_expires": LEASE_FREE}},
+    )
+    active_users: list[dict[str, Any]] = (
+        await ActiveUsers.get_pymongo_collection()
+        .find({}, {"_id": 0, "user_id": 1, "machine_name": 1})
+        .to_list()
+    )
+    if active_users:
+        await machines.bulk_write(
+            [
+                UpdateOne(
+                    {"name": active["machine_name"]},
+                    {"$set": {"lease_holder": active["user_id"], "lease_expires": LEASE_HELD}},
+                )
+                for active in active_users
+            ],
+            ordered=False,
+        )
+
+    checked_out: set[str] = {active["machine_name"] for active in active_users}
+    held: list[dict[str, Any]] = await machines.find(
+        {
+            "lease_expires": LEASE_HELD,
+            "$or": [
+                {"lease_held_at": {"$lt": current_time() - HOLD_GRACE}},
+                {"lease_held_at": None},
+            ],
+        },
+        {"name": 1, "lease_holder": 1, "lease_held_at": 1},
+    ).to_list()
+    orphans: list[dict[str, Any]] = [m for m in held if m["name"] not in checked_out]
+    if orphans:
+        # Only while the same hold is still in place
+        await machines.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": orphan["_id"],
+                        "lease_holder": orphan.get("lease_holder"),
+                        "lease_expires": LEASE_HELD,
+                        "lease_held_at": orphan.get("lease_held_at"),
+                    },
+                    {"$set": {"lease_holder": None, "lease_expires": LEASE_FREE}},
+                )
+                for orphan in orphans
+            ],
+            ordered=False,
+        )
+        logger.warning(f"Freed orphaned holds on {[orphan['name'] for orphan in orphans]}")
+    logger.info(f"Synced machine leases, {len(active_users)} machines checked out")
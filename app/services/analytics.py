@@ -0,0 +1,288 @@
+# Standard Imports
+import asyncio
+import logging
+import threading
+from logging import Logger
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any
+
+# Third Party Imports
+import duckdb
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+from ..models import AnalyticsDwellKey
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+SCHEMA: dict[str, str] = {
+    "logs": """
+    CREATE TABLE IF NOT EXISTS logs (
+        id VARCHAR PRIMARY KEY,
+        ts TIMESTAMP,
+        user_id VARCHAR,
+        user_name VARCHAR,
+        machine_id VARCHAR,
+        machine_name VARCHAR,
+        active BOOLEAN,
+        condition INTEGER,
+        battery INTEGER,
+        task VARCHAR
+    )
+    """,
+    "machine_missing_logs": """
+    CREATE TABLE IF NOT EXISTS machine_missing_logs (
+        id VARCHAR PRIMARY KEY,
+        ts TIMESTAMP,
+        user_id VARCHAR,
+        user_name VARCHAR,
+        machine_id VARCHAR,
+        machine_name VARCHAR
+    )
+    """,
+    "machines": """
+    CREATE TABLE IF NOT EXISTS machines (
+        id VARCHAR PRIMARY KEY,
+        name VARCHAR,
+        joined_time TIMESTAMP,
+        joined_condition INTEGER
+    )
+    """,
+    "users": """
+    CREATE TABLE IF NOT EXISTS users (
+        id VARCHAR PRIMARY KEY,
+        name VARCHAR,
+        admin BOOLEAN,
+        joined_time TIMESTAMP
+    )
+    """,
+}
+
+# Pairs every check-out with the next log of the same machine; a check-out still open
+# at the end of the window runs until the window ends
+SESSIONS: str = """
+    WITH ordered AS (
+        SELECT
+            *,
+            lead(ts) OVER (PARTITION BY machine_id ORDER BY ts) AS next_ts,
+            lead(active) OVER (PARTITION BY machine_id ORDER BY ts) AS next_active
+        FROM logs
+        WHERE ts < $end
+    ),
+    sessions AS (
+        SELECT
+            machine_id,
+            machine_name,
+            user_id,
+            user_name,
+            greatest(ts, $start) AS started,
+            least(
+                CASE WHEN next_active = false THEN next_ts ELSE $end END, $end
+            ) AS ended,
+            next_active = false AS closed
+        FROM ordered
+        WHERE active
+    )
+    SELECT * FROM sessions WHERE ended > started
+"""
+
+UTILIZATION: str = f"""
+    WITH sessions AS ({SESSIONS})
+    SELECT
+        machines.id AS machine_id,
+        machines.name AS machine_name,
+        count(sessions.started) AS sessions,
+        coalesce(sum(epoch(sessions.ended - sessions.started)), 0) AS checked_out_seconds,
+        coalesce(sum(epoch(sessions.ended - sessions.started)), 0)
+            / epoch($end - $start) AS utilization
+    FROM machines
+    LEFT JOIN sessions ON sessions.machine_id = machines.id
+    GROUP BY machines.id, machines.name
+    ORDER BY utilization DESC, machine_name
+    LIMIT $limit
+"""
+
+DWELL: str = f"""
+    WITH sessions AS ({SESSIONS})
+    SELECT
+        {{key}}_id AS id,
+        any_value({{key}}_name) AS name,
+        count(*) AS sessions,
+        avg(epoch(ended - started)) AS avg_seconds,
+        median(epoch(ended - started)) AS median_seconds,
+        quantile_cont(epoch(ended - started), 0.9) AS p90_seconds,
+        max(epoch(ended - started)) AS max_seconds
+    FROM sessions
+    WHERE closed
+    GROUP BY {{key}}_id
+    ORDER BY avg_seconds DESC
+    LIMIT $limit
+"""
+
+MISSING_RATES: str = """
+    WITH check_outs AS (
+        SELECT machine_id, count(*) AS check_outs
+        FROM logs
+        WHERE active AND ts >= $start AND ts < $end
+        GROUP BY machine_id
+    ),
+    missing AS (
+        SELECT machine_id, count(*) AS missing_reports
+        FROM machine_missing_logs
+        WHERE ts >= $start AND ts < $end
+        GROUP BY machine_id
+    )
+    SELECT
+        machines.id AS machine_id,
+        machines.name AS machine_name,
+        coalesce(check_outs.check_outs, 0) AS check_outs,
+        coalesce(missing.missing_reports, 0) AS missing_reports,
+        coalesce(missing.missing_reports, 0)
+            / greatest(coalesce(check_outs.check_outs, 0), 1) AS missing_rate
+    FROM machines
+    LEFT JOIN check_outs ON check_outs.machine_id = machines.id
+    LEFT JOIN missing ON missing.machine_id = machines.id
+    WHERE check_outs.check_outs IS NOT NULL OR missing.missing_reports IS NOT NULL
+    ORDER BY missing_rate DESC, missing_reports DESC
+    LIMIT $limit
+"""
+
+
+# ------------------Rows-------------------#
+def log_row(document: dict[str, Any]) -> tuple:
+    prompt: dict[str, Any] = document.get("prompt") or {}
+    return (
+        str(document["_id"]),
+        document["ts"],
+        str(document["meta"]["user_id"]),
+        document.get("user_name"),
+        str(document["meta"]["machine_id"]),
+        document.get("machine_name"),
+        document["active"],
+        prompt.get("condition"),
+        prompt.get("battery"),
+        document["meta"]["task"],
+    )
+
+
+def missing_log_row(document: dict[str, Any]) -> tuple:
+    return (
+        str(document["_id"]),
+        document["ts"],
+        str(document["user"].id),
+        document.get("user_name"),
+        str(document["machine"].id),
+        document.get("machine_name"),
+    )
+
+
+def machine_row(document: dict[str, Any]) -> tuple:
+    return (
+        str(document["_id"]),
+        document["name"],
+        document.get("joined_time"),
+        document.get("joined_condition"),
+    )
+
+
+def user_row(document: dict[str, Any]) -> tuple:
+    return (
+        str(document["_id"]),
+        document["name"],
+        document.get("admin", False),
+        document.get("joined_time"),
+    )
+
+
+def as_naive_utc(moment: datetime) -> datetime:
+    # Mongo hands back naive UTC datetimes, so the mirror stores them that way
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# ------------------Mirror-------------------#
+class AnalyticsMirror:
+    """
+    DuckDB views over the Parquet files of `ParquetExporter`.
+
+    Heavy dashboard questions are answered here with vectorized SQL instead of on
+    Mongo. The exporter is the single leader that reads Mongo, under its lease, and
+    every worker only scans the shared files, so no worker keeps its own copy of the
+    logs and nothing here competes with packer writes. Answers are as fresh as the
+    last export. A table with no files yet reads as empty, and every DuckDB call runs
+    in a thread so it never blocks the event loop.
+    """
+
+    def __init__(self, root: Path):
+        self.root: Path = root
+        self._connection: duckdb.DuckDBPyConnection | None = None
+        self._attached: set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    def _attach(self) -> duckdb.DuckDBPyConnection:
+        with self._lock:
+            if self._connection is None:
+                self._connection = duckdb.connect()
+                # Empty tables stand in until the exporter writes a table's first file
+                for statement in SCHEMA.values():
+                    self._connection.execute(statement)
+            for table in SCHEMA.keys() - self._attached:
+                # Quoted for SQL, views can't take parameters
+                files: str = str(self.root / table / "**" / "*.parquet").replace("'", "''")
+                if not any((self.root / table).glob("**/*.parquet")):
+                    continue
+                # The glob is expanded on every query, so later files are picked up
+                self._connection.execute(f"DROP TABLE {table}")
+                self._connection.execute(
+                    f"CREATE VIEW {table} AS SELECT * FROM "
+                    f"read_parquet('{files}', hive_partitioning = false)"
+                )
+                self._attached.add(table)
+            return self._connection
+
+    async def query(self, sql: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        def run() -> list[dict[str, Any]]:
+            cursor: duckdb.DuckDBPyConnection = self._attach().cursor()
+            try:
+                cursor.execute(sql, params)
+                columns: list[str] = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+
+        return await asyncio.to_thread(run)
+
+    async def utilization(self, start: datetime, end: datetime, limit: int) -> list[dict[str, Any]]:
+        return await self.query(
+            UTILIZATION,
+            {"start": as_naive_utc(start), "end": as_naive_utc(end), "limit": limit},
+        )
+
+    async def dwell(
+        self, key: AnalyticsDwellKey, start: datetime, end: datetime, limit: int
+    ) -> list[dict[str, Any]]:
+        return await self.query(
+            DWELL.format(key=key),
+            {"start": as_naive_utc(start), "end": as_naive_utc(end), "limit": limit},
+        )
+
+    async def missing_rates(
+        self, start: datetime, end: datetime, limit: int
+    ) -> list[dict[str, Any]]:
+        return await self.query(
+            MISSING_RATES,
+            {"start": as_naive_utc(start), "end": as_naive_utc(end), "limit": limit},
+        )
+
+    async def stop(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+                self._attached.clear()
+
+
+analytics_mirror: AnalyticsMirror = AnalyticsMirror(Path(CONFIG_SETTINGS.PARQUET_EXPORT_DIR))
@@ -0,0 +1,81 @@
+# Standard Imports
+import csv
+import io
+import logging
+from logging import Logger
+from typing import Any, TypeVar
+
+# Third Party Imports
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+# My Imports
+from ..models import BulkCreateResult
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY: int = 11000
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def parse_csv_rows(
+    content: bytes, model: type[T]
+) -> tuple[list[tuple[int, T]], list[BulkCreateResult]]:
+    """
+    Validates each CSV row against `model` by field name. Returns the valid rows with
+    their row index, and a failed result for every row that didn't validate.
+    """
+    reader: csv.DictReader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    valid: list[tuple[int, T]] = []
+    failed: list[BulkCreateResult] = []
+    for index, row in enumerate(reader):
+        # Empty cells are missing values
+        values: dict[str, Any] = {key: value or None for key, value in row.items()}
+        try:
+            valid.append((index, model.model_validate(values, by_name=True)))
+        except ValidationError as e:
+            failed.append(
+                BulkCreateResult(
+                    index=index, name=row.get("name"), ok=False, detail=str(e.errors()[0]["msg"])
+                )
+            )
+    return valid, failed
+
+
+async def bulk_insert(
+    model: type[Document], documents: list[tuple[int, Document]]
+) -> list[BulkCreateResult]:
+    """
+    Inserts `documents` in one unordered `insert_many`, so one bad document doesn't
+    stop the rest. Each result reports its request index, and duplicate keys are
+    reported as such.
+    """
+    for _, document in documents:
+        document.id = PydanticObjectId()
+    failed: dict[int, str] = {}
+    if documents:
+        try:
+            await model.insert_many([document for _, document in documents], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = (
+                    "duplicate name" if error.get("code") == DUPLICATE_KEY else error["errmsg"]
+                )
+
+    results: list[BulkCreateResult] = []
+    for position, (index, document) in enumerate(documents):
+        name: str | None = getattr(document, "name", None)
+        if position in failed:
+            results.append(
+                BulkCreateResult(index=index, name=name, ok=False, detail=failed[position])
+            )
+        else:
+            results.append(BulkCreateResult(index=index, name=name, ok=True, id=str(document.id)))
+    logger.info(
+        f"Bulk inserted {len(documents) - len(failed)} of {len(documents)} "
+        f"`{model.get_collection_name()}` documents"
+    )
+    return results
@@ -0,0 +1,75 @@
+# Standard Imports
+import logging
+from logging import Logger
+from collections import OrderedDict
+import time
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+from ..models import Machine, MachineCatalogProjection
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+
+class MachineCatalog:
+    """
+    Bounded LRU cache of `Machine` name -> (id, name, joined_condition).
+
+    Writes through the `/api/machines` routes invalidate entries in this worker right
+    away and publish a `machine` event, which the other uvicorn workers apply as it
+    comes off the event feed. Entries also expire after `ttl` seconds, in case the
+    feed is down. Write paths that depend on the machine still existing re-check it
+    in Mongo (see `hold_machine`).
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self._entries: OrderedDict[str, tuple[float, MachineCatalogProjection]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, machine: MachineCatalogProjection) -> None:
+        self._entries[machine.name] = (time.monotonic() + self.ttl, machine)
+        self._entries.move_to_end(machine.name)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, name: str) -> MachineCatalogProjection | None:
+        entry: tuple[float, MachineCatalogProjection] | None = self._entries.get(name)
+        if entry is not None:
+            expires, machine = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(name)
+                return machine
+            del self._entries[name]
+
+        machine: MachineCatalogProjection | None = await Machine.find_one(
+            Machine.name == name, projection_model=MachineCatalogProjection
+        )
+        if machine is not None:
+            self._put(machine)
+        return machine
+
+    async def warm(self) -> None:
+        machines: list[MachineCatalogProjection] = (
+            await Machine.find_all().limit(self.max_size).project(MachineCatalogProjection).to_list()
+        )
+        for machine in machines:
+            self._put(machine)
+        logger.info(f"Warmed machine catalog with {len(machines)} machines")
+
+    def invalidate(self, *names: str) -> None:
+        for name in names:
+            self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+machine_catalog: MachineCatalog = MachineCatalog(
+    max_size=CONFIG_SETTINGS.MACHINE_CACHE_SIZE,
+    ttl=CONFIG_SETTINGS.MACHINE_CACHE_TTL_SECONDS,
+)
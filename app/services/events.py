@@ -0,0 +1,204 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Any
+
+# Third Party Imports
+from pymongo import CursorType, ReturnDocument
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import CollectionInvalid
+
+# My Imports
+from ..models import DashboardEvent, DashboardEventKind, Counter
+from .catalog import machine_catalog
+from .write_buffer import log_buffer
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+# Events that change the `activity` collection
+ACTIVITY_EVENTS: set[DashboardEventKind] = {"check_out", "check_in", "rename", "activity"}
+ACTIVITY_VERSION: str = "activity_version"
+
+
+# ------------------Setup-------------------#
+async def ensure_event_feed(database: AsyncDatabase) -> None:
+    """
+    Creates the capped `dashboard_events` collection the workers tail.
+    """
+    name: str = DashboardEvent.Settings.name
+    if name in await database.list_collection_names():
+        return None
+    try:
+        await database.create_collection(name, capped=True, size=1024 * 1024, max=10_000)
+        logger.info(f"Created capped collection `{name}`")
+    except CollectionInvalid:
+        # Another worker created it first
+        pass
+
+
+async def bump_activity_version() -> int:
+    document: dict[str, Any] = await Counter.get_pymongo_collection().find_one_and_update(
+        {"_id": ACTIVITY_VERSION},
+        {"$inc": {"value": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return document["value"]
+
+
+async def read_activity_version() -> int:
+    counter: Counter | None = await Counter.get(ACTIVITY_VERSION)
+    return counter.value if counter is not None else 0
+
+
+# ------------------Hub-------------------#
+class EventHub:
+    """
+    Fans dashboard events out to the SSE streams open in this worker.
+
+    Packer routes `publish` into the capped `dashboard_events` collection, and each
+    worker tails it with a single tailable cursor, so every dashboard sees events
+    from all workers while Mongo only serves one cursor per worker. `machine` events
+    invalidate the `machine_catalog` of every worker the same way.
+    """
+
+    def __init__(self) -> None:
+        self.seq: int = 0
+        self.activity_version: int = 0
+        # False while the feed is down, when `activity_version` may be behind
+        self.live: bool = False
+        self._last_id: Any = None
+        self._missed: bool = False
+        self._subscribers: set[asyncio.Queue[DashboardEventKind]] = set()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def publish(
+        self, kind: DashboardEventKind, machine_names: list[str] | None = None
+    ) -> None:
+        """
+        Queues `kind` on the event feed, bumping the shared activity version first
+        for events that change the `activity` collection.
+        """
+        activity_version: int | None = None
+        if kind in ACTIVITY_EVENTS:
+            activity_version = await bump_activity_version()
+        await log_buffer.enqueue(
+            DashboardEvent(kind=kind, activity_version=activity_version, machine_names=machine_names)
+        )
+
+    async def notify(self, kind: DashboardEventKind, machine_names: list[str] | None = None) -> None:
+        """
+        `publish` for writes that already committed: a failure is logged instead of
+        raised, so a missed dashboard refresh never fails the request that wrote.
+        """
+        try:
+            await self.publish(kind, machine_names)
+        except Exception as e:
+            logger.error(f"Failed to publish `{kind}` event: {e}")
+
+    def deliver(
+        self,
+        kind: DashboardEventKind,
+        activity_version: int | None = None,
+        machine_names: list[str] | None = None,
+    ) -> None:
+        if machine_names:
+            machine_catalog.invalidate(*machine_names)
+        self.seq += 1
+        if activity_version is not None:
+            self.activity_version = max(self.activity_version, activity_version)
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(kind)
+            except asyncio.QueueFull:
+                # A backed up stream already has a refresh pending
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue[DashboardEventKind]]:
+        queue: asyncio.Queue[DashboardEventKind] = asyncio.Queue(maxsize=64)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def start(self) -> None:
+        self.activity_version = await read_activity_version()
+        self._task = asyncio.create_task(self._tail())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _resync(self) -> None:
+        """
+        Catches up after the feed was down: events may have been missed, so the
+        activity version is reloaded, the machine catalog is dropped and every
+        dashboard re-renders.
+        """
+        self.activity_version = max(self.activity_version, await read_activity_version())
+        machine_catalog.clear()
+        self.deliver("resync")
+
+    async def _follow(self, collection: Any) -> None:
+        """
+        Delivers the feed with one tailable cursor, in `$natural` (insertion) order.
+        Event `_id`s are made by the publishing worker and can be inserted out of
+        `_id` order, so the events already delivered are skipped by their position in
+        the feed instead of by comparing `_id`s.
+        """
+        ids: list[Any] = [
+            document["_id"]
+            async for document in collection.find({}, {"_id": 1}, sort=[("$natural", 1)])
+        ]
+        delivered: set[Any] = set()
+        if self._last_id in ids:
+            delivered = set(ids[: ids.index(self._last_id) + 1])
+        elif self._last_id is not None:
+            # The capped feed wrapped past the last delivered event
+            self._missed = True
+        if self._missed:
+            await self._resync()
+            self._missed = False
+        self.live = True
+        cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+        async for document in cursor:
+            if document["_id"] in delivered:
+                continue
+            self._last_id = document["_id"]
+            self.deliver(
+                document["kind"], document.get("activity_version"), document.get("machine_names")
+            )
+
+    async def _tail(self) -> None:
+        collection = DashboardEvent.get_pymongo_collection()
+        last: dict[str, Any] | None = await collection.find_one(sort=[("$natural", -1)])
+        self._last_id = last["_id"] if last is not None else None
+        while True:
+            try:
+                await self._follow(collection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Dashboard event feed error: {e}")
+                self.live = False
+                self._missed = True
+            # Tailable cursors die on an empty collection, back off before reopening
+            await asyncio.sleep(1)
+
+
+event_hub: EventHub = EventHub()
@@ -0,0 +1,61 @@
+# Standard Imports
+from datetime import datetime, timedelta
+from typing import Any
+
+# Third Party Imports
+from pymongo import ReturnDocument
+
+# My Imports
+from ..utils import current_time
+from ..config import CONFIG_SETTINGS
+from ..models import MissingMachineExclusions
+
+
+async def excluded_machines(user_id: str) -> list[str]:
+    """
+    Returns the machines `user_id` has reported missing during the current shift.
+    """
+    document: (
+        dict[str, Any] | None
+    ) = await MissingMachineExclusions.get_pymongo_collection().find_one(
+        {"user_id": user_id, "expires": {"$gt": current_time()}},
+        {"_id": 0, "machine_names": 1},
+    )
+    if document is None:
+        return []
+    return document["machine_names"]
+
+
+async def exclude_machine(user_id: str, machine_name: str) -> list[str]:
+    """
+    Adds `machine_name` to the user's exclusion set and returns the updated set.
+
+    The set is one document per user, capped to the newest `MISSING_MACHINES_MAX`
+    names and removed by the TTL index once `MISSING_MACHINES_TTL_SECONDS` pass
+    without a new report.
+    """
+    expires: datetime = current_time() + timedelta(
+        seconds=CONFIG_SETTINGS.MISSING_MACHINES_TTL_SECONDS
+    )
+    document: dict[
+        str, Any
+    ] = await MissingMachineExclusions.get_pymongo_collection().find_one_and_update(
+        {"user_id": user_id},
+        {
+            "$push": {
+                "machine_names": {
+                    "$each": [machine_name],
+                    "$slice": -CONFIG_SETTINGS.MISSING_MACHINES_MAX,
+                }
+            },
+            "$set": {"expires": expires},
+        },
+        projection={"_id": 0, "machine_names": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return document["machine_names"]
+
+
+async def clear_exclusions(user_id: str) -> None:
+    await MissingMachineExclusions.find_one(MissingMachineExclusions.user_id == user_id).delete()
@@ -0,0 +1,93 @@
+# Standard Imports
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Literal
+
+# Third Party Imports
+from pymongo.asynchronous.cursor import AsyncCursor
+
+# My Imports
+from ..models import Log
+
+ExportFormat = Literal["json", "ndjson", "csv"]
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_FIELDS: list[str] = [
+    "id",
+    "ts",
+    "user_id",
+    "user_name",
+    "machine_id",
+    "machine_name",
+    "active",
+    "condition",
+    "battery",
+    "task",
+    "special_note",
+]
+EXPORT_BATCH_SIZE: int = 1000
+EXPORT_CHUNK_BYTES: int = 64 * 1024
+
+
+def flatten_log(document: dict[str, Any]) -> dict[str, Any]:
+    """
+    Flattens a raw log document into one export row.
+    """
+    prompt: dict[str, Any] = document.get("prompt") or {}
+    return {
+        "id": str(document["_id"]),
+        "ts": document["ts"].isoformat(),
+        "user_id": str(document["meta"]["user_id"]),
+        "user_name": document.get("user_name"),
+        "machine_id": str(document["meta"]["machine_id"]),
+        "machine_name": document.get("machine_name"),
+        "active": document["active"],
+        "condition": prompt.get("condition"),
+        "battery": prompt.get("battery"),
+        "task": prompt.get("task"),
+        "special_note": prompt.get("special_note"),
+    }
+
+
+async def export_logs(
+    query: dict[str, Any],
+    sort: list[tuple[str, int]],
+    limit: int,
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Streams matching logs as NDJSON or CSV straight from a Mongo cursor.
+
+    Raw documents are read in batches of `EXPORT_BATCH_SIZE` and written out in
+    ~`EXPORT_CHUNK_BYTES` chunks, so memory stays flat whatever the row count.
+    """
+    buffer: io.StringIO = io.StringIO()
+    writer: csv.DictWriter | None = None
+    if export_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+
+    cursor: AsyncCursor = Log.get_pymongo_collection().find(
+        query, sort=sort, limit=limit, batch_size=EXPORT_BATCH_SIZE
+    )
+    try:
+        async for document in cursor:
+            row: dict[str, Any] = flatten_log(document)
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+    finally:
+        await cursor.close()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
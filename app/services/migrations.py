@@ -0,0 +1,145 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from datetime import datetime, timedelta
+from typing import Any
+
+# Third Party Imports
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import DuplicateKeyError
+
+# My Imports
+from ..models import Log, Counter
+from ..utils import current_time
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+LEGACY_LOGS: str = "logs"
+LOG_MIGRATION: str = "logs_meta_migration"
+# The copy holds a lease in `counters` it renews while running, a worker that dies
+# mid-copy lets it lapse and another one starts over
+LOG_MIGRATION_LEASE_SECONDS: float = 60.0
+
+
+async def migrate_log_layout(database: AsyncDatabase) -> None:
+    """
+    Copies the legacy `logs` collection into the metaField layout of `Log`.
+
+    A time series collection can't gain a metaField in place, so the documents are
+    rewritten by one `$out` into the new collection. Runs before `init_beanie`; one
+    worker holds the lease and does the copy, the others wait for the completion
+    marker in `counters`. Whether to migrate is decided by that marker alone, never by
+    the new collection existing, so a copy that died midway is redone on the next
+    start instead of being skipped.
+    """
+    counters: AsyncCollection = database[Counter.Settings.name]
+    loop = asyncio.get_running_loop()
+    warn_at: float = loop.time() + LOG_MIGRATION_LEASE_SECONDS
+    while True:
+        marker: dict[str, Any] | None = await counters.find_one({"_id": LOG_MIGRATION})
+        if marker is not None and marker.get("value") == 1:
+            return None
+        collections: list[str] = await database.list_collection_names()
+        if LEGACY_LOGS not in collections:
+            # Nothing to copy, a fresh database starts on the new layout
+            await counters.update_one(
+                {"_id": LOG_MIGRATION}, {"$set": {"value": 1, "until": None}}, upsert=True
+            )
+            return None
+        if await claim_log_migration(counters):
+            await copy_logs(database, counters, Log.Settings.name in collections)
+            return None
+        if loop.time() > warn_at:
+            logger.warning(f"Still waiting for the `{LEGACY_LOGS}` migration")
+            warn_at = loop.time() + LOG_MIGRATION_LEASE_SECONDS
+        await asyncio.sleep(1.0)
+
+
+async def claim_log_migration(counters: AsyncCollection) -> bool:
+    now: datetime = current_time()
+    try:
+        await counters.update_one(
+            {
+                "_id": LOG_MIGRATION,
+                "value": {"$ne": 1},
+                "$or": [{"until": {"$lt": now}}, {"until": None}],
+            },
+            {
+                "$set": {
+                    "value": 0,
+                    "started": now,
+                    "until": now + timedelta(seconds=LOG_MIGRATION_LEASE_SECONDS),
+                }
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def renew_log_migration(counters: AsyncCollection) -> None:
+    while True:
+        await asyncio.sleep(LOG_MIGRATION_LEASE_SECONDS / 3)
+        await counters.update_one(
+            {"_id": LOG_MIGRATION},
+            {"$set": {"until": current_time() + timedelta(seconds=LOG_MIGRATION_LEASE_SECONDS)}},
+        )
+
+
+async def copy_logs(database: AsyncDatabase, counters: AsyncCollection, merge: bool) -> None:
+    name: str = Log.Settings.name
+    logger.info(f"Migrating `{LEGACY_LOGS}` into `{name}`...")
+    pipeline: list[dict[str, Any]] = [
+        {
+            "$addFields": {
+                "meta": {
+                    # Links are stored as DBRefs, whose `$id` needs `$getField` to read
+                    "user_id": {"$getField": {"field": {"$literal": "$id"}, "input": "$user"}},
+                    "machine_id": {"$getField": {"field": {"$literal": "$id"}, "input": "$machine"}},
+                    "task": "$prompt.task",
+                }
+            }
+        },
+        {"$unset": ["user", "machine"]},
+    ]
+    if merge:
+        # Left behind by an earlier start that gave up waiting or by a copy that died
+        # before its marker was set. Only logs written after the legacy collection
+        # stopped growing are kept, so nothing already copied is copied twice
+        newest: dict[str, Any] | None = await database[LEGACY_LOGS].find_one(
+            {}, projection={"_id": 1}, sort=[("_id", -1)]
+        )
+        since: dict[str, Any] = {} if newest is None else {"_id": {"$gt": newest["_id"]}}
+        pipeline.append({"$unionWith": {"coll": name, "pipeline": [{"$match": since}]}})
+    # `$out` writes to a temporary collection and swaps it in whole once the copy is
+    # done (time series collections can't be renamed by hand), so a copy that dies
+    # midway leaves the target as it was
+    pipeline.append(
+        {
+            "$out": {
+                "db": database.name,
+                "coll": name,
+                "timeseries": {
+                    "timeField": "ts",
+                    "metaField": "meta",
+                    "granularity": "hours",
+                },
+            }
+        }
+    )
+
+    renewal: asyncio.Task[None] = asyncio.create_task(renew_log_migration(counters))
+    try:
+        await (await database[LEGACY_LOGS].aggregate(pipeline)).to_list()
+    except Exception as e:
+        # Let the next claim retry
+        await counters.update_one({"_id": LOG_MIGRATION}, {"$set": {"until": None}})
+        raise e
+    finally:
+        renewal.cancel()
+    await counters.update_one({"_id": LOG_MIGRATION}, {"$set": {"value": 1, "until": None}})
+    logger.info(f"Migrated `{LEGACY_LOGS}` into `{name}`")
@@ -0,0 +1,121 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from datetime import datetime, timedelta
+from typing import Any
+
+# Third Party Imports
+from beanie import PydanticObjectId
+from beanie.operators import Set
+from pymongo import UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+# My Imports
+from ..utils import current_time
+from ..models import User, Machine, Log, MachineMissingLog, ActiveUsers, Counter
+from .events import event_hub
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+# Collections that carry a copy of the user and machine names
+NAMED_LOGS: tuple[type[Log] | type[MachineMissingLog], ...] = (Log, MachineMissingLog)
+# Where each of them keeps the user and machine ids
+ID_FIELDS: dict[type[Log] | type[MachineMissingLog], tuple[str, str]] = {
+    Log: ("meta.user_id", "meta.machine_id"),
+    MachineMissingLog: ("user.$id", "machine.$id"),
+}
+NAME_BACKFILL: str = "log_names_backfill"
+NAME_BACKFILL_LEASE: timedelta = timedelta(minutes=10)
+
+
+async def backfill_log_names() -> None:
+    """
+    Copies user and machine names onto log documents written before they carried them.
+
+    Runs once per database: the worker that claims the lease in `counters` does the
+    work and marks it done, the others skip it. Logs whose user or machine was
+    deleted get a null name, so they no longer count as missing.
+    """
+    counters = Counter.get_pymongo_collection()
+    now: datetime = current_time()
+    try:
+        await counters.update_one(
+            {
+                "_id": NAME_BACKFILL,
+                "value": {"$ne": 1},
+                "$or": [{"until": {"$lt": now}}, {"until": None}],
+            },
+            {"$set": {"until": now + NAME_BACKFILL_LEASE}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # Done already, or another worker is on it
+        return None
+
+    try:
+        users: list[dict[str, Any]] = (
+            await User.get_pymongo_collection().find({}, {"name": 1}).to_list()
+        )
+        machines: list[dict[str, Any]] = (
+            await Machine.get_pymongo_collection().find({}, {"name": 1}).to_list()
+        )
+        for model in NAMED_LOGS:
+            user_field, machine_field = ID_FIELDS[model]
+            updates: list[UpdateMany] = [
+                UpdateMany(
+                    {user_field: user["_id"], "user_name": {"$exists": False}},
+                    {"$set": {"user_name": user["name"]}},
+                )
+                for user in users
+            ] + [
+                UpdateMany(
+                    {machine_field: machine["_id"], "machine_name": {"$exists": False}},
+                    {"$set": {"machine_name": machine["name"]}},
+                )
+                for machine in machines
+            ]
+            # Whatever is still missing belongs to a deleted user or machine
+            updates += [
+                UpdateMany({"user_name": {"$exists": False}}, {"$set": {"user_name": None}}),
+                UpdateMany({"machine_name": {"$exists": False}}, {"$set": {"machine_name": None}}),
+            ]
+            await model.get_pymongo_collection().bulk_write(updates)
+            logger.info(f"Backfilled names on `{model.get_collection_name()}`")
+    except Exception as e:
+        await counters.update_one({"_id": NAME_BACKFILL}, {"$set": {"until": None}})
+        raise e
+    await counters.update_one({"_id": NAME_BACKFILL}, {"$set": {"value": 1, "until": None}})
+
+
+async def propagate_user_rename(user_id: PydanticObjectId, name: str) -> None:
+    await asyncio.gather(
+        *[
+            model.get_pymongo_collection().update_many(
+                {ID_FIELDS[model][0]: user_id}, {"$set": {"user_name": name}}
+            )
+            for model in NAMED_LOGS
+        ],
+        ActiveUsers.find(ActiveUsers.user_id == str(user_id)).update(
+            Set({ActiveUsers.username: name})
+        ),
+    )
+    await event_hub.notify("rename")
+    logger.info(f"Propagated rename of user `{user_id}` to `{name}`")
+
+
+async def propagate_machine_rename(machine_id: PydanticObjectId, old_name: str, name: str) -> None:
+    await asyncio.gather(
+        *[
+            model.get_pymongo_collection().update_many(
+                {ID_FIELDS[model][1]: machine_id}, {"$set": {"machine_name": name}}
+            )
+            for model in NAMED_LOGS
+        ],
+        ActiveUsers.find(ActiveUsers.machine_name == old_name).update(
+            Set({ActiveUsers.machine_name: name})
+        ),
+    )
+    await event_hub.notify("rename")
+    logger.info(f"Propagated rename of machine `{machine_id}` from `{old_name}` to `{name}`")
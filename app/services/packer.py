@@ -0,0 +1,331 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from typing import Any
+from datetime import datetime
+
+# Third Party Imports
+from fastapi import HTTPException, status
+from beanie import Document, PydanticObjectId
+from beanie.operators import In
+
+# My Imports
+from ..models import (
+    Machine,
+    MachineCatalogProjection,
+    Log,
+    LogMeta,
+    ActiveUsers,
+    Prompt,
+    Task,
+    PackerBatchCheckOut,
+    PackerBatchCheckIn,
+    PackerBatchResult,
+)
+from .allocator import hold_machine, release_machine
+from .catalog import machine_catalog
+from .write_buffer import log_buffer
+from .events import event_hub
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+
+# ------------------Helpers-------------------#
+async def _undo_insert(document: Document) -> None:
+    try:
+        await document.delete()
+    except Exception as e:
+        logger.error(f"Failed to roll back `{document.get_collection_name()}:{document.id}`: {e}")
+
+
+async def _undo_logs(log_ids: list[Any]) -> None:
+    try:
+        await Log.get_pymongo_collection().delete_many({"_id": {"$in": log_ids}})
+    except Exception as e:
+        logger.error(f"Failed to roll back logs `{log_ids}`: {e}")
+
+
+async def _restore_activity(activity_document: dict[str, Any]) -> None:
+    try:
+        await ActiveUsers.get_pymongo_collection().insert_one(activity_document)
+    except Exception as e:
+        logger.error(f"Failed to restore activity `{activity_document}`: {e}")
+        return None
+    await event_hub.notify("activity")
+
+
+# ------------------Write-Path-------------------#
+async def commit_check_out(
+    user_id: str,
+    username: str,
+    machine_name: str,
+    prompt: Prompt,
+) -> tuple[ActiveUsers, Log]:
+    """
+    Checks `machine_name` out to the user, writing the activity row and the log
+    entry together.
+
+    The cached machine lookup and the lease hold run concurrently, then both inserts run
+    concurrently. `logs` is a time series collection and can't join a multi-document
+    transaction, so if either insert fails the other one is undone before raising.
+    The undo is best effort: a crash between a write and its undo can still leave
+    `activity` and `logs` out of step, and only a stranded hold is repaired later,
+    by `sync_machine_leases`.
+    """
+    valid_machine, held = await asyncio.gather(
+        machine_catalog.get(machine_name),
+        hold_machine(user_id, machine_name),
+    )
+    if valid_machine is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Machine not found")
+    if not held:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Machine already checked out"
+        )
+
+    activity: ActiveUsers = ActiveUsers(
+        user_id=user_id,
+        username=username,
+        machine_name=valid_machine.name,
+        task=prompt.task,
+    )
+    log: Log = Log(
+        meta=LogMeta(
+            user_id=PydanticObjectId(user_id), machine_id=valid_machine.id, task=prompt.task
+        ),
+        user_name=username,
+        machine_name=valid_machine.name,
+        active=True,
+        prompt=prompt,
+    )
+    activity_result, log_result = await asyncio.gather(
+        activity.create(), log_buffer.insert(log), return_exceptions=True
+    )
+    failed: list[BaseException] = [
+        result for result in (activity_result, log_result) if isinstance(result, BaseException)
+    ]
+    if failed:
+        if not isinstance(log_result, BaseException):
+            await _undo_insert(log)
+        if not isinstance(activity_result, BaseException):
+            await _undo_insert(activity)
+        await release_machine(valid_machine.name, user_id)
+        if not isinstance(activity_result, BaseException):
+            # A dashboard may have rendered the row in between
+            await event_hub.notify("activity")
+        raise failed[0]
+
+    await event_hub.notify("check_out")
+    return activity, log
+
+
+async def commit_check_in(
+    user_id: str,
+    username: str,
+    machine_name: str,
+    condition: int,
+    battery: int,
+    special_note: str | None,
+) -> Log | None:
+    """
+    Checks `machine_name` back in for the user.
+
+    The activity row is validated and removed in one `find_one_and_delete`, which
+    runs concurrently with the machine lookup. Returns None when the user has a
+    different machine checked out, so the form can ask for the name again.
+    """
+    valid_machine, activity_document = await asyncio.gather(
+        machine_catalog.get(machine_name),
+        ActiveUsers.get_pymongo_collection().find_one_and_delete(
+            {"user_id": user_id, "machine_name": machine_name}
+        ),
+    )
+    if activity_document is None:
+        if await ActiveUsers.find_one(ActiveUsers.user_id == user_id) is None:
+            logger.error(f"Active user not found: {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Active user not found"
+            )
+        logger.error(f"Machine name mismatch: {machine_name=} for user {user_id}")
+        return None
+    if valid_machine is None:
+        logger.error(f"Machine not found: {machine_name}")
+        await _restore_activity(activity_document)
+        return None
+
+    log: Log = Log(
+        meta=LogMeta(
+            user_id=PydanticObjectId(user_id),
+            machine_id=valid_machine.id,
+            task=Task(activity_document["task"]),
+        ),
+        user_name=username,
+        machine_name=valid_machine.name,
+        active=False,
+        prompt=Prompt(
+            condition=condition,
+            battery=battery,
+            task=Task(activity_document["task"]),
+            special_note=special_note,
+        ),
+    )
+    log_result, _ = await asyncio.gather(
+        log_buffer.insert(log),
+        release_machine(valid_machine.name, user_id),
+        return_exceptions=True,
+    )
+    if isinstance(log_result, BaseException):
+        await _restore_activity(activity_document)
+        await hold_machine(user_id, valid_machine.name)
+        raise log_result
+
+    await event_hub.notify("check_in")
+    return log
+
+
+async def commit_batch(
+    user_id: str,
+    username: str,
+    events: list[PackerBatchCheckOut | PackerBatchCheckIn],
+) -> tuple[list[PackerBatchResult], bool]:
+    """
+    Replays queued scanner events for one user in order.
+
+    Machines and activity rows are loaded in bulk and the events are validated
+    against that state in memory. Every accepted event is then logged with a single
+    `insert_many` using the client timestamp, and only after that is the final
+    activity change written, so a failed insert leaves `activity` untouched. If the
+    activity change fails, the inserted logs are deleted and the old activity row is
+    put back before raising. Returns per-event results and whether the user ends
+    active.
+    """
+    machine_names: set[str] = {event.machine_name for event in events}
+    machines_found, activities = await asyncio.gather(
+        Machine.find(In(Machine.name, list(machine_names)))
+        .project(MachineCatalogProjection)
+        .to_list(),
+        ActiveUsers.find(
+            {"$or": [{"user_id": user_id}, {"machine_name": {"$in": list(machine_names)}}]}
+        ).to_list(),
+    )
+    machines: dict[str, MachineCatalogProjection] = {m.name: m for m in machines_found}
+    initial: ActiveUsers | None = next((a for a in activities if a.user_id == user_id), None)
+    taken: set[str] = {a.machine_name for a in activities if a.user_id != user_id}
+
+    initial_state: tuple[str, Task, datetime] | None = (
+        (initial.machine_name, initial.task, initial.ts) if initial is not None else None
+    )
+    current: tuple[str, Task, datetime] | None = initial_state
+    results: list[PackerBatchResult] = []
+    logs: list[tuple[int, Log]] = []
+    for index, event in enumerate(events):
+        result: PackerBatchResult = PackerBatchResult(
+            index=index, event=event.event, machine_name=event.machine_name, ok=False
+        )
+        results.append(result)
+        machine: MachineCatalogProjection | None = machines.get(event.machine_name)
+        if machine is None:
+            result.detail = "Machine not found"
+            continue
+
+        if isinstance(event, PackerBatchCheckOut):
+            if current is not None:
+                result.detail = "User already has a machine checked out"
+                continue
+            if machine.name in taken:
+                result.detail = "Machine already checked out"
+                continue
+            task: Task = event.task
+            current = (machine.name, task, event.ts)
+        else:
+            if current is None:
+                result.detail = "Active user not found"
+                continue
+            if current[0] != machine.name:
+                result.detail = "Machine name mismatch"
+                continue
+            task = current[1]
+            current = None
+
+        result.ok = True
+        logs.append(
+            (
+                index,
+                Log(
+                    ts=event.ts,
+                    meta=LogMeta(
+                        user_id=PydanticObjectId(user_id), machine_id=machine.id, task=task
+                    ),
+                    user_name=username,
+                    machine_name=machine.name,
+                    active=isinstance(event, PackerBatchCheckOut),
+                    prompt=Prompt(
+                        condition=event.condition,
+                        battery=event.battery,
+                        task=task,
+                        special_note=event.special_note,
+                    ),
+                ),
+            )
+        )
+
+    if not logs:
+        logger.info(f"Batch of {len(events)} events for user `{username}:{user_id}`, none accepted")
+        return results, initial is not None
+
+    # Ids are set up front so a partly failed insert can be undone
+    log_ids: list[PydanticObjectId] = []
+    for _, log in logs:
+        log.id = PydanticObjectId()
+        log_ids.append(log.id)
+    try:
+        await Log.insert_many([log for _, log in logs])
+    except Exception as e:
+        await _undo_logs(log_ids)
+        raise e
+
+    # Apply only the net change to `activity` and the machine leases
+    removed: bool = False
+    try:
+        if current != initial_state:
+            if initial is not None:
+                await asyncio.gather(
+                    initial.delete(), release_machine(initial.machine_name, user_id)
+                )
+                removed = True
+            if current is not None:
+                activity: ActiveUsers = ActiveUsers(
+                    ts=current[2],
+                    user_id=user_id,
+                    username=username,
+                    machine_name=current[0],
+                    task=current[1],
+                )
+                if await hold_machine(user_id, current[0]):
+                    try:
+                        await activity.create()
+                    except Exception as e:
+                        await release_machine(current[0], user_id)
+                        raise e
+                else:
+                    # The last check-out lost a race, keep the rest of the batch
+                    index, log = logs.pop()
+                    await _undo_logs([log.id])
+                    results[index].ok = False
+                    results[index].detail = "Machine already checked out"
+                    current = None
+    except Exception as e:
+        await _undo_logs(log_ids)
+        if removed and initial is not None:
+            await _restore_activity(initial.model_dump(by_alias=True))
+            await hold_machine(user_id, initial.machine_name)
+        raise e
+
+    await event_hub.notify("check_out" if current is not None else "check_in")
+
+    logger.info(
+        f"Batch of {len(events)} events for user `{username}:{user_id}`, {len(logs)} accepted"
+    )
+    return results, current is not None
@@ -0,0 +1,80 @@
+# Standard Imports
+from typing import Any
+
+# Third Party Imports
+from beanie import Document
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+# My Imports
+from ..models import ProjectedPage, SECRET_FIELDS
+
+
+def parse_fields(fields: str | None, allowed: tuple[str, ...]) -> list[str]:
+    """
+    Reads a comma separated `fields=` parameter, defaulting to every allowed field.
+    """
+    if fields is None:
+        return list(allowed)
+    requested: list[str] = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown: list[str] = [
+        field for field in requested if field not in allowed or field in SECRET_FIELDS
+    ]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields must be a comma separated subset of {', '.join(allowed)}",
+        )
+    return requested
+
+
+def field_projection(fields: list[str]) -> dict[str, int]:
+    """
+    Builds an inclusion projection for `fields`. It always names `_id`, which the
+    cursor needs, so it is never empty: pymongo drops an empty projection and would
+    hand back whole documents.
+    """
+    projection: dict[str, int] = {"_id": 1}
+    for field in fields:
+        if field != "id" and field not in SECRET_FIELDS:
+            projection[field] = 1
+    return projection
+
+
+async def projected_page(
+    model: type[Document],
+    query: dict[str, Any],
+    fields: list[str],
+    cursor: str | None,
+    limit: int,
+) -> ProjectedPage:
+    """
+    Reads one page of `model` in `_id` order past `cursor`, with the projection done by
+    Mongo so unrequested fields are never read or serialized.
+    """
+    if cursor is not None:
+        try:
+            query = {"$and": [query, {"_id": {"$gt": ObjectId(cursor)}}]}
+        except InvalidId:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # `_id` is always read for the cursor, and only returned when asked for
+    projection: dict[str, int] = field_projection(fields)
+    documents: list[dict[str, Any]] = await (
+        model.get_pymongo_collection()
+        .find(query, projection, sort=[("_id", 1)], limit=limit + 1)
+        .to_list()
+    )
+
+    next_cursor: str | None = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = str(documents[-1]["_id"])
+    items: list[dict[str, Any]] = []
+    for document in documents:
+        document_id: ObjectId = document.pop("_id")
+        if "id" in fields:
+            document["id"] = str(document_id)
+        items.append(document)
+    return ProjectedPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,260 @@
+# Standard Imports
+import asyncio
+import csv
+import logging
+import os
+from logging import Logger
+from pathlib import Path
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable
+
+# Third Party Imports
+import duckdb
+from bson import ObjectId
+from pymongo import ReadPreference, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.asynchronous.collection import AsyncCollection
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+from ..models import Log, MachineMissingLog, Machine, User, Counter
+from .analytics import SCHEMA, log_row, missing_log_row, machine_row, user_row
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+EXPORT_LOCK: str = "parquet_export_lock"
+EXPORT_MARK: str = "_export_mark"
+EXPORT_BATCH_SIZE: int = 1000
+# Rows held in memory before they are written out and the mark moves
+EXPORT_FILE_ROWS: int = 50_000
+
+
+def export_sources() -> dict[str, tuple[AsyncCollection, Callable[[dict[str, Any]], tuple]]]:
+    return {
+        "logs": (Log.get_pymongo_collection(), log_row),
+        "machine_missing_logs": (MachineMissingLog.get_pymongo_collection(), missing_log_row),
+    }
+
+
+def snapshot_sources() -> dict[str, tuple[AsyncCollection, Callable[[dict[str, Any]], tuple]]]:
+    return {
+        "machines": (Machine.get_pymongo_collection(), machine_row),
+        "users": (User.get_pymongo_collection(), user_row),
+    }
+
+
+def write_partition(table: str, rows: list[tuple], path: Path) -> None:
+    """
+    Writes `rows` to one zstd Parquet file through an in-memory DuckDB, renaming it
+    into place so readers never see half a file. The rows are staged as CSV and
+    loaded by one `COPY`, which is vectorized, instead of being bound one at a time.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp: Path = path.with_suffix(".parquet.tmp")
+    staging: Path = path.with_suffix(".csv.tmp")
+    with staging.open("w", newline="") as file:
+        # None is written as an empty field, which DuckDB reads back as NULL
+        csv.writer(file).writerows(rows)
+    order: str = "ts, id" if table in ("logs", "machine_missing_logs") else "id"
+    connection: duckdb.DuckDBPyConnection = duckdb.connect()
+    try:
+        connection.execute(SCHEMA[table])
+        connection.execute(f"COPY {table} FROM ? (FORMAT csv, HEADER false)", [str(staging)])
+        connection.execute(
+            f"COPY (SELECT * FROM {table} ORDER BY {order}) TO ? (FORMAT parquet, COMPRESSION zstd)",
+            [str(temp)],
+        )
+    finally:
+        connection.close()
+        staging.unlink(missing_ok=True)
+    os.replace(temp, path)
+
+
+def read_mark(root: Path, table: str) -> ObjectId | None:
+    path: Path = root / table / EXPORT_MARK
+    return ObjectId(path.read_text().strip()) if path.exists() else None
+
+
+def write_mark(root: Path, table: str, last_id: ObjectId) -> None:
+    path: Path = root / table / EXPORT_MARK
+    temp: Path = path.with_suffix(".tmp")
+    temp.write_text(str(last_id))
+    os.replace(temp, path)
+
+
+def write_batch(
+    table: str, rows: list[tuple], root: Path, first_id: ObjectId, last_id: ObjectId
+) -> None:
+    """
+    Writes one batch as a file per day of `ts`, each named after the batch's first
+    `_id`, so a batch written again after a crash replaces its own files. The mark
+    moves to `last_id` once every file is in place.
+    """
+    days: defaultdict[date, list[tuple]] = defaultdict(list)
+    for row in rows:
+        # Both row layouts start with (id, ts)
+        days[row[1].date()].append(row)
+    for day, day_rows in days.items():
+        write_partition(table, day_rows, root / table / f"date={day}" / f"part-{first_id}.parquet")
+    write_mark(root, table, last_id)
+
+
+class ParquetExporter:
+    """
+    Appends new logs and missing machine logs to day-partitioned Parquet files, and
+    rewrites a snapshot of the machines and users, for `AnalyticsMirror`.
+
+    Each collection keeps an `_id` high-water mark in `<root>/<table>/_export_mark`,
+    next to the files it describes, so an empty or replaced `root` starts over from
+    the first document instead of trusting a mark for files it doesn't have.
+    `_id`s are made when a document is inserted, so a log buffered or batched with
+    an older client `ts` still lands past the mark and is exported. A run only reads
+    documents inserted more than `lag` ago, in `_id` order and at most
+    `EXPORT_FILE_ROWS` at a time. Each batch is split by day into
+    `<root>/<table>/date=<day>/part-<first_id>.parquet`, and the mark moves after
+    each batch. A rerun after a crash therefore starts at the same document and
+    overwrites the same files instead of duplicating rows. A short lease in
+    `counters` keeps the workers from exporting at the same time.
+    """
+
+    def __init__(self, root: Path, interval: float, lag: timedelta):
+        self.root: Path = root
+        self.interval: float = interval
+        self.lag: timedelta = lag
+        self._task: asyncio.Task[None] | None = None
+
+    async def _claim(self, seconds: float) -> bool:
+        now: datetime = datetime.now(timezone.utc)
+        try:
+            await Counter.get_pymongo_collection().find_one_and_update(
+                {"_id": EXPORT_LOCK, "$or": [{"until": {"$lt": now}}, {"until": None}]},
+                {"$set": {"until": now + timedelta(seconds=seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _release(self) -> None:
+        await Counter.get_pymongo_collection().update_one(
+            {"_id": EXPORT_LOCK}, {"$set": {"until": None}}
+        )
+
+    async def _export(
+        self,
+        table: str,
+        collection: AsyncCollection,
+        to_row: Callable[[dict[str, Any]], tuple],
+        cutoff: ObjectId,
+    ) -> int:
+        mark: ObjectId | None = await asyncio.to_thread(read_mark, self.root, table)
+
+        query: dict[str, Any] = {"_id": {"$lt": cutoff}}
+        if mark is not None:
+            query["_id"]["$gt"] = mark
+        cursor = collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED).find(
+            query, sort=[("_id", 1)], batch_size=EXPORT_BATCH_SIZE
+        )
+
+        exported: int = 0
+        first_id: ObjectId | None = None
+        last_id: ObjectId | None = None
+        rows: list[tuple] = []
+
+        async def flush() -> None:
+            await asyncio.to_thread(write_batch, table, rows, self.root, first_id, last_id)
+
+        async for document in cursor:
+            if not rows:
+                first_id = document["_id"]
+            rows.append(to_row(document))
+            last_id = document["_id"]
+            if len(rows) >= EXPORT_FILE_ROWS:
+                await flush()
+                exported += len(rows)
+                rows = []
+        if rows:
+            await flush()
+            exported += len(rows)
+        return exported
+
+    async def _snapshot(
+        self,
+        table: str,
+        collection: AsyncCollection,
+        to_row: Callable[[dict[str, Any]], tuple],
+    ) -> int:
+        # Machines and users are small, each run rewrites them whole
+        rows: list[tuple] = [
+            to_row(document)
+            async for document in collection.with_options(
+                read_preference=ReadPreference.SECONDARY_PREFERRED
+            ).find({}, batch_size=EXPORT_BATCH_SIZE)
+        ]
+        await asyncio.to_thread(write_partition, table, rows, self.root / table / f"{table}.parquet")
+        return len(rows)
+
+    async def run_once(self) -> dict[str, int]:
+        """
+        Exports everything past the high-water marks. Returns the rows written per
+        table, or nothing if another worker holds the export lease.
+        """
+        if not await self._claim(max(self.interval, 300.0)):
+            return {}
+        try:
+            cutoff: ObjectId = ObjectId.from_datetime(datetime.now(timezone.utc) - self.lag)
+            exported: dict[str, int] = {}
+            for table, (collection, to_row) in export_sources().items():
+                exported[table] = await self._export(table, collection, to_row, cutoff)
+            for table, (collection, to_row) in snapshot_sources().items():
+                await self._snapshot(table, collection, to_row)
+        finally:
+            await self._release()
+        if any(exported.values()):
+            logger.info(f"Exported to Parquet: {exported}")
+        return exported
+
+    async def start(self) -> None:
+        if self.interval <= 0:
+            return None
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Failed to export Parquet: {e}")
+            await asyncio.sleep(self.interval)
+
+
+parquet_exporter: ParquetExporter = ParquetExporter(
+    Path(CONFIG_SETTINGS.PARQUET_EXPORT_DIR),
+    CONFIG_SETTINGS.PARQUET_EXPORT_INTERVAL_SECONDS,
+    timedelta(seconds=CONFIG_SETTINGS.PARQUET_EXPORT_LAG_SECONDS),
+)
+
+
+async def main() -> None:
+    from ..db import init_db
+
+    await init_db()
+    await parquet_exporter.run_once()
+
+
+if __name__ == "__main__":
+    # python -m app.services.parquet
+    asyncio.run(main())
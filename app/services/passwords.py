@@ -0,0 +1,155 @@
+# Standard Imports
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from base64 import b64decode, b64encode
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from typing import Any
+
+# Third Party Imports
+from fastapi import HTTPException, status
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+SCHEME: str = "scrypt"
+SALT_BYTES: int = 16
+KEY_BYTES: int = 32
+
+
+def scrypt_hash(password: str, n: int, r: int, p: int) -> str:
+    salt: bytes = os.urandom(SALT_BYTES)
+    key: bytes = hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=KEY_BYTES
+    )
+    return f"{SCHEME}${n}${r}${p}${b64encode(salt).decode()}${b64encode(key).decode()}"
+
+
+def scrypt_verify(encoded: str, password: str) -> bool:
+    _, n, r, p, salt, key = encoded.split("$")
+    candidate: bytes = hashlib.scrypt(
+        password.encode(),
+        salt=b64decode(salt),
+        n=int(n),
+        r=int(r),
+        p=int(p),
+        maxmem=256 * int(n) * int(r),
+        dklen=len(b64decode(key)),
+    )
+    return hmac.compare_digest(candidate, b64decode(key))
+
+
+class PasswordHasher:
+    """
+    scrypt password hashing on a bounded thread pool, off the event loop.
+
+    `hashlib.scrypt` releases the GIL, so hashes run in parallel across cores while
+    the loop keeps serving streams. At most `workers` hashes run and `max_queue` more
+    wait; past that callers get a 503 instead of piling up. Passwords stored before
+    hashing, or with other cost parameters, verify once and report `needs_rehash`.
+    """
+
+    def __init__(self, n: int, r: int, p: int, workers: int, max_queue: int) -> None:
+        self.n: int = n
+        self.r: int = r
+        self.p: int = p
+        self.workers: int = workers
+        self.max_queue: int = max_queue
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self._pending: int = 0
+        self._dummy: str | None = None
+        self.completed: int = 0
+        self.rejected: int = 0
+        self.busy_seconds: float = 0.0
+
+    async def _run(self, function: Any, *args: Any, bounded: bool = True) -> Any:
+        if bounded and self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins at once, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        started: float = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(scrypt_hash, password, self.n, self.r, self.p)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Hashes for internal bulk work, which waits for the pool instead of being
+        rejected. At most `workers` of them are queued at once, so logins arriving
+        meanwhile only wait behind one chunk.
+        """
+        hashes: list[str] = []
+        for start in range(0, len(passwords), self.workers):
+            hashes.extend(
+                await asyncio.gather(
+                    *[
+                        self._run(scrypt_hash, password, self.n, self.r, self.p, bounded=False)
+                        for password in passwords[start : start + self.workers]
+                    ]
+                )
+            )
+        return hashes
+
+    def is_hashed(self, encoded: str) -> bool:
+        return encoded.startswith(f"{SCHEME}$")
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return not encoded.startswith(f"{SCHEME}${self.n}${self.r}${self.p}$")
+
+    async def verify(self, encoded: str, password: str) -> bool:
+        if not self.is_hashed(encoded):
+            # Stored before hashing, compare in constant time and rehash on success
+            return hmac.compare_digest(encoded.encode(), password.encode())
+        return await self._run(scrypt_verify, encoded, password)
+
+    async def verify_dummy(self, password: str) -> None:
+        """
+        Spends one verify's worth of work on a throwaway hash, so a login for an
+        unknown name takes as long as one with a wrong password.
+        """
+        if self._dummy is None:
+            self._dummy = await self.hash(os.urandom(SALT_BYTES).hex())
+        await self._run(scrypt_verify, self._dummy, password)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": min(self._pending, self.workers),
+            "queued": max(self._pending - self.workers, 0),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_seconds": self.busy_seconds / self.completed if self.completed else 0.0,
+            "cost": {"n": self.n, "r": self.r, "p": self.p},
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher: PasswordHasher = PasswordHasher(
+    CONFIG_SETTINGS.PASSWORD_SCRYPT_N,
+    CONFIG_SETTINGS.PASSWORD_SCRYPT_R,
+    CONFIG_SETTINGS.PASSWORD_SCRYPT_P,
+    CONFIG_SETTINGS.PASSWORD_HASH_WORKERS,
+    CONFIG_SETTINGS.PASSWORD_HASH_QUEUE,
+)
@@ -0,0 +1,59 @@
+# Standard Imports
+from typing import Any
+
+# Third Party Imports
+from beanie import Document
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+async def update_revision(
+    model: type[Document],
+    document_id: str,
+    changes: dict[str, Any],
+    revision: int | None,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+) -> dict[str, Any]:
+    """
+    Applies `changes` and bumps `revision` in one `find_one_and_update`.
+
+    With `revision` set the update only matches that revision, so an edit made from a
+    stale read is refused with 409 instead of overwriting the newer one. Documents
+    written before the field existed count as revision 0. Only a failed update costs
+    a second read, to tell a missing document from a conflict.
+    """
+    not_found: HTTPException = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"{model.__name__} not found",
+    )
+    try:
+        query: dict[str, Any] = {"_id": ObjectId(document_id)}
+    except InvalidId:
+        raise not_found
+    if revision is not None:
+        query["revision"] = revision if revision else {"$in": [0, None]}
+
+    update: dict[str, Any] = {"$inc": {"revision": 1}}
+    if changes:
+        update["$set"] = changes
+    collection = model.get_pymongo_collection()
+    try:
+        document: dict[str, Any] | None = await collection.find_one_and_update(
+            query, update, return_document=return_document
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Another {model.__name__.lower()} already has that name",
+        )
+    if document is not None:
+        return document
+    if revision is not None and await collection.find_one({"_id": query["_id"]}, {"_id": 1}):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{model.__name__} was changed since revision {revision}",
+        )
+    raise not_found
@@ -0,0 +1,170 @@
+# Standard Imports
+import asyncio
+import logging
+import re
+from logging import Logger
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+# Third Party Imports
+from beanie.operators import RegEx
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+from ..models import Machine, User
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+
+def name_prefix(field: str, value: str) -> RegEx:
+    """
+    Matches `field` values starting with `value`. Anchored and case-sensitive, so
+    Mongo answers it with a bounded scan of the `name` index; case-insensitive and
+    substring matches are left to the `NameIndex` typeahead.
+    """
+    return RegEx(field, f"^{re.escape(value)}")
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """
+    Case-insensitive in-memory typeahead index over a set of names.
+
+    Prefix matches come from a sorted list with `bisect`; substring matches of three
+    or more characters come from a trigram index. Writes in this worker update it
+    directly, and `start` rebuilds it every `refresh` seconds from `loader` to pick
+    up writes made in the other workers, so it can lag them and only backs name
+    suggestions; lookups by name stay on Mongo. Writes that land while a rebuild is
+    loading are replayed onto the rebuilt index instead of being lost.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[list[str]]], refresh: float):
+        self.name: str = name
+        self.refresh: float = refresh
+        self._loader: Callable[[], Awaitable[list[str]]] = loader
+        self._sorted: list[tuple[str, str]] = []
+        self._trigrams: dict[str, set[str]] = defaultdict(set)
+        self._task: asyncio.Task[None] | None = None
+        # Writes made while a rebuild is loading: (added, name)
+        self._pending: list[tuple[bool, str]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, name: str) -> None:
+        if self._pending is not None:
+            self._pending.append((True, name))
+        key: tuple[str, str] = (name.lower(), name)
+        index: int = bisect_left(self._sorted, key)
+        if index < len(self._sorted) and self._sorted[index] == key:
+            return None
+        insort(self._sorted, key)
+        for gram in trigrams(key[0]):
+            self._trigrams[gram].add(name)
+
+    def remove(self, name: str) -> None:
+        if self._pending is not None:
+            self._pending.append((False, name))
+        key: tuple[str, str] = (name.lower(), name)
+        index: int = bisect_left(self._sorted, key)
+        if index < len(self._sorted) and self._sorted[index] == key:
+            del self._sorted[index]
+        for gram in trigrams(key[0]):
+            self._trigrams[gram].discard(name)
+
+    def search(self, query: str, limit: int = 10) -> list[str]:
+        """
+        Returns names starting with `query`, then names containing it.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        matches: list[str] = []
+        index: int = bisect_left(self._sorted, (query, ""))
+        while index < len(self._sorted) and len(matches) < limit:
+            lower, name = self._sorted[index]
+            if not lower.startswith(query):
+                break
+            matches.append(name)
+            index += 1
+
+        if len(matches) < limit and len(query) >= 3:
+            grams: list[set[str]] = sorted(
+                (self._trigrams.get(gram, set()) for gram in trigrams(query)), key=len
+            )
+            candidates: set[str] = set.intersection(*grams) if grams else set()
+            found: set[str] = set(matches)
+            for name in sorted(candidates, key=str.lower):
+                if len(matches) >= limit:
+                    break
+                if name not in found and query in name.lower():
+                    matches.append(name)
+        return matches
+
+    async def rebuild(self) -> None:
+        self._pending = []
+        try:
+            names: list[str] = await self._loader()
+        finally:
+            pending: list[tuple[bool, str]] = self._pending
+            self._pending = None
+        sorted_names: list[tuple[str, str]] = sorted({(name.lower(), name) for name in names})
+        grams: dict[str, set[str]] = defaultdict(set)
+        for lower, name in sorted_names:
+            for gram in trigrams(lower):
+                grams[gram].add(name)
+        self._sorted, self._trigrams = sorted_names, grams
+        for added, name in pending:
+            if added:
+                self.add(name)
+            else:
+                self.remove(name)
+
+    async def start(self) -> None:
+        await self.rebuild()
+        logger.info(f"Built `{self.name}` search index with {len(self)} names")
+        self._task = asyncio.create_task(self._refresh())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refresh(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Failed to rebuild `{self.name}` search index: {e}")
+
+
+async def load_machine_names() -> list[str]:
+    return [
+        document["name"]
+        async for document in Machine.get_pymongo_collection().find({}, {"_id": 0, "name": 1})
+    ]
+
+
+async def load_user_names() -> list[str]:
+    return [
+        document["name"]
+        async for document in User.get_pymongo_collection().find({}, {"_id": 0, "name": 1})
+    ]
+
+
+machine_names: NameIndex = NameIndex(
+    "machines", load_machine_names, CONFIG_SETTINGS.SEARCH_REFRESH_SECONDS
+)
+user_names: NameIndex = NameIndex("users", load_user_names, CONFIG_SETTINGS.SEARCH_REFRESH_SECONDS)
@@ -0,0 +1,167 @@
+# Standard Imports
+import copy
+import logging
+from logging import Logger
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Protocol
+
+# Third Party Imports
+from pymongo import ReturnDocument
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+from ..models import SessionRecord
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+# (data, version, expires)
+SessionState = tuple[dict[str, Any], int, datetime]
+
+
+class SessionBackend(Protocol):
+    """
+    Shared store the session middleware reads through. `save` returns the new version.
+    """
+
+    async def load(self, session_id: str) -> SessionState | None: ...
+
+    async def version(self, session_id: str) -> int | None: ...
+
+    async def save(self, session_id: str, data: dict[str, Any], expires: datetime) -> int: ...
+
+    async def delete(self, session_id: str) -> None: ...
+
+
+class MongoSessionBackend:
+    """
+    Sessions in the `sessions` collection, shared by every worker and replica. A TTL
+    index on `expires` drops abandoned ones.
+    """
+
+    async def load(self, session_id: str) -> SessionState | None:
+        document: dict[str, Any] | None = await SessionRecord.get_pymongo_collection().find_one(
+            {"_id": session_id}
+        )
+        if document is None:
+            return None
+        # Mongo hands back naive UTC
+        expires: datetime = document["expires"].replace(tzinfo=timezone.utc)
+        return document["data"], document["version"], expires
+
+    async def version(self, session_id: str) -> int | None:
+        document: dict[str, Any] | None = await SessionRecord.get_pymongo_collection().find_one(
+            {"_id": session_id, "expires": {"$gt": datetime.now(timezone.utc)}},
+            projection={"version": 1},
+        )
+        return None if document is None else document["version"]
+
+    async def save(self, session_id: str, data: dict[str, Any], expires: datetime) -> int:
+        document: dict[str, Any] = await SessionRecord.get_pymongo_collection().find_one_and_update(
+            {"_id": session_id},
+            {"$set": {"data": data, "expires": expires}, "$inc": {"version": 1}},
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["version"]
+
+    async def delete(self, session_id: str) -> None:
+        await SessionRecord.get_pymongo_collection().delete_one({"_id": session_id})
+
+
+class MemorySessionBackend:
+    """
+    Sessions in this process only, for a single worker or tests.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: dict[str, SessionState] = {}
+
+    async def load(self, session_id: str) -> SessionState | None:
+        state: SessionState | None = self._sessions.get(session_id)
+        if state is None or state[2] <= datetime.now(timezone.utc):
+            return None
+        return copy.deepcopy(state[0]), state[1], state[2]
+
+    async def version(self, session_id: str) -> int | None:
+        state: SessionState | None = await self.load(session_id)
+        return None if state is None else state[1]
+
+    async def save(self, session_id: str, data: dict[str, Any], expires: datetime) -> int:
+        version: int = self._sessions[session_id][1] + 1 if session_id in self._sessions else 1
+        self._sessions[session_id] = (copy.deepcopy(data), version, expires)
+        return version
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SessionStore:
+    """
+    Bounded LRU of session data in front of a `SessionBackend`.
+
+    The session cookie carries the version of the session it was last written with.
+    A cached entry is only used when its version matches the cookie and the backend
+    still holds that version, which is a small projected read instead of the whole
+    session. A session logged out or deleted through any worker is therefore refused
+    everywhere on the next request, and one changed elsewhere is re-read.
+    """
+
+    def __init__(self, backend: SessionBackend, max_size: int, ttl: timedelta) -> None:
+        self.backend: SessionBackend = backend
+        self.max_size: int = max_size
+        self.ttl: timedelta = ttl
+        self._entries: OrderedDict[str, SessionState] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, session_id: str, state: SessionState) -> None:
+        self._entries[session_id] = state
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def load(self, session_id: str, version: int) -> SessionState | None:
+        """
+        Returns a copy of the session the caller may mutate, or None if it is gone.
+        """
+        state: SessionState | None = self._entries.get(session_id)
+        if state is not None and state[1] == version and state[2] > datetime.now(timezone.utc):
+            current: int | None = await self.backend.version(session_id)
+            if current is None:
+                self._entries.pop(session_id, None)
+                return None
+            if current == version:
+                self._entries.move_to_end(session_id)
+                return copy.deepcopy(state[0]), state[1], state[2]
+
+        state = await self.backend.load(session_id)
+        if state is None:
+            self._entries.pop(session_id, None)
+            return None
+        self._put(session_id, state)
+        return copy.deepcopy(state[0]), state[1], state[2]
+
+    async def save(self, session_id: str, data: dict[str, Any]) -> int:
+        expires: datetime = datetime.now(timezone.utc) + self.ttl
+        version: int = await self.backend.save(session_id, data, expires)
+        self._put(session_id, (copy.deepcopy(data), version, expires))
+        return version
+
+    async def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+        await self.backend.delete(session_id)
+
+    def needs_touch(self, expires: datetime) -> bool:
+        # Extend sessions in use once they are past half their lifetime
+        return expires - datetime.now(timezone.utc) < self.ttl / 2
+
+
+session_store: SessionStore = SessionStore(
+    MongoSessionBackend() if CONFIG_SETTINGS.SESSION_BACKEND == "mongo" else MemorySessionBackend(),
+    CONFIG_SETTINGS.SESSION_CACHE_SIZE,
+    timedelta(seconds=CONFIG_SETTINGS.SESSION_TTL_SECONDS),
+)
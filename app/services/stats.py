@@ -0,0 +1,120 @@
+# Standard Imports
+from datetime import datetime
+from typing import Any
+
+# My Imports
+from ..models import Log, LogStats, LogStatsGroup, LogStatsBucket
+
+# Group keys read from the time series metaField, so Mongo can group whole buckets
+GROUP_FIELDS: dict[LogStatsGroup, str] = {
+    "machine": "$meta.machine_id",
+    "user": "$meta.user_id",
+    "task": "$meta.task",
+}
+GROUP_NAMES: dict[LogStatsGroup, tuple[str, str]] = {
+    "machine": ("machine_name", "$machine_name"),
+    "user": ("user_name", "$user_name"),
+}
+GROUP_IDS: dict[LogStatsGroup, str] = {
+    "machine": "machine_id",
+    "user": "user_id",
+    "task": "task",
+}
+
+
+def stats_pipeline(
+    group_by: list[LogStatsGroup],
+    bucket: LogStatsBucket | None,
+    timezone: str,
+    start_date: datetime | None,
+    end_date: datetime | None,
+    active: bool | None,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """
+    Builds the aggregation behind `/logs/stats/`.
+
+    The first `$group` counts per group and task, the second folds the tasks into a
+    `tasks` map, so each output row is one group with its prompt metrics.
+    """
+    match: dict[str, Any] = {}
+    if start_date is not None or end_date is not None:
+        match["ts"] = {}
+        if start_date is not None:
+            match["ts"]["$gte"] = start_date
+        if end_date is not None:
+            match["ts"]["$lte"] = end_date
+    if active is not None:
+        match["active"] = active
+
+    keys: dict[str, Any] = {GROUP_IDS[group]: GROUP_FIELDS[group] for group in group_by}
+    if bucket is not None:
+        keys["bucket"] = {"$dateTrunc": {"date": "$ts", "unit": bucket, "timezone": timezone}}
+    names: dict[str, Any] = {
+        GROUP_NAMES[group][0]: {"$max": GROUP_NAMES[group][1]}
+        for group in group_by
+        if group in GROUP_NAMES
+    }
+
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {**keys, "task_count": "$meta.task"},
+                **names,
+                "count": {"$sum": 1},
+                "check_outs": {"$sum": {"$cond": ["$active", 1, 0]}},
+                "condition_sum": {"$sum": "$prompt.condition"},
+                "battery_sum": {"$sum": "$prompt.battery"},
+                "min_battery": {"$min": "$prompt.battery"},
+                "max_battery": {"$max": "$prompt.battery"},
+            }
+        },
+        {
+            "$group": {
+                "_id": {key: f"$_id.{key}" for key in keys},
+                **{name: {"$max": f"${name}"} for name in names},
+                "count": {"$sum": "$count"},
+                "check_outs": {"$sum": "$check_outs"},
+                "condition_sum": {"$sum": "$condition_sum"},
+                "battery_sum": {"$sum": "$battery_sum"},
+                "min_battery": {"$min": "$min_battery"},
+                "max_battery": {"$max": "$max_battery"},
+                "tasks": {"$push": {"k": "$_id.task_count", "v": "$count"}},
+            }
+        },
+        # Time buckets first, so each series reads in order
+        {"$sort": {f"_id.{key}": 1 for key in ["bucket", *keys] if key in keys} or {"count": -1}},
+        {"$limit": limit},
+        {
+            "$project": {
+                "_id": 0,
+                **{key: f"$_id.{key}" for key in keys},
+                **{name: 1 for name in names},
+                "count": 1,
+                "check_outs": 1,
+                "check_ins": {"$subtract": ["$count", "$check_outs"]},
+                "avg_condition": {"$divide": ["$condition_sum", "$count"]},
+                "avg_battery": {"$divide": ["$battery_sum", "$count"]},
+                "min_battery": 1,
+                "max_battery": 1,
+                "tasks": {"$arrayToObject": "$tasks"},
+            }
+        },
+    ]
+
+
+async def log_stats(
+    group_by: list[LogStatsGroup],
+    bucket: LogStatsBucket | None,
+    timezone: str,
+    start_date: datetime | None,
+    end_date: datetime | None,
+    active: bool | None,
+    limit: int,
+) -> list[LogStats]:
+    pipeline: list[dict[str, Any]] = stats_pipeline(
+        group_by, bucket, timezone, start_date, end_date, active, limit
+    )
+    documents: list[dict[str, Any]] = await Log.aggregate(pipeline).to_list()
+    return [LogStats.model_validate(document) for document in documents]
@@ -0,0 +1,171 @@
+# Standard Imports
+import asyncio
+import logging
+from logging import Logger
+from collections import defaultdict
+import time
+
+# Third Party Imports
+from beanie import Document, PydanticObjectId
+from pymongo.errors import BulkWriteError
+
+# My Imports
+from ..config import CONFIG_SETTINGS
+
+logging.basicConfig(level=logging.INFO)
+logger: Logger = logging.getLogger(__name__)
+
+
+def _log_write_failure(future: asyncio.Future[None], model: str) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Failed to write a queued `{model}` document: {future.exception()}")
+
+
+class WriteBuffer:
+    """
+    Coalesces single-document inserts into `insert_many` batches.
+
+    Documents are flushed when `max_batch` are queued or `max_delay` seconds after
+    the first one arrived, whichever comes first. The queue holds at most
+    `max_queue` documents; `submit` waits for room once it is full, which pushes
+    back on the request instead of growing memory. Ids are assigned up front so
+    callers can reference the document before it is written.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float, max_queue: int) -> None:
+        self.max_batch: int = max_batch
+        self.max_delay: float = max_delay
+        self.max_queue: int = max_queue
+        self._queue: asyncio.Queue[tuple[Document, asyncio.Future[None]]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._batch: list[tuple[Document, asyncio.Future[None]]] = []
+        self._inflight: asyncio.Task[None] | None = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Write buffer started")
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Flushes everything still queued, giving up after `timeout` seconds.
+        """
+        if self._task is None or self._queue is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        pending: list[tuple[Document, asyncio.Future[None]]] = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._task = None
+        self._queue = None
+        self._batch = []
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *([self._inflight] if self._inflight is not None else []),
+                    self._flush(pending),
+                ),
+                timeout=timeout,
+            )
+        except TimeoutError:
+            logger.error(f"Write buffer flush timed out, {len(pending)} documents pending")
+        logger.info(f"Write buffer stopped, flushed {len(pending)} queued documents")
+
+    async def submit(self, document: Document) -> asyncio.Future[None]:
+        """
+        Queues `document` for insertion and returns a future that resolves once
+        its batch is written. Falls back to a direct insert when not started.
+        """
+        if document.id is None:
+            document.id = PydanticObjectId()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        if self._queue is None:
+            try:
+                await document.insert()
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        await self._queue.put((document, future))
+        return future
+
+    async def enqueue(self, document: Document) -> None:
+        """
+        Queues `document` without waiting for its batch. A failed write is logged
+        here, since nobody awaits the future.
+        """
+        future: asyncio.Future[None] = await self.submit(document)
+        future.add_done_callback(lambda done: _log_write_failure(done, type(document).__name__))
+
+    async def insert(self, document: Document) -> Document:
+        """
+        Queues `document` and waits for its batch to be written.
+        """
+        await (await self.submit(document))
+        return document
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            self._batch = [await self._queue.get()]
+            deadline: float = time.monotonic() + self.max_delay
+            while len(self._batch) < self.max_batch:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    # Not `wait_for`, which can swallow the shutdown cancel when a
+                    # document is already queued
+                    async with asyncio.timeout(remaining):
+                        self._batch.append(await self._queue.get())
+                except TimeoutError:
+                    break
+            batch, self._batch = self._batch, []
+            # Shielded so a shutdown cancel can't abandon a batch mid-write
+            self._inflight = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _flush(self, batch: list[tuple[Document, asyncio.Future[None]]]) -> None:
+        by_model: dict[type[Document], list[tuple[Document, asyncio.Future[None]]]] = defaultdict(
+            list
+        )
+        for document, future in batch:
+            by_model[type(document)].append((document, future))
+
+        for model, items in by_model.items():
+            failed: dict[int, Exception] = {}
+            try:
+                await model.insert_many([document for document, _ in items], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed[error["index"]] = e
+            except Exception as e:
+                failed = {index: e for index in range(len(items))}
+            if failed:
+                logger.error(
+                    f"Failed to write {len(failed)}/{len(items)} `{model.get_collection_name()}`"
+                )
+
+            for index, (_, future) in enumerate(items):
+                if future.done():
+                    continue
+                if index in failed:
+                    future.set_exception(failed[index])
+                else:
+                    future.set_result(None)
+
+
+log_buffer: WriteBuffer = WriteBuffer(
+    max_batch=CONFIG_SETTINGS.LOG_BUFFER_MAX_BATCH,
+    max_delay=CONFIG_SETTINGS.LOG_BUFFER_MAX_DELAY_SECONDS,
+    max_queue=CONFIG_SETTINGS.LOG_BUFFER_MAX_QUEUE,
+)
@@ -0,0 +1,7 @@
+# Third Party Imports
+import pytest
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
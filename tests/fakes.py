@@ -0,0 +1,255 @@
+# Standard Imports
+from typing import Any, AsyncIterator
+
+# Third Party Imports
+from bson import ObjectId
+from pymongo import UpdateMany
+from pymongo.errors import DuplicateKeyError
+
+
+class FakeCursor:
+    def __init__(self, documents: list[dict[str, Any]]):
+        self.documents: list[dict[str, Any]] = documents
+
+    async def to_list(self) -> list[dict[str, Any]]:
+        return self.documents
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        async def iterate() -> AsyncIterator[dict[str, Any]]:
+            for document in self.documents:
+                yield document
+
+        return iterate()
+
+
+class FakeCollection:
+    """
+    Enough of a pymongo collection for `find` with an inclusion projection. Like
+    pymongo, an empty projection is dropped and whole documents come back.
+    """
+
+    def __init__(self, documents: list[dict[str, Any]]):
+        self.documents: list[dict[str, Any]] = documents
+        self.projections: list[dict[str, int] | None] = []
+
+    def find(
+        self,
+        query: dict[str, Any],
+        projection: dict[str, int] | None = None,
+        sort: Any = None,
+        limit: int = 0,
+    ) -> FakeCursor:
+        self.projections.append(projection)
+        documents: list[dict[str, Any]] = sorted(self.documents, key=lambda d: d["_id"])
+        if limit:
+            documents = documents[:limit]
+        if projection:
+            documents = [
+                {key: value for key, value in document.items() if key in projection}
+                for document in documents
+            ]
+        return FakeCursor([dict(document) for document in documents])
+
+
+class FakeDocuments:
+    """
+    A `find` over `_id` range queries, iterated asynchronously in `_id` order.
+    """
+
+    def __init__(self, documents: list[dict[str, Any]]):
+        self.documents: list[dict[str, Any]] = documents
+
+    def with_options(self, **options: Any) -> "FakeDocuments":
+        return self
+
+    async def _iterate(self, query: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        bounds: dict[str, Any] = query.get("_id", {})
+        for document in sorted(self.documents, key=lambda d: d["_id"]):
+            if "$gt" in bounds and not document["_id"] > bounds["$gt"]:
+                continue
+            if "$lt" in bounds and not document["_id"] < bounds["$lt"]:
+                continue
+            yield dict(document)
+
+    def find(self, query: dict[str, Any], **options: Any) -> AsyncIterator[dict[str, Any]]:
+        return self._iterate(query)
+
+
+def matches(document: dict[str, Any], query: dict[str, Any]) -> bool:
+    """
+    Evaluates the subset of the Mongo query language the services use.
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(matches(document, branch) for branch in condition):
+                return False
+            continue
+        value: Any = document
+        present: bool = True
+        for part in key.split("."):
+            present = present and isinstance(value, dict) and part in value
+            value = value.get(part) if isinstance(value, dict) else None
+        if not isinstance(condition, dict) or not any(k.startswith("$") for k in condition):
+            if value != condition:
+                return False
+            continue
+        for operator, operand in condition.items():
+            passed: bool
+            match operator:
+                case "$exists":
+                    passed = present == operand
+                case "$in":
+                    passed = value in operand
+                case "$nin":
+                    passed = value not in operand
+                case "$ne":
+                    passed = value != operand
+                case "$lt":
+                    passed = value is not None and value < operand
+                case "$lte":
+                    passed = value is not None and value <= operand
+                case "$gt":
+                    passed = value is not None and value > operand
+                case "$gte":
+                    passed = value is not None and value >= operand
+                case _:
+                    raise NotImplementedError(operator)
+            if not passed:
+                return False
+    return True
+
+
+class FakeResult:
+    def __init__(self, matched_count: int = 0, modified_count: int = 0, upserted_id: Any = None):
+        self.matched_count: int = matched_count
+        self.modified_count: int = modified_count
+        self.upserted_id: Any = upserted_id
+
+
+class FakeMongoCollection:
+    """
+    An in-memory collection whose operations never await midway, so each is atomic
+    the way a single document write is in Mongo and concurrent callers race the same
+    way they would against the server.
+    """
+
+    def __init__(self, documents: list[dict[str, Any]] | None = None):
+        self.documents: list[dict[str, Any]] = [dict(document) for document in documents or []]
+
+    def _apply(self, document: dict[str, Any], update: dict[str, Any]) -> None:
+        document.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + amount
+        for key in update.get("$unset", {}):
+            document.pop(key, None)
+
+    def _upsert(self, query: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+        document: dict[str, Any] = {
+            key: value
+            for key, value in query.items()
+            if not key.startswith("$") and not isinstance(value, dict)
+        }
+        document.setdefault("_id", ObjectId())
+        if any(existing["_id"] == document["_id"] for existing in self.documents):
+            raise DuplicateKeyError(f"Duplicate _id {document['_id']}")
+        document.update(update.get("$setOnInsert", {}))
+        self._apply(document, update)
+        self.documents.append(document)
+        return document
+
+    def _sorted(self, sort: list[tuple[str, int]] | None) -> list[dict[str, Any]]:
+        documents: list[dict[str, Any]] = list(self.documents)
+        for key, direction in reversed(sort or []):
+            if key == "$natural":
+                # Insertion order, which is the list order
+                if direction < 0:
+                    documents.reverse()
+                continue
+            documents.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return documents
+
+    async def find_one(
+        self, query: dict[str, Any], projection: Any = None, sort: Any = None
+    ) -> dict[str, Any] | None:
+        for document in self._sorted(sort):
+            if matches(document, query):
+                return dict(document)
+        return None
+
+    def find(self, query: dict[str, Any], projection: Any = None, **options: Any) -> FakeCursor:
+        return FakeCursor([dict(d) for d in self._sorted(options.get("sort")) if matches(d, query)])
+
+    async def find_one_and_update(
+        self,
+        query: dict[str, Any],
+        update: dict[str, Any],
+        projection: Any = None,
+        sort: Any = None,
+        upsert: bool = False,
+        return_document: Any = False,
+    ) -> dict[str, Any] | None:
+        for document in self._sorted(sort):
+            if matches(document, query):
+                before: dict[str, Any] = dict(document)
+                self._apply(document, update)
+                return dict(document) if return_document else before
+        if upsert:
+            return dict(self._upsert(query, update)) if return_document else None
+        return None
+
+    async def update_one(
+        self, query: dict[str, Any], update: dict[str, Any], upsert: bool = False
+    ) -> FakeResult:
+        for document in self.documents:
+            if matches(document, query):
+                before: dict[str, Any] = dict(document)
+                self._apply(document, update)
+                return FakeResult(1, int(before != document))
+        if upsert:
+            return FakeResult(upserted_id=self._upsert(query, update)["_id"])
+        return FakeResult()
+
+    async def update_many(self, query: dict[str, Any], update: dict[str, Any]) -> FakeResult:
+        result: FakeResult = FakeResult()
+        for document in self.documents:
+            if matches(document, query):
+                result.matched_count += 1
+                self._apply(document, update)
+                result.modified_count += 1
+        return result
+
+    async def bulk_write(self, operations: list[Any], ordered: bool = True) -> None:
+        for operation in operations:
+            if isinstance(operation, UpdateMany):
+                await self.update_many(operation._filter, operation._doc)
+            else:
+                await self.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+    async def delete_one(self, query: dict[str, Any]) -> None:
+        for document in self.documents:
+            if matches(document, query):
+                self.documents.remove(document)
+                return None
+
+    async def delete_many(self, query: dict[str, Any]) -> None:
+        self.documents = [document for document in self.documents if not matches(document, query)]
+
+    async def find_one_and_delete(self, query: dict[str, Any]) -> dict[str, Any] | None:
+        for document in self.documents:
+            if matches(document, query):
+                self.documents.remove(document)
+                return dict(document)
+        return None
+
+    async def insert_one(self, document: dict[str, Any]) -> None:
+        if any(existing["_id"] == document["_id"] for existing in self.documents):
+            raise DuplicateKeyError(f"Duplicate _id {document['_id']}")
+        self.documents.append(dict(document))
+
+    async def insert_many(self, documents: list[dict[str, Any]]) -> None:
+        for document in documents:
+            await self.insert_one(document)
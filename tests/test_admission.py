@@ -0,0 +1,108 @@
+# Standard Imports
+import asyncio
+from typing import Any
+
+# Third Party Imports
+import pytest
+
+# My Imports
+from app.services import AdmissionController
+from app.services.admission import RouteClass
+
+
+def controller(capacity: int = 1, max_queue: int = 4, timeout: float = 5.0) -> AdmissionController:
+    return AdmissionController(
+        capacity,
+        [
+            RouteClass(name="admin", priority=2, limit=1, max_queue=max_queue, timeout=timeout),
+            RouteClass(
+                name="packer", priority=0, limit=capacity, max_queue=max_queue, timeout=timeout
+            ),
+        ],
+    )
+
+
+@pytest.mark.anyio
+async def test_freed_slots_go_to_the_highest_priority_waiter() -> None:
+    admission: AdmissionController = controller()
+    assert await admission.acquire("admin")
+
+    admin: asyncio.Task[bool] = asyncio.create_task(admission.acquire("admin"))
+    await asyncio.sleep(0)
+    packer: asyncio.Task[bool] = asyncio.create_task(admission.acquire("packer"))
+    await asyncio.sleep(0)
+    assert admission.metrics()["classes"]["admin"]["queued"] == 1
+    assert admission.metrics()["classes"]["packer"]["queued"] == 1
+
+    # The packer queued last but is admitted first
+    admission.release("admin")
+    assert await packer
+    assert not admin.done()
+    admission.release("packer")
+    assert await admin
+    admission.release("admin")
+    assert admission.inflight == 0
+
+
+@pytest.mark.anyio
+async def test_lower_class_does_not_jump_a_waiting_higher_class() -> None:
+    admission: AdmissionController = AdmissionController(
+        2,
+        [
+            RouteClass(name="packer", priority=0, limit=1, max_queue=4, timeout=5.0),
+            RouteClass(name="admin", priority=2, limit=2, max_queue=4, timeout=5.0),
+        ],
+    )
+    assert await admission.acquire("packer")
+    assert await admission.acquire("admin")
+    packer: asyncio.Task[bool] = asyncio.create_task(admission.acquire("packer"))
+    await asyncio.sleep(0)
+
+    # A slot frees up that only the admin class could use, the packer keeps it open
+    admission.release("admin")
+    admin: asyncio.Task[bool] = asyncio.create_task(admission.acquire("admin"))
+    await asyncio.sleep(0)
+    assert not admin.done() and not packer.done()
+
+    admission.release("packer")
+    assert await packer
+    assert await admin
+
+
+@pytest.mark.anyio
+async def test_waiter_is_rejected_after_its_class_timeout() -> None:
+    admission: AdmissionController = controller(timeout=0.01)
+    assert await admission.acquire("admin")
+
+    assert not await admission.acquire("admin")
+    metrics: dict[str, Any] = admission.metrics()["classes"]["admin"]
+    assert (metrics["rejected"], metrics["queued"], metrics["inflight"]) == (1, 0, 1)
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected_without_waiting() -> None:
+    admission: AdmissionController = controller(max_queue=1)
+    assert await admission.acquire("admin")
+    waiting: asyncio.Task[bool] = asyncio.create_task(admission.acquire("admin"))
+    await asyncio.sleep(0)
+
+    assert not await admission.acquire("admin")
+    assert admission.metrics()["classes"]["admin"]["rejected"] == 1
+
+    admission.release("admin")
+    assert await waiting
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_gives_up_its_place() -> None:
+    admission: AdmissionController = controller()
+    assert await admission.acquire("admin")
+    waiting: asyncio.Task[bool] = asyncio.create_task(admission.acquire("admin"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    admission.release("admin")
+    assert admission.metrics()["classes"]["admin"]["queued"] == 0
+    assert admission.inflight == 0
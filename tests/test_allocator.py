@@ -0,0 +1,96 @@
+# Standard Imports
+import asyncio
+from datetime import timedelta
+from typing import Any
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+
+# My Imports
+from app.models import Machine, ActiveUsers
+from app.models.machines import LEASE_FREE, LEASE_HELD
+from app.services import claim_machine, hold_machine, release_machine, sync_machine_leases
+from app.utils import current_time
+from tests.fakes import FakeMongoCollection
+
+
+def machine(name: str, **lease: Any) -> dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "name": name,
+        "joined_condition": 5,
+        "lease_holder": None,
+        "lease_expires": LEASE_FREE,
+        **lease,
+    }
+
+
+@pytest.fixture
+def machines(monkeypatch: pytest.MonkeyPatch) -> FakeMongoCollection:
+    collection: FakeMongoCollection = FakeMongoCollection(
+        [machine("m1"), machine("m2"), machine("m3")]
+    )
+    monkeypatch.setattr(Machine, "get_pymongo_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+@pytest.fixture
+def activity(monkeypatch: pytest.MonkeyPatch) -> FakeMongoCollection:
+    collection: FakeMongoCollection = FakeMongoCollection()
+    monkeypatch.setattr(ActiveUsers, "get_pymongo_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+@pytest.mark.anyio
+async def test_concurrent_claims_never_share_a_machine(machines: FakeMongoCollection) -> None:
+    claims: list[Machine | None] = await asyncio.gather(
+        *[claim_machine(f"user-{index}") for index in range(10)]
+    )
+    claimed: list[str] = [claim.name for claim in claims if claim is not None]
+    assert sorted(claimed) == ["m1", "m2", "m3"]
+    # A user claiming again renews their own lease instead of taking a second machine
+    again: Machine | None = await claim_machine(claims[0].lease_holder)
+    assert again is not None and again.name == claims[0].name
+
+
+@pytest.mark.anyio
+async def test_only_one_packer_can_hold_a_machine(machines: FakeMongoCollection) -> None:
+    held: list[bool] = await asyncio.gather(
+        hold_machine("user-1", "m1"), hold_machine("user-2", "m1")
+    )
+    assert sorted(held) == [False, True]
+    winner: str = "user-1" if held[0] else "user-2"
+    loser: str = "user-2" if held[0] else "user-1"
+
+    # Releasing someone else's hold does nothing
+    await release_machine("m1", loser)
+    assert not await hold_machine(loser, "m1")
+    await release_machine("m1", winner)
+    assert await hold_machine(loser, "m1")
+
+
+@pytest.mark.anyio
+async def test_sync_frees_orphaned_holds_only(
+    machines: FakeMongoCollection, activity: FakeMongoCollection
+) -> None:
+    old = current_time() - timedelta(hours=1)
+    machines.documents = [
+        # Crashed between the hold and the activity insert
+        machine("orphan", lease_holder="user-1", lease_expires=LEASE_HELD, lease_held_at=old),
+        # Another worker is between the hold and the activity insert right now
+        machine(
+            "in-flight",
+            lease_holder="user-2",
+            lease_expires=LEASE_HELD,
+            lease_held_at=current_time(),
+        ),
+        machine("checked-out", lease_holder="user-3", lease_expires=LEASE_HELD, lease_held_at=old),
+    ]
+    activity.documents = [{"_id": ObjectId(), "user_id": "user-3", "machine_name": "checked-out"}]
+
+    await sync_machine_leases()
+    leases: dict[str, Any] = {
+        document["name"]: document["lease_expires"] for document in machines.documents
+    }
+    assert leases == {"orphan": LEASE_FREE, "in-flight": LEASE_HELD, "checked-out": LEASE_HELD}
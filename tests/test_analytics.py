@@ -0,0 +1,46 @@
+# Standard Imports
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+
+# My Imports
+from app.services import AnalyticsMirror
+from app.services.parquet import write_batch, write_partition
+
+START: datetime = datetime(2025, 1, 1)
+
+
+def log(index: int, hours: float, active: bool) -> tuple:
+    return (
+        f"log-{index}",
+        START + timedelta(hours=hours),
+        "u1",
+        'Uma, "U"',
+        "m1",
+        "Mill",
+        active,
+        5,
+        80,
+        "task",
+    )
+
+
+@pytest.mark.anyio
+async def test_mirror_reads_exported_files(tmp_path: Path) -> None:
+    mirror: AnalyticsMirror = AnalyticsMirror(tmp_path)
+    assert await mirror.utilization(START, START + timedelta(days=1), 10) == []
+
+    write_partition("machines", [("m1", "Mill", START, 9)], tmp_path / "machines" / "m.parquet")
+    # A check-out on one day and its check-in the next, in separate partitions
+    write_batch("logs", [log(0, 12, True), log(1, 30, False)], tmp_path, ObjectId(), ObjectId())
+    rows: list[dict[str, Any]] = await mirror.utilization(START, START + timedelta(days=2), 10)
+    assert rows[0]["machine_name"] == "Mill"
+    assert rows[0]["checked_out_seconds"] == 18 * 60 * 60
+
+    dwell: list[dict[str, Any]] = await mirror.dwell("user", START, START + timedelta(days=2), 10)
+    assert dwell[0]["name"] == 'Uma, "U"'
+    await mirror.stop()
@@ -0,0 +1,65 @@
+# Standard Imports
+from datetime import datetime, timedelta, timezone
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+
+# My Imports
+from app.models import MachineCatalogProjection
+from app.services import EventHub, machine_catalog
+from app.services import events
+from tests.fakes import FakeMongoCollection
+
+
+def test_machine_event_invalidates_catalog_in_every_worker(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(machine_catalog, "_entries", type(machine_catalog._entries)())
+    for name in ("old-name", "other"):
+        machine_catalog._put(MachineCatalogProjection(_id=ObjectId(), name=name, joined_condition=5))
+
+    # A worker that did not handle the rename, seeing the event come off the feed
+    EventHub().deliver("machine", None, ["old-name", "new-name"])
+
+    assert list(machine_catalog._entries) == ["other"]
+
+
+@pytest.mark.anyio
+async def test_feed_resumes_by_position_not_id() -> None:
+    now: datetime = datetime.now(timezone.utc)
+    seen: ObjectId = ObjectId.from_datetime(now)
+    feed: FakeMongoCollection = FakeMongoCollection([{"_id": seen, "kind": "log"}])
+    hub: EventHub = EventHub()
+    hub._last_id = seen
+
+    # Published by a worker whose clock is behind, and inserted after `seen`
+    late: ObjectId = ObjectId.from_datetime(now - timedelta(seconds=5))
+    feed.documents.append({"_id": late, "kind": "check_out", "activity_version": 3})
+    await hub._follow(feed)
+    assert (hub.seq, hub.activity_version, hub._last_id) == (1, 3, late)
+
+    # The cursor died and was reopened: nothing is delivered twice
+    await hub._follow(feed)
+    assert hub.seq == 1
+
+
+@pytest.mark.anyio
+async def test_reopened_feed_resyncs_after_an_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def read_activity_version() -> int:
+        return 7
+
+    monkeypatch.setattr(events, "read_activity_version", read_activity_version)
+    monkeypatch.setattr(machine_catalog, "_entries", type(machine_catalog._entries)())
+    machine_catalog._put(MachineCatalogProjection(_id=ObjectId(), name="m1", joined_condition=5))
+    seen: ObjectId = ObjectId()
+    feed: FakeMongoCollection = FakeMongoCollection([{"_id": seen, "kind": "log"}])
+    hub: EventHub = EventHub()
+    hub._last_id = seen
+    # What `_tail` leaves behind when the cursor errored
+    hub.live = False
+    hub._missed = True
+
+    async with hub.subscribe() as queue:
+        await hub._follow(feed)
+        assert queue.get_nowait() == "resync"
+    assert hub.live and hub.activity_version == 7
+    assert len(machine_catalog) == 0
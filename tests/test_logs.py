@@ -0,0 +1,13 @@
+# Third Party Imports
+import pytest
+from fastapi import HTTPException
+
+# My Imports
+from app.routes.logs import get_logs
+
+
+@pytest.mark.anyio
+async def test_unlimited_json_is_rejected() -> None:
+    with pytest.raises(HTTPException) as error:
+        await get_logs(limit=0, ascending=True, export_format="json")
+    assert error.value.status_code == 400
@@ -0,0 +1,49 @@
+# Standard Imports
+from typing import Any
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+
+# My Imports
+from app.models import User, Machine, Log, MachineMissingLog, Counter
+from app.services import backfill_log_names
+from tests.fakes import FakeMongoCollection
+
+USER_ID: ObjectId = ObjectId()
+MACHINE_ID: ObjectId = ObjectId()
+
+
+def patch(monkeypatch: pytest.MonkeyPatch, model: type, collection: FakeMongoCollection) -> None:
+    monkeypatch.setattr(model, "get_pymongo_collection", classmethod(lambda cls: collection))
+
+
+@pytest.mark.anyio
+async def test_backfill_runs_once_and_settles_orphans(monkeypatch: pytest.MonkeyPatch) -> None:
+    logs: FakeMongoCollection = FakeMongoCollection(
+        [
+            {"_id": ObjectId(), "meta": {"user_id": USER_ID, "machine_id": MACHINE_ID}},
+            # Its user and machine were deleted since
+            {"_id": ObjectId(), "meta": {"user_id": ObjectId(), "machine_id": ObjectId()}},
+        ]
+    )
+    counters: FakeMongoCollection = FakeMongoCollection()
+    patch(monkeypatch, User, FakeMongoCollection([{"_id": USER_ID, "name": "Uma"}]))
+    patch(monkeypatch, Machine, FakeMongoCollection([{"_id": MACHINE_ID, "name": "Mill"}]))
+    patch(monkeypatch, Log, logs)
+    patch(monkeypatch, MachineMissingLog, FakeMongoCollection())
+    patch(monkeypatch, Counter, counters)
+    monkeypatch.setattr(Log, "get_collection_name", classmethod(lambda cls: "logs_v2"))
+    monkeypatch.setattr(
+        MachineMissingLog, "get_collection_name", classmethod(lambda cls: "machine_missing_logs")
+    )
+
+    await backfill_log_names()
+    names: list[tuple[Any, Any]] = [(d["user_name"], d["machine_name"]) for d in logs.documents]
+    assert names == [("Uma", "Mill"), (None, None)]
+    assert counters.documents[0]["value"] == 1
+
+    # Later starts skip it, even with a log still missing a name
+    logs.documents.append({"_id": ObjectId(), "meta": {"user_id": USER_ID}})
+    await backfill_log_names()
+    assert "user_name" not in logs.documents[-1]
@@ -0,0 +1,325 @@
+# Standard Imports
+from datetime import datetime, timedelta
+from typing import Any
+
+# Third Party Imports
+import pytest
+from beanie.odm.fields import ExpressionField
+from bson import ObjectId
+
+# My Imports
+from app.models import (
+    ActiveUsers,
+    Log,
+    Machine,
+    MachineCatalogProjection,
+    PackerBatchCheckIn,
+    PackerBatchCheckOut,
+    PackerBatchResult,
+    Prompt,
+    Task,
+)
+from app.models.machines import LEASE_FREE, LEASE_HELD
+from app.services import commit_batch, commit_check_in, commit_check_out, event_hub
+from app.services import packer
+from tests.fakes import FakeMongoCollection
+
+USER_ID: str = str(ObjectId())
+PROMPT: Prompt = Prompt(condition=5, battery=80, task=Task.WORK)
+START: datetime = datetime(2025, 1, 1, 8)
+
+
+class FakeQuery:
+    """
+    The `find(...).project(...).to_list()` chain of a Beanie query.
+    """
+
+    def __init__(self, collection: FakeMongoCollection, query: dict[str, Any], model: Any):
+        self.collection: FakeMongoCollection = collection
+        self.query: dict[str, Any] = query
+        self.model: Any = model
+
+    def project(self, model: Any) -> "FakeQuery":
+        self.model = model
+        return self
+
+    async def to_list(self) -> list[Any]:
+        documents: list[dict[str, Any]] = await self.collection.find(self.query).to_list()
+        return [self.model.model_validate(document) for document in documents]
+
+
+class Store:
+    """
+    Fake `machines`, `activity` and `logs` collections behind the packer write paths,
+    with writes that can be made to fail by name.
+    """
+
+    def __init__(self, machine_names: list[str]) -> None:
+        self.machines: FakeMongoCollection = FakeMongoCollection(
+            [
+                {
+                    "_id": ObjectId(),
+                    "name": name,
+                    "joined_condition": 5,
+                    "lease_holder": None,
+                    "lease_expires": LEASE_FREE,
+                }
+                for name in machine_names
+            ]
+        )
+        self.activity: FakeMongoCollection = FakeMongoCollection()
+        self.logs: FakeMongoCollection = FakeMongoCollection()
+        self.events: list[str] = []
+        self.fail: set[str] = set()
+
+    def check(self, operation: str) -> None:
+        if operation in self.fail:
+            raise RuntimeError(f"{operation} failed")
+
+    def holder(self, name: str) -> str | None:
+        machine: dict[str, Any] = next(m for m in self.machines.documents if m["name"] == name)
+        return machine["lease_holder"] if machine["lease_expires"] == LEASE_HELD else None
+
+
+@pytest.fixture
+def store(monkeypatch: pytest.MonkeyPatch) -> Store:
+    store: Store = Store(["m1", "m2"])
+    for model, collection in (
+        (Machine, store.machines),
+        (ActiveUsers, store.activity),
+        (Log, store.logs),
+    ):
+        monkeypatch.setattr(
+            model, "get_pymongo_collection", classmethod(lambda cls, c=collection: c)
+        )
+
+    async def catalog_get(name: str) -> MachineCatalogProjection | None:
+        document: dict[str, Any] | None = await store.machines.find_one({"name": name})
+        return MachineCatalogProjection.model_validate(document) if document else None
+
+    async def create_activity(self: ActiveUsers) -> ActiveUsers:
+        store.check("activity")
+        self.id = self.id or ObjectId()
+        await store.activity.insert_one(self.model_dump(by_alias=True))
+        return self
+
+    async def insert_log(log: Log) -> Log:
+        store.check("log")
+        log.id = log.id or ObjectId()
+        await store.logs.insert_one(log.model_dump(by_alias=True))
+        return log
+
+    async def delete(self: ActiveUsers | Log) -> None:
+        await self.get_pymongo_collection().delete_one({"_id": self.id})
+
+    async def publish(kind: str, machine_names: list[str] | None = None) -> None:
+        store.check("publish")
+        store.events.append(kind)
+
+    def find(cls: Any, *queries: Any) -> FakeQuery:
+        query: dict[str, Any] = {}
+        for part in queries:
+            # `ExpressionField` keys compare into query operators, so make them plain
+            query.update(
+                {
+                    str(key): value
+                    for key, value in (part if isinstance(part, dict) else part.query).items()
+                }
+            )
+        return FakeQuery(cls.get_pymongo_collection(), query, cls)
+
+    async def insert_logs(cls: Any, logs: list[Log]) -> None:
+        store.check("logs")
+        await store.logs.insert_many([log.model_dump(by_alias=True) for log in logs])
+
+    # Set by `init_beanie` for the query operators
+    monkeypatch.setattr(Machine, "name", ExpressionField("name"), raising=False)
+    monkeypatch.setattr(Machine, "find", classmethod(find))
+    monkeypatch.setattr(ActiveUsers, "find", classmethod(find))
+    monkeypatch.setattr(Log, "insert_many", classmethod(insert_logs))
+    monkeypatch.setattr(packer.machine_catalog, "get", catalog_get)
+    monkeypatch.setattr(packer.log_buffer, "insert", insert_log)
+    monkeypatch.setattr(ActiveUsers, "create", create_activity)
+    monkeypatch.setattr(ActiveUsers, "delete", delete)
+    monkeypatch.setattr(Log, "delete", delete)
+    monkeypatch.setattr(event_hub, "publish", publish)
+    return store
+
+
+@pytest.mark.anyio
+async def test_failed_publish_does_not_fail_a_committed_write(store: Store) -> None:
+    store.fail.add("publish")
+
+    activity, log = await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+    assert [a["_id"] for a in store.activity.documents] == [activity.id]
+    assert [d["_id"] for d in store.logs.documents] == [log.id]
+    assert store.holder("m1") == USER_ID
+
+    assert await commit_check_in(USER_ID, "packer", "m1", 4, 60, None) is not None
+    assert store.activity.documents == []
+    assert len(store.logs.documents) == 2
+    assert store.holder("m1") is None
+
+
+@pytest.mark.anyio
+async def test_rollback_releases_the_machine_when_publish_fails(store: Store) -> None:
+    store.fail.update({"log", "publish"})
+
+    with pytest.raises(RuntimeError, match="log failed"):
+        await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+    assert store.activity.documents == []
+    assert store.holder("m1") is None
+
+
+def check_out(name: str, minutes: int) -> PackerBatchCheckOut:
+    return PackerBatchCheckOut.model_validate(
+        {
+            "event": "check_out",
+            "ts": START + timedelta(minutes=minutes),
+            "prompt_machine_name": name,
+            "prompt_condition": 5,
+            "prompt_battery": 80,
+            "prompt_task": "work",
+            "prompt_special_note": None,
+        }
+    )
+
+
+def check_in(name: str, minutes: int) -> PackerBatchCheckIn:
+    return PackerBatchCheckIn.model_validate(
+        {
+            "event": "check_in",
+            "ts": START + timedelta(minutes=minutes),
+            "prompt_machine_name": name,
+            "prompt_condition": 4,
+            "prompt_battery": 60,
+            "prompt_special_note": None,
+        }
+    )
+
+
+@pytest.mark.anyio
+async def test_batch_replays_events_and_applies_the_net_change(store: Store) -> None:
+    results, active = await commit_batch(
+        USER_ID, "packer", [check_out("m1", 0), check_in("m1", 30), check_out("m2", 40)]
+    )
+
+    assert [result.ok for result in results] == [True, True, True]
+    assert active
+    # Every event is logged with the scanner's time, only the last one is active
+    assert [(d["machine_name"], d["ts"], d["active"]) for d in store.logs.documents] == [
+        ("m1", START, True),
+        ("m1", START + timedelta(minutes=30), False),
+        ("m2", START + timedelta(minutes=40), True),
+    ]
+    assert [(a["machine_name"], a["ts"]) for a in store.activity.documents] == [
+        ("m2", START + timedelta(minutes=40))
+    ]
+    assert (store.holder("m1"), store.holder("m2")) == (None, USER_ID)
+    assert store.events == ["check_out"]
+
+
+@pytest.mark.anyio
+async def test_batch_rejects_conflicting_events_and_keeps_the_rest(store: Store) -> None:
+    other: str = str(ObjectId())
+    await commit_check_out(other, "other", "m2", PROMPT)
+    store.logs.documents.clear()
+
+    results, active = await commit_batch(
+        USER_ID,
+        "packer",
+        [
+            check_out("m2", 0),
+            check_in("m1", 5),
+            check_out("m1", 10),
+            check_out("missing", 15),
+            check_in("m2", 20),
+            check_in("m1", 25),
+        ],
+    )
+
+    assert [(result.ok, result.detail) for result in results] == [
+        (False, "Machine already checked out"),
+        (False, "Active user not found"),
+        (True, None),
+        (False, "Machine not found"),
+        (False, "Machine name mismatch"),
+        (True, None),
+    ]
+    assert all(isinstance(result, PackerBatchResult) for result in results)
+    assert not active
+    assert [d["machine_name"] for d in store.logs.documents] == ["m1", "m1"]
+    # The other packer's check-out is untouched
+    assert [a["user_id"] for a in store.activity.documents] == [other]
+    assert (store.holder("m1"), store.holder("m2")) == (None, other)
+
+
+@pytest.mark.anyio
+async def test_batch_rolls_back_when_the_activity_change_fails(store: Store) -> None:
+    initial, _ = await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+    store.logs.documents.clear()
+    store.events.clear()
+    store.fail.add("activity")
+
+    with pytest.raises(RuntimeError, match="activity failed"):
+        await commit_batch(USER_ID, "packer", [check_in("m1", 0), check_out("m2", 10)])
+
+    # The logs are gone and the user still has m1, as before the batch
+    assert store.logs.documents == []
+    assert [a["_id"] for a in store.activity.documents] == [initial.id]
+    assert (store.holder("m1"), store.holder("m2")) == (USER_ID, None)
+
+
+@pytest.mark.anyio
+async def test_batch_leaves_activity_alone_when_the_logs_fail(store: Store) -> None:
+    store.fail.add("logs")
+
+    with pytest.raises(RuntimeError, match="logs failed"):
+        await commit_batch(USER_ID, "packer", [check_out("m1", 0)])
+
+    assert store.logs.documents == []
+    assert store.activity.documents == []
+    assert store.holder("m1") is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("failing", ["activity", "log"])
+async def test_check_out_undoes_the_other_insert_and_releases(store: Store, failing: str) -> None:
+    store.fail.add(failing)
+
+    with pytest.raises(RuntimeError, match=f"{failing} failed"):
+        await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+    assert store.activity.documents == []
+    assert store.logs.documents == []
+    assert store.holder("m1") is None
+    # Only an activity row that was written and removed needs a dashboard refresh
+    assert store.events == (["activity"] if failing == "log" else [])
+
+
+@pytest.mark.anyio
+async def test_check_in_restores_the_check_out_when_the_log_fails(store: Store) -> None:
+    activity, _ = await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+    store.events.clear()
+    store.fail.add("log")
+
+    with pytest.raises(RuntimeError, match="log failed"):
+        await commit_check_in(USER_ID, "packer", "m1", 4, 60, None)
+    assert [a["_id"] for a in store.activity.documents] == [activity.id]
+    assert len(store.logs.documents) == 1
+    assert store.holder("m1") == USER_ID
+    assert store.events == ["activity"]
+
+
+@pytest.mark.anyio
+async def test_check_in_of_a_deleted_machine_restores_the_check_out(
+    store: Store, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    activity, _ = await commit_check_out(USER_ID, "packer", "m1", PROMPT)
+
+    async def catalog_get(name: str) -> None:
+        return None
+
+    monkeypatch.setattr(packer.machine_catalog, "get", catalog_get)
+    assert await commit_check_in(USER_ID, "packer", "m1", 4, 60, None) is None
+    assert [a["_id"] for a in store.activity.documents] == [activity.id]
+    assert len(store.logs.documents) == 1
@@ -0,0 +1,52 @@
+# Standard Imports
+from typing import Any
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+# My Imports
+from app.models import USER_FIELDS, ProjectedPage
+from app.services import parse_fields, field_projection, projected_page
+from tests.fakes import FakeCollection
+
+USERS: list[dict[str, Any]] = [
+    {"_id": ObjectId(), "name": f"user-{index}", "admin": False, "password": "scrypt$secret"}
+    for index in range(3)
+]
+
+
+class FakeUser:
+    collection: FakeCollection = FakeCollection(USERS)
+
+    @classmethod
+    def get_pymongo_collection(cls) -> FakeCollection:
+        return cls.collection
+
+
+def test_projection_is_never_empty() -> None:
+    assert field_projection(["id"]) == {"_id": 1}
+    assert field_projection(["id", "name"]) == {"_id": 1, "name": 1}
+
+
+def test_password_is_never_projected() -> None:
+    assert "password" not in field_projection(["name", "password"])
+    with pytest.raises(HTTPException):
+        parse_fields("id,password", USER_FIELDS)
+    with pytest.raises(HTTPException):
+        parse_fields("password", (*USER_FIELDS, "password"))
+
+
+@pytest.mark.anyio
+async def test_id_only_page_does_not_leak_passwords() -> None:
+    page: ProjectedPage = await projected_page(
+        FakeUser,
+        {},
+        parse_fields("id", USER_FIELDS),
+        None,
+        2,  # type: ignore[arg-type]
+    )
+    assert page.items == [{"id": str(USERS[0]["_id"])}, {"id": str(USERS[1]["_id"])}]
+    assert page.next_cursor == str(USERS[1]["_id"])
+    assert all("password" not in item for item in page.items)
@@ -0,0 +1,78 @@
+# Standard Imports
+import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+# Third Party Imports
+import duckdb
+import pytest
+from bson import ObjectId
+
+# My Imports
+from app.services import ParquetExporter
+from app.services import parquet
+from app.services.analytics import log_row
+from tests.fakes import FakeDocuments
+
+
+def log(ts: datetime, inserted: datetime) -> dict[str, Any]:
+    return {
+        "_id": ObjectId.from_datetime(inserted),
+        "ts": ts,
+        "meta": {"user_id": ObjectId(), "machine_id": ObjectId(), "task": "task"},
+        "active": True,
+        "prompt": {"condition": 5, "battery": 80},
+    }
+
+
+def exported_ids(root: Path) -> list[str]:
+    files: str = str(root / "logs" / "*" / "*.parquet")
+    return [row[0] for row in duckdb.sql(f"SELECT id FROM '{files}' ORDER BY id").fetchall()]
+
+
+@pytest.mark.anyio
+async def test_backdated_logs_inserted_later_are_exported(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(parquet, "EXPORT_FILE_ROWS", 2)
+    exporter: ParquetExporter = ParquetExporter(tmp_path, 0, timedelta(minutes=5))
+    now: datetime = datetime.now(timezone.utc)
+    naive: datetime = now.replace(tzinfo=None)
+
+    documents: list[dict[str, Any]] = [
+        log(naive - timedelta(days=1), now - timedelta(hours=2)),
+        log(naive - timedelta(hours=2), now - timedelta(hours=1, minutes=30)),
+        log(naive - timedelta(hours=1), now - timedelta(hours=1)),
+    ]
+    logs: FakeDocuments = FakeDocuments(documents)
+    assert await exporter._export("logs", logs, log_row, ObjectId.from_datetime(now)) == 3
+
+    # A batch from a packer that was offline: old `ts`, inserted now
+    late: dict[str, Any] = log(naive - timedelta(days=2), now)
+    documents.append(late)
+    cutoff: ObjectId = ObjectId.from_datetime(now + timedelta(seconds=1))
+    assert await exporter._export("logs", logs, log_row, cutoff) == 1
+    assert exported_ids(tmp_path) == sorted(str(document["_id"]) for document in documents)
+
+    # Nothing is exported twice
+    assert await exporter._export("logs", logs, log_row, cutoff) == 0
+
+
+@pytest.mark.anyio
+async def test_lost_export_dir_is_exported_again(tmp_path: Path) -> None:
+    exporter: ParquetExporter = ParquetExporter(tmp_path, 0, timedelta(minutes=5))
+    now: datetime = datetime.now(timezone.utc)
+    naive: datetime = now.replace(tzinfo=None)
+    documents: list[dict[str, Any]] = [
+        log(naive - timedelta(hours=2), now - timedelta(hours=2)),
+        log(naive - timedelta(hours=1), now - timedelta(hours=1)),
+    ]
+    logs: FakeDocuments = FakeDocuments(documents)
+    cutoff: ObjectId = ObjectId.from_datetime(now)
+    assert await exporter._export("logs", logs, log_row, cutoff) == 2
+
+    # A restarted container without its volume: the mark went with the files
+    shutil.rmtree(tmp_path / "logs")
+    assert await exporter._export("logs", logs, log_row, cutoff) == 2
+    assert exported_ids(tmp_path) == sorted(str(document["_id"]) for document in documents)
@@ -0,0 +1,37 @@
+# Standard Imports
+import asyncio
+
+# Third Party Imports
+import pytest
+
+# My Imports
+from app.services import PasswordHasher
+
+
+def cheap_hasher(workers: int = 2, max_queue: int = 1) -> PasswordHasher:
+    return PasswordHasher(n=16, r=1, p=1, workers=workers, max_queue=max_queue)
+
+
+@pytest.mark.anyio
+async def test_bulk_hashing_waits_instead_of_rejecting() -> None:
+    hasher: PasswordHasher = cheap_hasher()
+    passwords: list[str] = [f"password-{index}" for index in range(20)]
+    bulk, login = await asyncio.gather(hasher.hash_many(passwords), hasher.hash("login"))
+    assert hasher.rejected == 0
+    assert len(bulk) == len(passwords)
+    for encoded, password in zip(bulk, passwords):
+        assert await hasher.verify(encoded, password)
+    assert await hasher.verify(login, "login")
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_dummy_verify_does_kdf_work() -> None:
+    hasher: PasswordHasher = cheap_hasher()
+    await hasher.verify_dummy("anything")
+    # One hash for the dummy itself and one verify against it
+    assert hasher.completed == 2
+    await hasher.verify_dummy("anything")
+    assert hasher.completed == 3
+    assert not hasher.is_hashed("plaintext")
+    hasher.shutdown()
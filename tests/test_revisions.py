@@ -0,0 +1,51 @@
+# Standard Imports
+import asyncio
+from typing import Any
+
+# Third Party Imports
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+# My Imports
+from app.models import Machine
+from app.services import update_revision
+from tests.fakes import FakeMongoCollection
+
+MACHINE_ID: ObjectId = ObjectId()
+
+
+@pytest.fixture
+def machines(monkeypatch: pytest.MonkeyPatch) -> FakeMongoCollection:
+    collection: FakeMongoCollection = FakeMongoCollection(
+        [{"_id": MACHINE_ID, "name": "m1", "joined_condition": 5}]
+    )
+    monkeypatch.setattr(Machine, "get_pymongo_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+@pytest.mark.anyio
+async def test_concurrent_edits_of_one_revision_conflict(machines: FakeMongoCollection) -> None:
+    results: list[Any] = await asyncio.gather(
+        update_revision(Machine, str(MACHINE_ID), {"name": "first"}, 0),
+        update_revision(Machine, str(MACHINE_ID), {"name": "second"}, 0),
+        return_exceptions=True,
+    )
+    saved: list[dict[str, Any]] = [result for result in results if isinstance(result, dict)]
+    refused: list[HTTPException] = [r for r in results if isinstance(r, HTTPException)]
+    assert len(saved) == 1 and saved[0]["revision"] == 1
+    assert len(refused) == 1 and refused[0].status_code == 409
+    assert machines.documents[0]["name"] == saved[0]["name"]
+
+
+@pytest.mark.anyio
+async def test_stale_and_missing_revisions(machines: FakeMongoCollection) -> None:
+    await update_revision(Machine, str(MACHINE_ID), {"joined_condition": 4}, None)
+    with pytest.raises(HTTPException) as stale:
+        await update_revision(Machine, str(MACHINE_ID), {"joined_condition": 3}, 0)
+    assert stale.value.status_code == 409
+    assert (await update_revision(Machine, str(MACHINE_ID), {}, 1))["revision"] == 2
+
+    with pytest.raises(HTTPException) as missing:
+        await update_revision(Machine, str(ObjectId()), {"name": "gone"}, 0)
+    assert missing.value.status_code == 404
@@ -0,0 +1,37 @@
+# Standard Imports
+import asyncio
+
+# Third Party Imports
+import pytest
+
+# My Imports
+from app.services import NameIndex, name_prefix
+
+
+@pytest.mark.anyio
+async def test_writes_during_a_rebuild_are_kept() -> None:
+    loading: asyncio.Event = asyncio.Event()
+    release: asyncio.Event = asyncio.Event()
+
+    async def loader() -> list[str]:
+        loading.set()
+        await release.wait()
+        # Read before the writes below landed
+        return ["Alpha Mill", "Beta Lathe"]
+
+    index: NameIndex = NameIndex("machines", loader, refresh=60)
+    rebuild: asyncio.Task[None] = asyncio.create_task(index.rebuild())
+    await loading.wait()
+    index.add("Gamma Press")
+    index.remove("Beta Lathe")
+    release.set()
+    await rebuild
+
+    assert index.search("gamma") == ["Gamma Press"]
+    assert index.search("beta") == []
+    assert index.search("mill") == ["Alpha Mill"]
+
+
+def test_name_filter_is_an_anchored_literal_prefix() -> None:
+    # Anchored and without the `i` flag, so Mongo bounds the scan on the `name` index
+    assert name_prefix("name", "Mill (2).x").query == {"name": {"$regex": r"^Mill\ \(2\)\.x"}}
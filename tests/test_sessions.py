@@ -0,0 +1,127 @@
+# Standard Imports
+from typing import Any
+from datetime import timedelta
+
+# Third Party Imports
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+# My Imports
+from app.middleware import ServerSessionMiddleware, parse_session_cookie, rotate_session
+from app.services import SessionStore
+from app.services.sessions import MemorySessionBackend
+
+
+def two_workers() -> tuple[SessionStore, SessionStore]:
+    backend: MemorySessionBackend = MemorySessionBackend()
+    return (
+        SessionStore(backend, max_size=10, ttl=timedelta(hours=1)),
+        SessionStore(backend, max_size=10, ttl=timedelta(hours=1)),
+    )
+
+
+@pytest.mark.anyio
+async def test_delete_on_one_worker_revokes_everywhere() -> None:
+    worker_a, worker_b = two_workers()
+    version: int = await worker_a.save("session", {"user_id": "1"})
+    assert await worker_b.load("session", version) is not None
+    assert len(worker_b) == 1
+
+    await worker_a.delete("session")
+    # Worker B still caches the entry, but the replayed cookie is refused
+    assert await worker_b.load("session", version) is None
+    assert len(worker_b) == 0
+
+
+@pytest.mark.anyio
+async def test_change_on_one_worker_is_seen_by_another() -> None:
+    worker_a, worker_b = two_workers()
+    version: int = await worker_a.save("session", {"dark_mode": False})
+    await worker_b.load("session", version)
+
+    await worker_a.save("session", {"dark_mode": True})
+    state = await worker_b.load("session", version)
+    assert state is not None
+    assert state[0] == {"dark_mode": True}
+
+
+def session_app(store: SessionStore) -> Starlette:
+    async def login(request: Request) -> JSONResponse:
+        request.session.clear()
+        rotate_session(request)
+        request.session["user_id"] = "1"
+        return JSONResponse({})
+
+    async def visit(request: Request) -> JSONResponse:
+        request.session.setdefault("visits", 0)
+        request.session["visits"] += 1
+        return JSONResponse(dict(request.session))
+
+    async def logout(request: Request) -> JSONResponse:
+        request.session.clear()
+        return JSONResponse({})
+
+    async def asset(request: Request) -> JSONResponse:
+        return JSONResponse(dict(request.session))
+
+    app: Starlette = Starlette(
+        routes=[
+            Route("/login", login),
+            Route("/visit", visit),
+            Route("/logout", logout),
+            Route("/style/output.css", asset),
+        ]
+    )
+    app.add_middleware(ServerSessionMiddleware, store=store)  # pyrefly: ignore
+    return app
+
+
+def replay(store: SessionStore, cookie: str) -> dict[str, Any]:
+    """
+    Sends `cookie` from a client that has never seen the session.
+    """
+    client: TestClient = TestClient(session_app(store))
+    return client.get("/visit", headers={"cookie": f"session={cookie}"}).json()
+
+
+def test_login_issues_a_fresh_id_and_logout_revokes_it() -> None:
+    store: SessionStore = SessionStore(MemorySessionBackend(), 10, timedelta(hours=1))
+    client: TestClient = TestClient(session_app(store))
+
+    client.get("/visit")
+    before: str = client.cookies["session"]
+    client.get("/login")
+    after: str = client.cookies["session"]
+    assert parse_session_cookie(before)[0] != parse_session_cookie(after)[0]
+    # The pre-login id is gone
+    assert replay(store, before) == {"visits": 1}
+
+    assert client.get("/visit").json() == {"user_id": "1", "visits": 1}
+    logged_in: str = client.cookies["session"]
+    client.get("/logout")
+    assert replay(store, logged_in) == {"visits": 1}
+
+
+def test_static_files_never_touch_the_session_store() -> None:
+    backend: MemorySessionBackend = MemorySessionBackend()
+    store: SessionStore = SessionStore(backend, 10, timedelta(hours=1))
+    client: TestClient = TestClient(session_app(store))
+    client.get("/login")
+    reads: list[str] = []
+
+    async def version(session_id: str) -> int | None:
+        reads.append(session_id)
+        return await MemorySessionBackend.version(backend, session_id)
+
+    backend.version = version  # type: ignore[method-assign]
+    response = client.get("/style/output.css")
+    assert response.json() == {}
+    assert "set-cookie" not in response.headers
+    assert reads == []
+
+    client.get("/visit")
+    assert len(reads) == 1
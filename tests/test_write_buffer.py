@@ -0,0 +1,120 @@
+# Standard Imports
+import asyncio
+import logging
+from typing import Any
+
+# Third Party Imports
+import pytest
+from beanie import PydanticObjectId
+
+# My Imports
+from app.models import DashboardEvent
+from app.services.write_buffer import WriteBuffer
+from tests.fakes import FakeMongoCollection
+
+
+class Writes:
+    """
+    Records the batches `insert_many` receives, and can hold them back.
+    """
+
+    def __init__(self) -> None:
+        self.batches: list[list[PydanticObjectId]] = []
+        self.open: asyncio.Event = asyncio.Event()
+        self.open.set()
+
+
+@pytest.fixture
+def writes(monkeypatch: pytest.MonkeyPatch) -> Writes:
+    writes: Writes = Writes()
+
+    async def insert_many(cls: Any, documents: list[DashboardEvent], ordered: bool = True) -> None:
+        await writes.open.wait()
+        writes.batches.append([document.id for document in documents])
+
+    monkeypatch.setattr(
+        DashboardEvent, "get_pymongo_collection", classmethod(lambda cls: FakeMongoCollection())
+    )
+    monkeypatch.setattr(DashboardEvent, "insert_many", classmethod(insert_many))
+    return writes
+
+
+def event() -> DashboardEvent:
+    return DashboardEvent(kind="log")
+
+
+@pytest.mark.anyio
+async def test_full_batches_are_written_without_waiting_for_the_delay(writes: Writes) -> None:
+    buffer: WriteBuffer = WriteBuffer(max_batch=3, max_delay=60.0, max_queue=100)
+    await buffer.start()
+    documents: list[DashboardEvent] = [event() for _ in range(6)]
+
+    await asyncio.wait_for(asyncio.gather(*[buffer.insert(d) for d in documents]), timeout=1)
+    assert writes.batches == [[d.id for d in documents[:3]], [d.id for d in documents[3:]]]
+    await buffer.stop(timeout=1)
+
+
+@pytest.mark.anyio
+async def test_partial_batch_is_written_after_the_delay(writes: Writes) -> None:
+    buffer: WriteBuffer = WriteBuffer(max_batch=100, max_delay=0.05, max_queue=100)
+    await buffer.start()
+    documents: list[DashboardEvent] = [event() for _ in range(2)]
+
+    await asyncio.gather(*[buffer.insert(d) for d in documents])
+    await buffer.insert(late := event())
+    assert writes.batches == [[d.id for d in documents], [late.id]]
+    await buffer.stop(timeout=1)
+
+
+@pytest.mark.anyio
+async def test_submit_waits_for_room_when_the_queue_is_full(writes: Writes) -> None:
+    buffer: WriteBuffer = WriteBuffer(max_batch=1, max_delay=0.0, max_queue=2)
+    await buffer.start()
+    writes.open.clear()
+
+    # The first batch is stuck in `insert_many`, the next two fill the queue
+    for _ in range(3):
+        await buffer.enqueue(event())
+        await asyncio.sleep(0)
+    assert buffer.depth == 2
+    blocked: asyncio.Task[None] = asyncio.create_task(buffer.enqueue(event()))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    writes.open.set()
+    await asyncio.wait_for(blocked, timeout=1)
+    await buffer.stop(timeout=1)
+    assert sum(len(batch) for batch in writes.batches) == 4
+
+
+@pytest.mark.anyio
+async def test_stop_flushes_everything_still_queued(writes: Writes) -> None:
+    buffer: WriteBuffer = WriteBuffer(max_batch=100, max_delay=60.0, max_queue=100)
+    await buffer.start()
+    documents: list[DashboardEvent] = [event() for _ in range(5)]
+    futures: list[asyncio.Future[None]] = [await buffer.submit(d) for d in documents]
+    await asyncio.sleep(0)
+
+    await buffer.stop(timeout=1)
+    assert [id for batch in writes.batches for id in batch] == [d.id for d in documents]
+    assert all(future.done() and future.exception() is None for future in futures)
+
+
+@pytest.mark.anyio
+async def test_enqueued_write_failure_is_logged(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    async def fail(self: DashboardEvent) -> None:
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(
+        DashboardEvent, "get_pymongo_collection", classmethod(lambda cls: FakeMongoCollection())
+    )
+    monkeypatch.setattr(DashboardEvent, "insert", fail)
+    buffer: WriteBuffer = WriteBuffer(max_batch=10, max_delay=0.01, max_queue=10)
+
+    with caplog.at_level(logging.ERROR, logger="app.services.write_buffer"):
+        await buffer.enqueue(DashboardEvent(kind="activity"))
+        await asyncio.sleep(0)
+
+    assert "insert failed" in caplog.text